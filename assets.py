@@ -1,13 +1,22 @@
 # assets.py
+import os
+import json
 import base64
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageTk
+from PIL import Image, ImageDraw, ImageTk, ImageFilter, PngImagePlugin
 
-def get_icon(name, size):
+ICON_SET_VERSION = 1 # 修改图标绘制后递增，旧的图集缓存随之失效
+VARIANTS = ("normal", "hover", "pressed")
+ATLAS_WIDTH = 512
+
+def quantize_scale(dpi):
+    """把屏幕 DPI 换算为缩放比例，按 0.25 取整，避免细微差异导致重复生成"""
+    return max(1.0, round(dpi / 96 * 4) / 4)
+
+def draw_icon(name, size, factor=4):
     """
-    使用 PIL 动态绘制高清抗锯齿图标
+    使用 PIL 动态绘制高清抗锯齿图标 (factor 倍尺寸，未缩放)
     """
-    factor = 4
     actual_size = size * factor
     # 背景完全透明
     img = Image.new("RGBA", (actual_size, actual_size), (0, 0, 0, 0))
@@ -97,10 +106,99 @@ def get_icon(name, size):
         draw.line((cx, arrow_tip, cx + wing_size, arrow_tip - wing_size), fill="white", width=stroke)
 
 
+    elif name == "list":
+        # 三条横线 (播放列表)
+        stroke = int(2 * factor)
+        left = actual_size * 0.2
+        right = actual_size * 0.8
+        for ratio in (0.3, 0.5, 0.7):
+            y = actual_size * ratio
+            draw.line((left, y, right, y), fill="white", width=stroke)
+
+    return img
+
+def get_icon(name, size, variant="normal"):
+    """绘制图标，variant 为 hover 时加柔光，pressed 时降低不透明度"""
+    img = draw_icon(name, size)
+    if variant == "hover":
+        alpha = img.getchannel("A")
+        glow = Image.new("RGBA", img.size, (255, 255, 255, 0))
+        glow.putalpha(alpha.filter(ImageFilter.GaussianBlur(img.width * 0.04)).point(lambda a: a // 2))
+        img = Image.alpha_composite(glow, img)
+    elif variant == "pressed":
+        img.putalpha(img.getchannel("A").point(lambda a: a * 3 // 5))
+
     # 统一高质量缩放
     img = img.resize((size, size), Image.Resampling.LANCZOS)
     return img
 
-def get_icon_tk(name, size):
-    """返回 ImageTk 对象"""
-    return ImageTk.PhotoImage(get_icon(name, size))
+def get_icon_tk(name, size, master=None):
+    """返回 ImageTk 对象 (master 为所属窗口)"""
+    return ImageTk.PhotoImage(get_icon(name, size), master=master)
+
+class IconAtlas:
+    """
+    图标图集：所有图标的各个状态按缩放比例打包成一张 PNG，索引写在 PNG 文本块中
+    缓存文件以 图标版本 + DPI 命名，启动时一次读取；切换缩放比例时只绘制缺少的尺寸
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.sprites = {} # (name, px, variant) -> RGBA 图像
+        self.loaded = set()
+
+    def path_for(self, scale):
+        return os.path.join(self.cache_dir, f"icons-v{ICON_SET_VERSION}-{int(scale * 96)}dpi.png")
+
+    def ensure(self, icons, scale):
+        """
+        icons: {ref: (图标名, 逻辑尺寸)}
+        返回 {ref: {variant: 图像}}，像素尺寸 = 逻辑尺寸 x 缩放比例
+        """
+        path = self.path_for(scale)
+        if path not in self.loaded:
+            self.loaded.add(path)
+            self._load(path)
+
+        wanted = {ref: (name, round(size * scale)) for ref, (name, size) in icons.items()}
+        keys = [(name, px, v) for name, px in wanted.values() for v in VARIANTS]
+        missing = [k for k in keys if k not in self.sprites]
+        for name, px, variant in missing:
+            self.sprites[(name, px, variant)] = get_icon(name, px, variant)
+        if missing:
+            try: self._save(path, keys)
+            except OSError as e: print(f"Icon Atlas Error: {e}")
+
+        return {ref: {v: self.sprites[(name, px, v)] for v in VARIANTS} for ref, (name, px) in wanted.items()}
+
+    def _load(self, path):
+        try:
+            with Image.open(path) as sheet:
+                sheet.load()
+                index = json.loads(sheet.text.get("atlas", "{}"))
+                if index.get("version") != ICON_SET_VERSION: return
+                sheet = sheet.convert("RGBA")
+        except (OSError, ValueError):
+            return
+        for name, px, variant, x, y in index.get("sprites", []):
+            self.sprites.setdefault((name, px, variant), sheet.crop((x, y, x + px, y + px)))
+
+    def _save(self, path, keys):
+        # 按高度排序后逐行排布
+        keys = sorted(set(keys), key=lambda k: -k[1])
+        placed, x, y, row_h = [], 0, 0, 0
+        for name, px, variant in keys:
+            if x + px > ATLAS_WIDTH:
+                x, y, row_h = 0, y + row_h, 0
+            placed.append((name, px, variant, x, y))
+            x += px
+            row_h = max(row_h, px)
+
+        sheet = Image.new("RGBA", (ATLAS_WIDTH, y + row_h), (0, 0, 0, 0))
+        for name, px, variant, sx, sy in placed:
+            sheet.paste(self.sprites[(name, px, variant)], (sx, sy))
+        info = PngImagePlugin.PngInfo()
+        info.add_text("atlas", json.dumps({"version": ICON_SET_VERSION, "sprites": placed}))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        sheet.save(tmp, "PNG", pnginfo=info)
+        os.replace(tmp, path)
@@ -0,0 +1,416 @@
+# audio.py
+# 音频后端：播放器只通过这里的接口播放，可选 pygame 混音器或不出声的模拟后端
+import os
+import time
+import abc
+import wave
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+# 设置后覆盖 config.AUDIO_BACKEND，例如 MUSIC_PLAYER_AUDIO=null 在没有声卡的机器上运行
+AUDIO_ENV = "MUSIC_PLAYER_AUDIO"
+
+class AudioError(Exception):
+    """加载或播放失败 (文件无法解码、格式不支持 seek 等)"""
+
+class AudioBackend(abc.ABC):
+    """
+    后端接口，语义与 pygame.mixer.music 一致：
+    一次只播放一首，queue() 的曲目在当前曲目结束时无缝接上，get_pos() 从 play() 起计时
+    clock() 为播放时钟插值所用的时间源
+    """
+    name = None
+    clock = staticmethod(time.monotonic)
+    on_error = None # 后台线程中播放失败时调用 on_error(AudioError)，在该线程执行，调用方自行转回主线程
+
+    def init(self): pass
+    @abc.abstractmethod
+    def load(self, path): ...
+    @abc.abstractmethod
+    def play(self, start=0.0): ...
+    @abc.abstractmethod
+    def pause(self): ...
+    @abc.abstractmethod
+    def unpause(self): ...
+    @abc.abstractmethod
+    def stop(self): ...
+    @abc.abstractmethod
+    def unload(self): ...
+    @abc.abstractmethod
+    def queue(self, path): ...
+
+    @abc.abstractmethod
+    def get_pos(self):
+        """自最近一次 play() 以来的秒数 (不含 start，暂停不计)，未在播放时返回 None"""
+
+    @abc.abstractmethod
+    def get_busy(self):
+        """正在播放 (未暂停且未结束) 时返回 True"""
+
+    def quit(self): pass
+
+    def latency(self):
+        """输出缓冲带来的延迟 (秒)"""
+        return 0.0
+
+class PygameBackend(AudioBackend):
+    """pygame.mixer.music；buffer 越小延迟越低，但更容易出现爆音"""
+    name = "pygame"
+
+    def __init__(self, frequency=44100, buffer=2048, channels=2):
+        self.frequency = frequency
+        self.buffer = buffer
+        self.channels = channels
+        self.music = None
+        self.error = Exception
+
+    def init(self):
+        import pygame
+        pygame.mixer.init(frequency=self.frequency, size=-16, channels=self.channels, buffer=self.buffer)
+        self.music = pygame.mixer.music
+        self.error = pygame.error
+
+    def _call(self, fn, *args, **kwargs):
+        try: return fn(*args, **kwargs)
+        except self.error as e: raise AudioError(e)
+
+    def load(self, path): self._call(self.music.load, path)
+    def play(self, start=0.0): self._call(self.music.play, start=start)
+    def pause(self): self.music.pause()
+    def unpause(self): self.music.unpause()
+    def stop(self): self.music.stop()
+    def unload(self): self._call(self.music.unload)
+    def queue(self, path): self._call(self.music.queue, path)
+
+    def get_pos(self):
+        raw = self.music.get_pos()
+        return None if raw == -1 else raw / 1000
+
+    def get_busy(self):
+        return self.music.get_busy()
+
+    def quit(self):
+        import pygame
+        pygame.mixer.quit()
+
+    def latency(self):
+        return self.buffer / self.frequency
+
+class DspBackend(AudioBackend):
+    """
+    经过 dsp 效果链输出：逐块解码、交叉淡入淡出、均衡与响度归一，再转成 16 位 PCM 排入 pygame.mixer.Channel
+    送块线程保证通道队列里总有下一块；queue() 的曲目与当前曲目重叠 DSP_CROSSFADE 秒接上
+    """
+    name = "dsp"
+
+    def __init__(self, frequency=44100, buffer=2048, block=None):
+        self.frequency = frequency
+        self.buffer = buffer
+        self.block = block or config.DSP_BLOCK
+        self.channel = None
+        self.lock = threading.Lock()
+        self.path = None
+        self.queued = None      # 等待接上的下一首：解码线程中打开的 Future
+        self.decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode")
+        self.serial = 0         # play()/stop() 时加一，旧的送块线程随之退出
+        self.boundaries = [0]   # 各曲目开头在输出流中的帧位置
+        self.started = None     # 本次 play() 的时刻 (已扣除暂停)，未在播放时为 None
+        self.primed = False     # 第一块已排入通道，此前 get_pos 停在 0
+        self.paused_at = None
+        self.ended = True       # 输出流已全部排入通道
+
+    def init(self):
+        import pygame
+        import dsp
+        pygame.mixer.init(frequency=self.frequency, size=-16, channels=dsp.CHANNELS, buffer=self.buffer)
+        self.frequency = pygame.mixer.get_init()[0] # 实际采样率，解码按此重采样
+        self.channel = pygame.mixer.Channel(0)
+
+    def load(self, path):
+        if not os.path.isfile(path): raise AudioError(f"no such file: {path}")
+        self.stop()
+        self.path = path
+
+    def _open(self, path, start=0.0):
+        """解码第一块 (没有 ffmpeg 时即整首解码)，返回从第一块开始的 PCM 块；无法解码时抛出异常"""
+        import dsp
+        blocks = dsp.decode(path, self.block, self.frequency, start)
+        head = next(blocks, None)
+        return blocks if head is None else itertools.chain([head], blocks)
+
+    def _tracks(self, path, start, fade):
+        """
+        依次产出各曲目的 PCM 块，并记下下一首在输出流中的起点：与 dsp.crossfade 相同，
+        每首先与上一首留下的 held 帧混合，末尾再留下至多 fade 帧与下一首混合 (曲目很短时相应缩短)
+        曲目解码完时输出恰好到达这个起点，此时才取出队列中的下一首
+        """
+        count = [0]
+        def counted(blocks):
+            for b in blocks:
+                count[0] += len(b)
+                yield b
+        boundary, held = 0, 0
+        blocks = self._open(path, start) # 当前曲目无法解码时异常传给送块线程报告
+        while True:
+            count[0] = 0
+            yield counted(blocks)
+            rest = count[0] - min(count[0], held)
+            tail = min(rest, fade)
+            boundary += held + rest - tail
+            held = tail
+            with self.lock:
+                future, self.queued = self.queued, None
+            if future is None: return
+            try:
+                blocks = future.result()
+            except Exception as e:
+                # 排队的曲目无法解码：当前曲目照常播完，调用方随后切到它时再报告
+                print(f"Audio Error: {e}")
+                return
+            with self.lock:
+                self.boundaries.append(boundary)
+
+    def _stream(self, path, start):
+        import dsp
+        fade = int(config.DSP_CROSSFADE * self.frequency)
+        chain = dsp.default_chain(self.frequency)
+        for b in dsp.crossfade(self._tracks(path, start, fade), fade, self.block):
+            yield dsp.to_int16(chain.process(b))
+
+    def play(self, start=0.0):
+        if self.path is None: raise AudioError("no file loaded")
+        self.stop()
+        # 解码 (包括没有 ffmpeg 时的整首解码) 全部在送块线程进行，play() 与 seek 不阻塞界面；失败经 on_error 报告
+        stream = self._stream(self.path, start)
+        with self.lock:
+            self.boundaries = [0]
+            self.ended = False
+            self.primed = False
+            self.started = self.clock()
+            serial = self.serial
+        threading.Thread(target=self._feed, args=(serial, stream), daemon=True).start()
+
+    def _feed(self, serial, stream):
+        """送块线程：在锁外解码/处理下一块，通道队列空出 (且未暂停) 时排入"""
+        import pygame
+        wait = self.block / self.frequency / 4
+        while True:
+            try:
+                data = next(stream, None)
+            except Exception as e:
+                # 当前或排队的曲目无法解码：输出流到此结束
+                if serial == self.serial: self._report(AudioError(e))
+                data = None
+            if data is None: break
+            while data is not None:
+                with self.lock:
+                    if serial != self.serial: return
+                    if self.paused_at is None and self.channel.get_queue() is None:
+                        self.channel.queue(pygame.mixer.Sound(buffer=data))
+                        data = None
+                        if not self.primed:
+                            # 从第一块真正开始播放时计时
+                            self.primed = True
+                            self.started = self.clock()
+                if data is not None: time.sleep(wait)
+        with self.lock:
+            if serial == self.serial: self.ended = True
+
+    def _report(self, error):
+        if self.on_error: self.on_error(error)
+        else: print(f"Audio Error: {error}")
+
+    def pause(self):
+        if self.started is not None and self.paused_at is None:
+            self.channel.pause()
+            self.paused_at = self.clock()
+
+    def unpause(self):
+        if self.paused_at is not None:
+            self.channel.unpause()
+            self.started += self.clock() - self.paused_at
+            self.paused_at = None
+
+    def stop(self):
+        with self.lock:
+            self.serial += 1
+            self.queued = None
+            self.started = None
+            self.paused_at = None
+            self.ended = True
+            if self.channel: self.channel.stop()
+
+    def unload(self):
+        self.stop()
+        self.path = None
+
+    def queue(self, path):
+        if self.path is None: raise AudioError("no file loaded")
+        if not os.path.isfile(path): raise AudioError(f"no such file: {path}")
+        # 提前在解码线程打开，接上时送块线程不必等待整首解码
+        future = self.decoder.submit(self._open, path)
+        with self.lock:
+            self.queued = future
+
+    def _playing(self):
+        return self.started is not None and not (self.ended and not self.channel.get_busy())
+
+    def get_pos(self):
+        """与 pygame 一样，输出流越过下一首的起点后从 0 重新计时"""
+        if not self._playing(): return None
+        if not self.primed: return 0.0
+        now = self.paused_at if self.paused_at is not None else self.clock()
+        frames = (now - self.started) * self.frequency
+        with self.lock:
+            start = max(b for b in self.boundaries if b <= frames) if frames >= 0 else 0
+        return (frames - start) / self.frequency
+
+    def get_busy(self):
+        return self._playing() and self.paused_at is None
+
+    def quit(self):
+        import pygame
+        self.stop()
+        self.decoder.shutdown(wait=False, cancel_futures=True)
+        pygame.mixer.quit()
+
+    def latency(self):
+        return (self.buffer + self.block) / self.frequency
+
+class VirtualClock:
+    """
+    模拟后端的时钟：按 speed 倍速跟随单调时钟，另可用 advance() 手动拨快
+    speed=0 时完全由 advance() 驱动，便于确定性的测试与基准
+    """
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.origin = time.monotonic()
+        self.offset = 0.0
+
+    def __call__(self):
+        return (time.monotonic() - self.origin) * self.speed + self.offset
+
+    def advance(self, seconds):
+        self.offset += seconds
+
+def probe_duration(path):
+    """读取时长 (秒)，供模拟后端判断曲目何时结束"""
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as f:
+                return f.getnframes() / f.getframerate()
+        except (OSError, wave.Error) as e:
+            raise AudioError(e)
+    try:
+        import mutagen
+        audio = mutagen.File(path)
+    except Exception as e:
+        raise AudioError(e)
+    if audio is None or not getattr(audio.info, "length", 0):
+        raise AudioError(f"unsupported file: {path}")
+    return audio.info.length
+
+class NullBackend(AudioBackend):
+    """
+    不出声的模拟后端：只按虚拟时钟推进播放位置，队列、暂停与 seek 的行为与 pygame 一致
+    没有声卡 (或无界面运行、基准测试) 时使用
+    """
+    name = "null"
+
+    def __init__(self, clock=None, duration=probe_duration):
+        self.clock = clock or VirtualClock(config.NULL_AUDIO_SPEED)
+        self.duration = duration
+        self.path = None
+        self.length = 0.0
+        self.queued = None   # (路径, 时长)
+        self.busy = False
+        self.start = 0.0     # play(start=...)
+        self.started = 0.0   # 本次 play() 的虚拟时间 (已扣除暂停)
+        self.paused_at = None
+        self.transitions = 0 # 无缝接上队列曲目的次数
+
+    def load(self, path):
+        if not os.path.isfile(path): raise AudioError(f"no such file: {path}")
+        self.length = self.duration(path)
+        self.path = path
+        self.queued = None
+        self.busy = False
+        self.paused_at = None
+
+    def play(self, start=0.0):
+        if self.path is None: raise AudioError("no file loaded")
+        self.start = min(max(start, 0.0), self.length)
+        self.started = self.clock()
+        self.paused_at = None
+        self.busy = True
+
+    def _elapsed(self):
+        now = self.paused_at if self.paused_at is not None else self.clock()
+        return now - self.started
+
+    def _advance(self):
+        """当前曲目播完时接上队列中的下一首；与 pygame 一样，get_pos 从新曲目开头重新计时"""
+        while self.busy and self.start + self._elapsed() >= self.length:
+            if self.queued is None:
+                self.busy = False
+                return
+            overflow = self.start + self._elapsed() - self.length
+            self.path, self.length = self.queued
+            self.queued = None
+            self.start = 0.0
+            self.started = self.clock() - overflow
+            self.transitions += 1
+
+    def pause(self):
+        self._advance()
+        if self.busy and self.paused_at is None:
+            self.paused_at = self.clock()
+
+    def unpause(self):
+        if self.paused_at is not None:
+            self.started += self.clock() - self.paused_at
+            self.paused_at = None
+
+    def stop(self):
+        self.busy = False
+        self.queued = None
+        self.paused_at = None
+
+    def unload(self):
+        self.stop()
+        self.path = None
+
+    def queue(self, path):
+        if self.path is None: raise AudioError("no file loaded")
+        if not os.path.isfile(path): raise AudioError(f"no such file: {path}")
+        self.queued = (path, self.duration(path))
+
+    def get_pos(self):
+        self._advance()
+        return self._elapsed() if self.busy else None
+
+    def get_busy(self):
+        self._advance()
+        return self.busy and self.paused_at is None
+
+BACKENDS = {"pygame": PygameBackend, "dsp": DspBackend, "null": NullBackend}
+
+def create_backend(name=None):
+    """
+    按配置 (或环境变量 MUSIC_PLAYER_AUDIO) 创建并初始化后端
+    pygame 无法打开声卡时退回模拟后端，界面照常可用
+    """
+    name = name or os.environ.get(AUDIO_ENV) or config.AUDIO_BACKEND
+    if name in ("pygame", "dsp"):
+        buffer = config.AUDIO_LOW_LATENCY_BUFFER if config.AUDIO_LOW_LATENCY else config.AUDIO_BUFFER
+        backend = BACKENDS[name](config.AUDIO_SAMPLE_RATE, buffer)
+        try:
+            backend.init()
+            return backend
+        except Exception as e:
+            print(f"Audio Error: {e}")
+    elif name not in BACKENDS:
+        print(f"Audio Error: unknown backend {name!r}")
+    return NullBackend()
@@ -0,0 +1,1304 @@
+# bench.py
+"""
+性能与精度测量脚本 (无需 GUI)
+用法: python bench.py <name> [--json out.json]
+"""
+import os
+import sys
+import json
+import math
+import time
+import wave
+import struct
+import random
+import argparse
+import tempfile
+import subprocess
+import io
+import heapq
+import itertools
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 启动耗时预算 (ms)，超出时 bench.py startup 以非零状态退出，便于逐版本跟踪
+STARTUP_BUDGET_MS = {
+    "splash_import_ms": 150, # 显示开屏页面之前必须导入的模块
+    "import_ms": 1000,      # 导入 main 模块的全部耗时
+    "first_frame_ms": 2000, # 从进程启动到主窗口画出第一帧
+}
+
+# 完整 DSP 链路的实时倍率上限：超过时 bench.py dsp 以非零状态退出 (播放线程还要留出余量)
+DSP_RTF_BUDGET = 0.1
+
+# 调度器每秒唤醒次数上限：播放时约为 1000/POSITION_TICK 加上切歌的提前唤醒，暂停时应完全休眠，
+# 隐藏时只在曲目结束 (及加载轮询) 时唤醒
+SCHEDULER_WAKEUP_BUDGET = {"playing": 4.0, "paused": 0.5, "hidden": 2.0}
+
+# 播放时钟误差上限 (ms)：插值位置与真实进度之差，超出时 bench.py clock 以非零状态退出
+CLOCK_ERROR_BUDGET_MS = {"p95_ms": 50, "max_ms": 100, "end_error_ms": 100}
+
+# 无缝切歌的间隙误差上限 (ms)：与预期间隙 (pygame 为 0，dsp 为交叉淡入淡出的重叠) 之差
+GAPLESS_GAP_BUDGET_MS = 100
+
+def make_wav(path, seconds, rate=44100, freq=440.0):
+    """生成已知时长的正弦波 WAV 文件"""
+    frames = int(seconds * rate)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        chunk = []
+        for i in range(frames):
+            v = int(8000 * math.sin(2 * math.pi * freq * i / rate))
+            chunk.append(struct.pack("<hh", v, v))
+            if len(chunk) >= 4096:
+                w.writeframes(b"".join(chunk)); chunk = []
+        w.writeframes(b"".join(chunk))
+    return path
+
+def make_mp3(path, seconds):
+    """由静音 MPEG-1 Layer III 帧 (128kbps, 44.1kHz) 组成的 MP3"""
+    frame = b"\xff\xfb\x90\x00" + b"\x00" * 413 # 144 * 128000 / 44100 = 417 字节
+    with open(path, "wb") as f:
+        f.write(frame * int(seconds * 44100 / 1152))
+    return path
+
+def make_flac(path, seconds, rate=44100):
+    """只有 STREAMINFO 的 FLAC，足够让 mutagen 读出时长并写入标签"""
+    samples = int(seconds * rate)
+    info = struct.pack(">HH", 4096, 4096) + b"\x00" * 6
+    # 采样率 20 位 | 声道数-1 3 位 | 位深-1 5 位 | 总采样数 36 位
+    packed = (rate << 44) | (1 << 41) | (15 << 36) | samples
+    info += packed.to_bytes(8, "big") + b"\x00" * 16
+    with open(path, "wb") as f:
+        f.write(b"fLaC" + bytes([0x80]) + len(info).to_bytes(3, "big") + info)
+    return path
+
+def _box(kind, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+def make_m4a(path, seconds, rate=44100):
+    """最小的 AAC M4A 容器 (ftyp + moov + 空 mdat)"""
+    mvhd = (struct.pack(">IIIII", 0, 0, 0, 1000, int(seconds * 1000)) + struct.pack(">IH", 0x00010000, 0x0100)
+            + b"\x00" * 10 + struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+            + b"\x00" * 24 + struct.pack(">I", 2))
+    mdhd = struct.pack(">IIIIIHH", 0, 0, 0, rate, int(seconds * rate), 0x55c4, 0)
+    hdlr = struct.pack(">II4s", 0, 0, b"soun") + b"\x00" * 13
+    # esds: AAC LC, 44.1kHz 立体声
+    dcd = bytes([0x40, 0x15, 0, 0, 0]) + struct.pack(">II", 128000, 128000) + bytes([0x05, 2, 0x12, 0x10])
+    es = struct.pack(">HB", 1, 0) + bytes([0x04, len(dcd)]) + dcd + bytes([0x06, 1, 2])
+    esds = struct.pack(">I", 0) + bytes([0x03, len(es)]) + es
+    mp4a = _box(b"mp4a", b"\x00" * 6 + struct.pack(">H", 1) + b"\x00" * 8
+                + struct.pack(">HHHHI", 2, 16, 0, 0, rate << 16) + _box(b"esds", esds))
+    stbl = _box(b"stbl", _box(b"stsd", struct.pack(">II", 0, 1) + mp4a))
+    trak = _box(b"trak", _box(b"mdia", _box(b"mdhd", mdhd) + _box(b"hdlr", hdlr) + _box(b"minf", stbl)))
+    with open(path, "wb") as f:
+        f.write(_box(b"ftyp", b"M4A " + struct.pack(">I", 0) + b"M4A mp42isom")
+                + _box(b"moov", _box(b"mvhd", mvhd) + trak) + _box(b"mdat"))
+    return path
+
+def make_cover(px, seed=1):
+    """带噪声的渐变图，JPEG 体积接近真实封面"""
+    from PIL import Image
+    rnd = random.Random(seed)
+    noise = Image.effect_noise((px, px), 40)
+    grad = Image.linear_gradient("L").resize((px, px))
+    img = Image.merge("RGB", (noise, grad, grad.rotate(rnd.choice((90, 180, 270)))))
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+def make_lrc(lines, words=True):
+    """长歌词：一半行带逐字时间"""
+    out = ["[ti:Benchmark]", "[offset:120]"]
+    for i in range(lines):
+        t = i * 2.5
+        stamp = f"{int(t // 60):02d}:{t % 60:05.2f}"
+        if words and i % 2:
+            parts = [f"<{int((t + k * 0.4) // 60):02d}:{(t + k * 0.4) % 60:05.2f}>word{k}" for k in range(5)]
+            out.append(f"[{stamp}]" + " ".join(parts))
+        else:
+            out.append(f"[{stamp}]第 {i} 行歌词 line {i}")
+    return "\n".join(out)
+
+def make_fixtures(dirpath, seconds=240, cover_px=1500, lrc_lines=2000):
+    """生成带标签、大封面与长歌词的 MP3 / FLAC / M4A，返回 {格式: 路径}"""
+    from mutagen.id3 import ID3, TIT2, TPE1, USLT, APIC
+    from mutagen.flac import FLAC, Picture
+    from mutagen.mp4 import MP4, MP4Cover
+    cover = make_cover(cover_px)
+    lrc = make_lrc(lrc_lines)
+
+    mp3 = make_mp3(os.path.join(dirpath, "fixture.mp3"), seconds)
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text="MP3 Title"))
+    tags.add(TPE1(encoding=3, text="MP3 Artist"))
+    tags.add(USLT(encoding=3, lang="eng", desc="", text=lrc))
+    tags.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover))
+    tags.save(mp3)
+
+    flac = FLAC(make_flac(os.path.join(dirpath, "fixture.flac"), seconds))
+    flac["title"] = "FLAC Title"
+    flac["artist"] = "FLAC Artist"
+    flac["lyrics"] = lrc
+    pic = Picture()
+    pic.type, pic.mime, pic.data = 3, "image/jpeg", cover
+    flac.add_picture(pic)
+    flac.save()
+
+    m4a = MP4(make_m4a(os.path.join(dirpath, "fixture.m4a"), seconds))
+    m4a["\xa9nam"] = ["M4A Title"]
+    m4a["\xa9ART"] = ["M4A Artist"]
+    m4a["\xa9lyr"] = [lrc]
+    m4a["covr"] = [MP4Cover(cover, MP4Cover.FORMAT_JPEG)]
+    m4a.save()
+
+    return {"mp3": mp3, "flac": flac.filename, "m4a": m4a.filename, "cover": cover, "lrc": lrc}
+
+def _measure(fn, budget=0.5, min_calls=3):
+    """重复调用直到用完时间预算，返回单次耗时统计"""
+    samples = []
+    end = time.perf_counter() + budget
+    while len(samples) < min_calls or time.perf_counter() < end:
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    return {
+        "calls": len(samples),
+        "mean_ms": mean * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p95_ms": samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000,
+        "per_sec": 1 / mean if mean > 0 else 0.0,
+    }
+
+def _error_stats(errors):
+    errors = sorted(abs(e) for e in errors)
+    if not errors: return {}
+    return {
+        "samples": len(errors),
+        "mean_ms": sum(errors) / len(errors) * 1000,
+        "p95_ms": errors[min(int(len(errors) * 0.95), len(errors) - 1)] * 1000,
+        "max_ms": errors[-1] * 1000,
+    }
+
+def _audio_backend(name):
+    """按名称创建音频后端；pygame/dsp 在无声卡时使用 SDL 的 dummy 驱动"""
+    import audio
+    if name in ("pygame", "dsp"):
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        backend = audio.BACKENDS[name](44100, 2048)
+        backend.init()
+        return backend
+    return audio.NullBackend()
+
+def bench_clock(args):
+    """播放时钟误差：对比插值位置与已知时长文件的真实进度"""
+    import clock
+    seconds = args.seconds
+    results = {"length_s": seconds}
+
+    # 1. 模拟后端：get_pos 按缓冲区粒度步进并带抖动，中途 seek 一次
+    state = {"t0": time.monotonic()}
+    quantum = 2048 / 44100
+    def fake_source():
+        elapsed = time.monotonic() - state["t0"]
+        return math.floor(elapsed / quantum) * quantum + random.uniform(-0.005, 0.005)
+    clk = clock.PlaybackClock(fake_source)
+    clk.start(0)
+    errors = []
+    seek_at, seek_to = seconds / 2, seconds / 4
+    base = 0.0
+    last_sync = 0.0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        now = time.monotonic()
+        if base == 0.0 and now - state["t0"] >= seek_at:
+            base = seek_to; state["t0"] = now; clk.start(seek_to)
+        if now - last_sync >= 0.25:
+            clk.sync(); last_sync = now
+        truth = base + (now - state["t0"])
+        errors.append(clk.now() - truth)
+        time.sleep(0.005)
+    results["simulated"] = _error_stats(errors)
+    results["budget_ms"] = CLOCK_ERROR_BUDGET_MS
+    results["over_budget"] = _clock_over_budget("simulated", results["simulated"])
+
+    # 2. 音频后端 (--audio)
+    try:
+        backend = _audio_backend(args.audio)
+    except Exception as e:
+        results[args.audio] = {"skipped": str(e)}
+        return results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_wav(os.path.join(tmp, "clock.wav"), seconds)
+        clk = clock.PlaybackClock(backend.get_pos, backend.clock)
+        backend.load(path)
+        backend.play()
+        t0 = backend.clock()
+        clk.start(0)
+        errors = []
+        last_sync = 0.0
+        while backend.get_busy():
+            now = backend.clock()
+            if now - last_sync >= 0.25:
+                clk.sync(); last_sync = now
+            errors.append(clk.now() - (now - t0))
+            time.sleep(0.005)
+        finished = clk.now()
+        backend.unload()
+    backend.quit()
+    stats = _error_stats(errors)
+    stats["end_error_ms"] = (finished - seconds) * 1000
+    results[args.audio] = stats
+    results["over_budget"] += _clock_over_budget(args.audio, stats)
+    return results
+
+def _clock_over_budget(name, stats):
+    return [f"{name}.{k}" for k, limit in CLOCK_ERROR_BUDGET_MS.items() if k in stats and abs(stats[k]) > limit]
+
+def bench_gapless(args):
+    """
+    曲目间隙：旧的轮询切歌 vs 混音器队列无缝切歌
+    只在真实混音器上测量：模拟后端的队列交接只是记账，测出的间隙没有意义；
+    dsp 后端交叉淡入淡出，无缝模式的间隙应约为 -DSP_CROSSFADE
+    """
+    if args.audio == "null":
+        return {"skipped": "gapless needs a real mixer (--audio pygame/dsp); the null backend only simulates the queue"}
+    try:
+        backend = _audio_backend(args.audio)
+    except Exception as e:
+        return {"skipped": str(e)}
+    seconds = args.seconds
+    results = {"backend": args.audio, "length_s": seconds}
+    with tempfile.TemporaryDirectory() as tmp:
+        a = make_wav(os.path.join(tmp, "a.wav"), seconds)
+        b = make_wav(os.path.join(tmp, "b.wav"), seconds, freq=660.0)
+
+        def wait_end():
+            while backend.get_busy():
+                time.sleep(0.002)
+
+        # 旧逻辑：每 500ms 轮询一次，结束后再 load/play 下一首
+        backend.load(a)
+        backend.play()
+        t0 = backend.clock()
+        while backend.get_busy():
+            time.sleep(0.5)
+        backend.unload()
+        backend.load(b)
+        backend.play()
+        wait_end()
+        results["polled_gap_ms"] = (backend.clock() - t0 - 2 * seconds) * 1000
+
+        # 无缝模式：下一首提前排入队列
+        backend.load(a)
+        backend.play()
+        backend.queue(b)
+        t0 = backend.clock()
+        wait_end()
+        results["gapless_gap_ms"] = (backend.clock() - t0 - 2 * seconds) * 1000
+        backend.unload()
+    backend.quit()
+    import config
+    expected = -min(config.DSP_CROSSFADE, seconds) * 1000 if args.audio == "dsp" else 0.0
+    results["expected_gap_ms"] = expected
+    results["gap_error_ms"] = results["gapless_gap_ms"] - expected
+    results["budget_ms"] = GAPLESS_GAP_BUDGET_MS
+    results["over_budget"] = ["gap_error_ms"] if abs(results["gap_error_ms"]) > GAPLESS_GAP_BUDGET_MS else []
+    return results
+
+class _TableLibrary:
+    """曲库替身：时长取自表，封面与歌词为默认值，不读文件"""
+    def __init__(self, durations):
+        self.durations = durations
+
+    def get(self, path, size=None):
+        import metadata
+        import lyrics
+        return os.path.basename(path), "", self.durations[path], metadata.get_default_cover(), lyrics.LyricTimeline()
+
+def bench_playback(args):
+    """
+    无声卡驱动播放状态机：与播放器相同的 playback.PlaybackController + TrackLoader + RenderCache，
+    模拟后端的虚拟时钟按 POSITION_TICK 步进 (并遵循 tick_in 的提前唤醒)，每 10 首 seek 一次；
+    统计切歌检测延迟、进度误差与每模拟一小时的实际耗时
+    """
+    import audio
+    import config
+    import loader
+    import playback
+    import render_cache
+    rnd = random.Random(1)
+    tick = config.POSITION_TICK / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        durations = {}
+        for i in range(args.tracks):
+            path = os.path.join(tmp, f"{i:05d}.mp3")
+            open(path, "wb").close() # 时长由下面的表给出，文件只需存在
+            durations[path] = rnd.uniform(120, 300)
+        playlist = list(durations)
+
+        vclock = audio.VirtualClock(speed=0)
+        backend = audio.NullBackend(vclock, durations.__getitem__)
+        tracks = loader.TrackLoader(_TableLibrary(durations), render_cache.RenderCache(64 * 1024 * 1024))
+        ctl = playback.PlaybackController(backend, tracks, gapless=True)
+        # 真实位置：当前曲目位置 offset 对应的虚拟时间为 start
+        truth = {"start": 0.0, "offset": 0.0}
+        delays, errors, wake = [], [], {}
+
+        def on_track(track, gapless):
+            if gapless:
+                prev = playlist[ctl.current_index - 1]
+                true_end = truth["start"] + durations[prev] - truth["offset"]
+                delays.append(vclock() - true_end)
+                truth.update(start=true_end, offset=0.0)
+            else:
+                truth.update(start=vclock(), offset=0.0)
+
+        def wait_loader():
+            ctl.pending_load[1].exception() # 阻塞到加载完成 (虚拟时钟不走)，再按调度器的方式取回
+            ctl.poll_loader()
+
+        ctl.on_track = on_track
+        ctl.on_seek = lambda position: truth.update(start=vclock(), offset=position)
+        ctl.tick_in = lambda seconds: wake.update(s=min(seconds, wake.get("s", seconds)))
+        ctl.wait_loader = wait_loader
+
+        ticks = 0
+        wall = time.perf_counter()
+        ctl.add(playlist)
+        while ctl.current_index < len(playlist) - 1:
+            # after() 的唤醒时间有抖动
+            vclock.advance(min(tick, wake.pop("s", tick)) * rnd.uniform(0.9, 1.1))
+            ticks += 1
+            curr = ctl.tick()
+            if curr is None: continue
+            pos = vclock() - truth["start"] + truth["offset"]
+            errors.append(curr - pos)
+            if ctl.current_index % 10 == 5 and truth["offset"] == 0.0 and pos > 30:
+                ctl.seek(pos + 60) # 拖动进度条
+        wall = time.perf_counter() - wall
+        tracks.shutdown()
+    simulated_h = sum(durations.values()) / 3600
+    delays.sort()
+    return {
+        "tracks": len(playlist), "simulated_hours": simulated_h, "ticks": ticks,
+        "transitions": len(delays), "expected_transitions": len(playlist) - 1,
+        "detect_delay_ms": {"p50": delays[len(delays) // 2] * 1000, "max": delays[-1] * 1000} if delays else None,
+        "clock_error": _error_stats(errors),
+        "wall_ms_per_simulated_hour": wall * 1000 / simulated_h,
+    }
+
+def _synthetic_docs(n, seed=1):
+    """随机生成中英文混合的标题/艺术家/歌词"""
+    rnd = random.Random(seed)
+    latin = ["love", "night", "dream", "fire", "rain", "heart", "city", "light", "summer", "road",
+             "blue", "gold", "river", "star", "echo", "ghost", "wild", "home", "time", "sky"]
+    cjk = "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长知民样现分将外但身些与高意进把法此实回二理美点月明"
+    def words(k):
+        out = []
+        for _ in range(k):
+            if rnd.random() < 0.5: out.append(rnd.choice(latin))
+            else: out.append("".join(rnd.choice(cjk) for _ in range(rnd.randint(2, 4))))
+        return " ".join(out)
+    for i in range(n):
+        yield f"/music/{i:06d}.mp3", words(3), words(2), words(60)
+
+def bench_search(args):
+    """
+    搜索索引：不同曲库规模下的构建、保存/加载耗时与查询延迟
+    查询与播放列表面板相同 (search_positions，整个曲库都在播放列表中，不限条数)，在搜索线程执行
+    """
+    import search
+    results = {}
+    queries = ["love", "天", "明天", "summer rain", "gold 心", "nomatch"]
+    for size in args.sizes:
+        docs = list(_synthetic_docs(size))
+        positions = {path: i for i, (path, *_) in enumerate(docs)}
+        index = search.SearchIndex()
+        t = time.perf_counter()
+        for path, title, artist, text in docs:
+            index.add(path, title, artist, text)
+        build_s = time.perf_counter() - t
+
+        latencies = {}
+        for q in queries:
+            samples = []
+            # 逐字输入，模拟边输入边搜索
+            for k in range(1, len(q) + 1):
+                t = time.perf_counter()
+                hits = index.search_positions(q[:k], positions)
+                samples.append(time.perf_counter() - t)
+            latencies[q] = {"hits": len(hits), "mean_ms": sum(samples) / len(samples) * 1000,
+                            "max_ms": max(samples) * 1000}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "search.idx")
+            t = time.perf_counter(); index.save(path); save_s = time.perf_counter() - t
+            t = time.perf_counter(); search.SearchIndex.load(path); load_s = time.perf_counter() - t
+            size_bytes = os.path.getsize(path)
+
+        results[str(size)] = {
+            "build_s": build_s, "docs_per_s": size / build_s,
+            "save_s": save_s, "load_s": load_s, "file_bytes": size_bytes,
+            "queries": latencies,
+        }
+    return results
+
+def bench_session(args):
+    """会话快照：保存/恢复耗时与文件大小，以及后台文件校验耗时"""
+    import session
+    results = {}
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            playlist = [os.path.join(tmp, "Music", f"Artist {i % 500}", f"Album {i % 50}", f"{i:06d} Track.mp3")
+                        for i in range(size)]
+            sess = session.Session(playlist, size // 2, 123.4, 240.0, "Title", "Artist", "0" * 40 + ".jpg")
+            path = os.path.join(tmp, "session.bin")
+
+            save_samples, load_samples = [], []
+            for _ in range(5):
+                t = time.perf_counter(); session.save(path, sess); save_samples.append(time.perf_counter() - t)
+                t = time.perf_counter(); restored = session.load(path); load_samples.append(time.perf_counter() - t)
+            assert restored.playlist == playlist and restored.index == sess.index
+
+            t = time.perf_counter()
+            missing = session.find_missing(playlist)
+            validate_s = time.perf_counter() - t
+
+            results[str(size)] = {
+                "file_bytes": os.path.getsize(path),
+                "save_ms": min(save_samples) * 1000,
+                "restore_ms": min(load_samples) * 1000,
+                "validate_ms": validate_s * 1000,
+                "missing": len(missing),
+            }
+    return results
+
+def _importtime(modules):
+    """用 -X importtime 导入模块，返回 (总耗时 ms, 被导入模块直接引入的各模块耗时 ms, 错误信息)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+                          cwd=HERE, capture_output=True, text=True)
+    total, breakdown, pending = 0.0, {}, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2: continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit(): continue
+        ms = int(cumulative) / 1000
+        # 输出为后序：子模块先于父模块，缩进两格表示一层
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 1:
+            pending[name] = ms
+        elif depth == 0:
+            if name in modules:
+                total += ms
+                breakdown.update(pending)
+            pending = {}
+    if proc.returncode:
+        # 导入中途失败时没有顶层记录，按已完成的子模块统计
+        breakdown.update(pending)
+        total = total or sum(breakdown.values())
+    error = proc.stderr.strip().splitlines()[-1] if proc.returncode else None
+    return total, breakdown, error
+
+def _first_frame():
+    """启动 main.py 直到主窗口画出第一帧，返回 (进程外测得的耗时 ms, 探针报告, 错误信息)"""
+    import startup
+    env = dict(os.environ, **{startup.PROBE_ENV: "1"})
+    t = time.perf_counter()
+    try:
+        proc = subprocess.run([sys.executable, os.path.join(HERE, "main.py")], cwd=HERE, env=env,
+                              capture_output=True, text=True, timeout=60)
+    except subprocess.TimeoutExpired:
+        return None, None, "timeout"
+    wall = (time.perf_counter() - t) * 1000
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return wall, json.loads(line), None
+    err = proc.stderr.strip().splitlines()
+    return None, None, err[-1] if err else f"exit code {proc.returncode}"
+
+def bench_startup(args):
+    """启动耗时：导入耗时分解 + 首帧时间，并与预算比较"""
+    splash_runs, import_runs, frame_runs, probes = [], [], [], []
+    modules, errors = {}, []
+    for _ in range(args.runs):
+        splash_runs.append(_importtime(["splash", "startup", "config"])[0])
+        total, modules, error = _importtime(["main"])
+        import_runs.append(total)
+        if error: errors.append(error)
+        wall, probe, error = _first_frame()
+        if error: errors.append(error)
+        else:
+            frame_runs.append(wall)
+            probes.append(probe)
+
+    def median(values):
+        values = sorted(values)
+        return values[len(values) // 2] if values else None
+
+    result = {
+        "splash_import_ms": median(splash_runs),
+        "import_ms": median(import_runs),
+        "import_top": dict(sorted(modules.items(), key=lambda kv: -kv[1])[:15]),
+        "first_frame_ms": median(frame_runs),
+        "preload": probes[len(probes) // 2]["preload"] if probes else None,
+        "budget_ms": STARTUP_BUDGET_MS,
+        "errors": sorted(set(errors)),
+    }
+    result["over_budget"] = [k for k, limit in STARTUP_BUDGET_MS.items()
+                             if result[k] is not None and result[k] > limit]
+    return result
+
+def bench_hotpaths(args):
+    """元数据与渲染热点：标签解析、歌词解析、模糊背景、图标绘制 (无需 Tk 与声卡)"""
+    import metadata
+    import utils
+    import assets
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        fx = make_fixtures(tmp)
+        results["fixtures"] = {"cover_bytes": len(fx["cover"]), "lrc_lines": fx["lrc"].count("\n") + 1,
+                               "file_bytes": {k: os.path.getsize(fx[k]) for k in ("mp3", "flac", "m4a")}}
+
+        def read(path):
+            metadata._last_read = (None, None) # 跳过单条记忆缓存，测的是完整解析
+            _, _, duration, cover = metadata.get_track_info(path)
+            assert duration > 0 and cover.width > 0
+
+        for fmt in ("mp3", "flac", "m4a"):
+            stats = _measure(lambda: read(fx[fmt]), args.budget)
+            stats["tracks_per_sec"] = stats.pop("per_sec")
+            results[f"get_track_info[{fmt}]"] = stats
+
+        stats = _measure(lambda: metadata.parse_lrc_content(fx["lrc"]), args.budget)
+        stats["lrc_per_sec"] = stats.pop("per_sec")
+        results["parse_lrc_content"] = stats
+
+        cover = metadata.decode_cover(fx["cover"])
+        for w, h in ((400, 800), (1280, 800), (1920, 1080)):
+            stats = _measure(lambda: utils.process_background(cover, w, h), args.budget)
+            stats["frames_per_sec"] = stats.pop("per_sec")
+            results[f"process_background[{w}x{h}]"] = stats
+
+        for name, size in (("play", 55), ("import", 30)):
+            for variant in assets.VARIANTS:
+                stats = _measure(lambda: assets.get_icon(name, size, variant), args.budget)
+                stats["icons_per_sec"] = stats.pop("per_sec")
+                results[f"get_icon[{name}/{size}/{variant}]"] = stats
+    return results
+
+def bench_resize(args):
+    """模糊背景：全分辨率算法 vs 低分辨率模糊后放大 vs 拖动预览，并给出与原算法的像素差"""
+    import metadata
+    import utils
+    from PIL import ImageChops, ImageStat
+    cover = metadata.decode_cover(make_cover(1500))
+    thumb = cover.copy()
+    thumb.thumbnail((256, 256))
+    results = {}
+    for w, h in ((400, 800), (1280, 800), (1920, 1080), (2560, 1440), (3840, 2160)):
+        ref = utils.process_background(cover, w, h, work_scale=1)
+        fast = utils.process_background(cover, w, h)
+        preview = utils.preview_background(thumb, w, h)
+        row = {
+            "old": _measure(lambda: utils.process_background(cover, w, h, work_scale=1), args.budget),
+            "new": _measure(lambda: utils.process_background(cover, w, h), args.budget),
+            "preview": _measure(lambda: utils.preview_background(thumb, w, h), args.budget),
+        }
+        for name, img in (("new", fast), ("preview", preview)):
+            diff = ImageChops.difference(ref, img)
+            row[name]["mean_abs_diff"] = sum(ImageStat.Stat(diff).mean) / 3
+            row[name]["max_abs_diff"] = max(hi for _, hi in diff.getextrema())
+        row["speedup"] = row["old"]["mean_ms"] / row["new"]["mean_ms"]
+        results[f"{w}x{h}"] = row
+    return results
+
+def _proc_status_mb(field):
+    """读 /proc/self/status 中的内存字段 (MB)，非 Linux 返回 None"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def _peak_rss_mb():
+    """进程峰值常驻内存 (MB)；没有 resource 模块 (Windows) 时返回 None"""
+    # Linux 上 ru_maxrss 会继承 exec 之前父进程的峰值，优先读 VmHWM
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None: return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024 # macOS 单位为字节，Linux 为 KB
+
+def _cover_decode_run(mode, path, store_dir, n):
+    """在独立进程中解码封面 n 次，输出一行 JSON：单次耗时与解码前后的峰值内存"""
+    import config
+    import metadata
+    import library
+    import utils
+    from PIL import Image
+    with open(path, "rb") as f:
+        data = f.read()
+    cache = library.LibraryCache(store_dir)
+    ref = metadata.cover_key(data) + ".jpg"
+    box = utils.cover_size(config.START_WIDTH, config.START_HEIGHT)
+
+    def decode():
+        if mode == "full": # 旧实现：完整解码原图
+            return Image.open(io.BytesIO(data)).convert("RGB")
+        if mode == "draft": # 导入：按缩略图尺寸缩小解码
+            return metadata.decode_cover(data)
+        return cache.load_cover(ref, box) # 显示：读取缩略图并按封面显示框缩小解码
+
+    # 预先加载 JPEG 插件，首次调用不计入插件导入
+    buf = io.BytesIO()
+    Image.new("RGB", (16, 16)).save(buf, "JPEG")
+    Image.open(buf).convert("RGB")
+    before = _peak_rss_mb()
+    times = []
+    for _ in range(n):
+        t = time.perf_counter()
+        img = decode()
+        times.append((time.perf_counter() - t) * 1000)
+    after = _peak_rss_mb()
+    cache.close()
+    times.sort()
+    print(json.dumps({"size": list(img.size), "mean_ms": sum(times) / n, "p50_ms": times[n // 2],
+                      "peak_rss_mb": after, "peak_rss_delta_mb": after - before if after is not None else None}))
+
+def bench_covers(args):
+    """
+    大封面：完整解码 vs 导入时按缩略图尺寸缩小解码 vs 按默认窗口的封面显示框读取缩略图，
+    各模式在独立进程中测量耗时与峰值内存
+    """
+    import library
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for px in (1000, 1500, 3000):
+            fixture_dir = os.path.join(tmp, str(px))
+            os.makedirs(fixture_dir)
+            fixtures = make_fixtures(fixture_dir, seconds=1, cover_px=px, lrc_lines=0)
+            data = fixtures["cover"]
+            path = os.path.join(fixture_dir, "cover.jpg")
+            with open(path, "wb") as f:
+                f.write(data)
+            # 按导入流程预先写入缩略图，store 模式只测读取
+            store_dir = os.path.join(fixture_dir, "store")
+            os.makedirs(store_dir)
+            cache = library.LibraryCache(store_dir)
+            t = time.perf_counter()
+            library.extract(fixtures["mp3"], cache.cover_dir)
+            cache.close()
+
+            row = {"file_kb": len(data) / 1024, "import_ms": (time.perf_counter() - t) * 1000}
+            for mode in ("full", "draft", "store"):
+                code = f"import bench; bench._cover_decode_run({mode!r}, {path!r}, {store_dir!r}, {max(args.runs, 5)})"
+                proc = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True)
+                lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+                if lines:
+                    row[mode] = json.loads(lines[-1])
+                else:
+                    err = proc.stderr.strip().splitlines()
+                    row[mode] = {"error": err[-1] if err else f"exit code {proc.returncode}"}
+            if "mean_ms" in row["full"] and "mean_ms" in row["draft"]:
+                row["draft_speedup"] = row["full"]["mean_ms"] / row["draft"]["mean_ms"]
+            results[f"{px}px"] = row
+    return results
+
+class _Photo:
+    """代替 PhotoImage：按 Tk 的 RGBA 存储占用同样多的内存"""
+    def __init__(self, img):
+        self.size = img.size
+        self.pixels = bytearray(img.width * img.height * 4)
+
+    def width(self): return self.size[0]
+    def height(self): return self.size[1]
+
+SOAK_LEAK_LIMIT_MB = 2.0 # 预热后 Python 分配的增长上限
+
+def bench_soak(args):
+    """
+    长时间运行：用播放器的 playback.PlaybackController 依次切换数千首带不同封面的合成曲目
+    (模拟后端 + 曲库命中 -> 后台渲染 -> 创建 PhotoImage -> 预取前后曲目)，
+    用 tracemalloc 快照比较预热前后的 Python 内存，并检查图像内存不超过预算
+    """
+    import gc
+    import tracemalloc
+    from mutagen.id3 import ID3, TIT2, TPE1, USLT, APIC
+    import audio
+    import library
+    import loader
+    import memory
+    import playback
+    import render_cache
+    n = args.tracks
+    win_w, win_h = 640, 400
+    with tempfile.TemporaryDirectory() as tmp:
+        t = time.perf_counter()
+        lrc = make_lrc(40)
+        paths = []
+        for i in range(n):
+            path = make_mp3(os.path.join(tmp, f"{i:05d}.mp3"), 0.2)
+            tags = ID3()
+            tags.add(TIT2(encoding=3, text=f"Track {i}"))
+            tags.add(TPE1(encoding=3, text=f"Artist {i % 50}"))
+            tags.add(USLT(encoding=3, lang="eng", desc="", text=lrc))
+            tags.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=make_cover(256, seed=i)))
+            tags.save(path)
+            paths.append(path)
+        cache = library.LibraryCache(os.path.join(tmp, "cache"))
+        cache.store_rows([library.extract_row(p, cache.cover_dir) for p in paths])
+        setup_s = time.perf_counter() - t
+
+        # 预算取得较小，保证整个过程中不断触发收缩
+        budget = memory.MemoryBudget(24 * 1024 * 1024)
+        renders = render_cache.RenderCache(64 * 1024 * 1024) # 大于总预算，由 MemoryBudget 收缩
+        budget.register("render", renders)
+        tracks = loader.TrackLoader(cache, renders)
+        budget.register("loader", tracks)
+        vclock = audio.VirtualClock(speed=0)
+        ctl = playback.PlaybackController(audio.NullBackend(vclock), tracks)
+        state = {}
+
+        def on_track(track, gapless):
+            # 与 MusicPlayer.start_track / show_visuals 相同的保留方式
+            entry = track.visuals
+            if entry.tk_bg is None:
+                renders.attach_photos(entry, _Photo(entry.bg_img), _Photo(entry.cover_img))
+            state.update(cover=track.cover, tk_bg=entry.tk_bg, tk_cover=entry.tk_cover,
+                         timeline=track.timeline, cursor=track.timeline.cursor())
+            state["cursor"].seek(30.0)
+
+        def wait_loader():
+            ctl.pending_load[1].exception() # 阻塞到加载完成，再按调度器的方式取回
+            ctl.poll_loader()
+
+        ctl.on_track = on_track
+        ctl.wait_loader = wait_loader
+        ctl.view_size = lambda: (win_w, win_h)
+
+        def switch():
+            ctl.next()
+            vclock.advance(0.05)
+            ctl.tick()
+
+        switches = 2 * n
+        warmup = min(300, switches // 4)
+        samples = []
+        tracemalloc.start()
+        t = time.perf_counter()
+        ctl.add(paths)
+        for i in range(1, warmup): switch()
+        gc.collect()
+        before = tracemalloc.take_snapshot()
+        base = tracemalloc.get_traced_memory()[0]
+        for i in range(warmup, switches):
+            switch()
+            if (i - warmup) % max(1, (switches - warmup) // 10) == 0:
+                samples.append({"switch": i, "traced_mb": tracemalloc.get_traced_memory()[0] / 1e6,
+                                "rss_mb": _proc_status_mb("VmRSS"), "image_mb": budget.used() / 1e6})
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        growth = (tracemalloc.get_traced_memory()[0] - base) / 1e6
+        tracemalloc.stop()
+        elapsed = time.perf_counter() - t
+        tracks.shutdown()
+        cache.close()
+
+    top = [str(stat) for stat in after.compare_to(before, "lineno")[:5]]
+    image = budget.stats()
+    result = {
+        "tracks": n, "switches": switches, "setup_s": setup_s,
+        "switch_ms": elapsed * 1000 / switches,
+        "traced_growth_mb": growth, "leak_limit_mb": SOAK_LEAK_LIMIT_MB,
+        "image_memory": image, "render_cache": renders.stats(),
+        "samples": samples, "top_growth": top,
+    }
+    result["over_budget"] = [k for k, failed in (
+        ("traced_growth_mb", growth > SOAK_LEAK_LIMIT_MB),
+        ("image_memory", image["peak"] > image["max_bytes"]),
+    ) if failed]
+    return result
+
+def bench_instance(args):
+    """单实例转发：路径送达运行中实例的往返耗时，以及第二个 main.py 进程从启动到退出的时间"""
+    import threading
+    import config
+    import instance
+    with tempfile.TemporaryDirectory() as tmp:
+        old_cache = config.CACHE_DIR
+        config.CACHE_DIR = tmp
+        received = threading.Event()
+        server = instance.InstanceServer(received.set)
+        try:
+            if not server.start(): return {"error": "listen failed"}
+            track = make_wav(os.path.join(tmp, "track.wav"), 0.1)
+            result = {"forward": _measure(lambda: instance.forward([track]), args.budget)}
+            server.drain()
+
+            # 第二个进程使用同一个缓存目录 (HOME 指向临时目录)
+            home = os.path.join(tmp, "home")
+            os.makedirs(home)
+            os.symlink(tmp, os.path.join(home, os.path.basename(old_cache)))
+            env = dict(os.environ, HOME=home, USERPROFILE=home)
+            walls = []
+            for _ in range(args.runs):
+                received.clear()
+                t = time.perf_counter()
+                proc = subprocess.run([sys.executable, os.path.join(HERE, "main.py"), track], cwd=HERE, env=env,
+                                      capture_output=True, text=True, timeout=60)
+                walls.append((time.perf_counter() - t) * 1000)
+                if proc.returncode or not received.wait(1):
+                    err = proc.stderr.strip().splitlines()
+                    return dict(result, error=err[-1] if err else "not forwarded")
+            walls.sort()
+            result["second_launch_ms"] = walls[len(walls) // 2]
+            result["forwarded"] = server.drain()[-1]
+            return result
+        finally:
+            server.close()
+            config.CACHE_DIR = old_cache
+
+async def _http(port, method, target, token=""):
+    """发送一个请求，返回 (状态码, 响应体)"""
+    import asyncio
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nAuthorization: Bearer {token}\r\n"
+                 f"Content-Length: 0\r\n\r\n".encode())
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+def _sse_clients(port, token, subscribers, events):
+    """
+    在独立进程中运行的订阅端：建立 subscribers 个 SSE 连接，收齐 events 个事件后输出一行 JSON
+    事件中的 t 为发送时的 time.time()，与本进程的时钟比较得到送达延迟
+    """
+    import asyncio
+    latencies = []
+
+    async def subscribe(ready):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET /events?token={token} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await reader.readuntil(b"\r\n\r\n")
+        await reader.readuntil(b"\n\n") # 初始状态
+        ready.set()
+        try:
+            while True:
+                block = await asyncio.wait_for(reader.readuntil(b"\n\n"), 30)
+                now = time.time()
+                data = json.loads(block.split(b"data: ", 1)[1])
+                latencies.append(now - data["t"])
+                if data["seq"] == events - 1: break
+        finally:
+            writer.close()
+
+    async def run():
+        readies = [asyncio.Event() for _ in range(subscribers)]
+        tasks = [asyncio.create_task(subscribe(r)) for r in readies]
+        for r in readies: await r.wait()
+        print("ready", flush=True)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(run())
+    latencies.sort()
+    n = len(latencies)
+    print(json.dumps({
+        "delivered": n,
+        "latency_p50_ms": latencies[n // 2] * 1000 if n else None,
+        "latency_p95_ms": latencies[int(n * 0.95)] * 1000 if n else None,
+        "latency_max_ms": latencies[-1] * 1000 if n else None,
+    }), flush=True)
+
+def _sse_load(server, subscribers, events, rate):
+    """subscribers 个订阅者 (另一个进程) 同时订阅，按 rate 次/秒推送 events 个事件"""
+    code = f"import bench; bench._sse_clients({server.port}, {server.token!r}, {subscribers}, {events})"
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=HERE, stdout=subprocess.PIPE, text=True)
+    if proc.stdout.readline().strip() != "ready":
+        proc.wait()
+        return {"error": "subscribers failed to connect"}
+    deadline = time.perf_counter() + 30
+    while server.stats()["subscribers"] < subscribers and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    publish_cpu = 0.0
+    start = time.perf_counter()
+    cpu = time.process_time()
+    for i in range(events):
+        t = time.thread_time()
+        server.publish("position", {"seq": i, "t": time.time(), "position": i / rate})
+        publish_cpu += time.thread_time() - t
+        time.sleep(1 / rate)
+    out, _ = proc.communicate(timeout=events / rate + 60)
+    # 本进程 (发布线程 + 事件循环线程) 的 CPU 时间，按送达次数平摊即每个订阅者每个事件的服务端开销
+    cpu = time.process_time() - cpu
+    elapsed = time.perf_counter() - start
+    while server.stats()["subscribers"] and time.perf_counter() < deadline + 60:
+        time.sleep(0.01) # 等服务端退订，下一轮才能按订阅数判断是否就绪
+    lines = [l for l in out.splitlines() if l.startswith("{")]
+    if not lines: return {"error": f"exit code {proc.returncode}"}
+    result = json.loads(lines[-1])
+    result.update(expected=subscribers * events, deliveries_per_sec=result["delivered"] / elapsed,
+                  publish_cpu_us=publish_cpu / events * 1e6,
+                  server_cpu_us_per_delivery=cpu / max(result["delivered"], 1) * 1e6)
+    return result
+
+def bench_control(args):
+    """控制接口：命令往返延迟，以及不同订阅者数量下的 SSE 推送延迟与吞吐"""
+    import asyncio
+    import threading
+    import remote
+    # 用一个线程代替 Tk 主线程执行命令
+    wake = threading.Event()
+    bridge = remote.TkBridge(wake.set)
+    def ui():
+        while True:
+            wake.wait()
+            wake.clear()
+            bridge.run_pending()
+    threading.Thread(target=ui, daemon=True).start()
+
+    state = {"index": 0, "position": 0.0, "playing": True}
+    commands = {
+        "next": lambda p: state.update(index=state["index"] + 1),
+        "seek": lambda p: state.update(position=float(p["position"])),
+    }
+    server = remote.ControlServer(commands, lambda: dict(state), bridge)
+    if not server.start(): return {"error": str(server.error)}
+    try:
+        async def command_latency():
+            times = []
+            deadline = time.perf_counter() + args.budget
+            while time.perf_counter() < deadline or len(times) < 3:
+                t = time.perf_counter()
+                code, _ = await _http(server.port, "POST", "/seek?position=12.5", server.token)
+                times.append((time.perf_counter() - t) * 1000)
+                if code != 200: raise RuntimeError(f"HTTP {code}")
+            times.sort()
+            return {"calls": len(times), "mean_ms": sum(times) / len(times), "p95_ms": times[int(len(times) * 0.95)]}
+
+        result = {"command": asyncio.run(command_latency()), "subscribers": {}}
+        for n in (1, 10, 100, 1000):
+            result["subscribers"][n] = _sse_load(server, n, events=100, rate=50)
+        result["server"] = server.stats()
+        return result
+    finally:
+        server.close()
+
+def _write_pcm_wav(path, pcm, rate):
+    """float32 [帧数, 2] -> 16 位 WAV"""
+    import dsp
+    with wave.open(path, "wb") as w:
+        w.setnchannels(pcm.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(dsp.to_int16(pcm))
+
+def bench_dsp(args):
+    """
+    流式 DSP 的实时倍率 (RTF = 处理耗时 / 音频时长，越小越好)：
+    逐块解码、交叉淡入淡出、均衡、响度归一、增益各自单独计时，以及完整链路 (解码 -> 交叉淡入淡出 -> 效果链)
+    合成 3 首 --seconds 秒的立体声曲目 (正弦 + 噪声)，各块大小重复 --runs 次取中位数
+    另检查响度归一不削波：安静的底噪上叠加 -1 dBFS 的瞬态，提升后的输出不得超过上限
+    """
+    import numpy as np
+    import config
+    import dsp
+    rate = config.AUDIO_SAMPLE_RATE
+    bands = ((60, 6.0), (230, 2.0), (910, 0.0), (3600, -2.0), (14000, 3.0))
+    rng = np.random.default_rng(1)
+    frames = int(args.seconds * rate)
+    t = np.arange(frames, dtype=np.float32)[:, None] / rate
+    tracks = [(0.3 * np.sin(2 * np.pi * f * t) + 0.05 * rng.standard_normal((frames, 2))).astype(np.float32)
+              for f in (110.0, 440.0, 1760.0)]
+    fade = int(min(config.DSP_CROSSFADE, args.seconds / 2) * rate)
+    results = {"rate": rate, "track_seconds": args.seconds, "crossfade_seconds": fade / rate, "blocks": {}}
+    over = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, pcm in enumerate(tracks):
+            paths.append(os.path.join(tmp, f"{i}.wav"))
+            _write_pcm_wav(paths[-1], pcm, rate)
+
+        for block in sorted({256, config.DSP_BLOCK, 4096}):
+            split = [[pcm[i:i + block] for i in range(0, len(pcm), block)] for pcm in tracks]
+            one = split[0]
+            audio_s = frames / rate
+
+            def effect(make):
+                def run():
+                    fx = make()
+                    for b in one: fx.process(b)
+                return run, audio_s
+
+            def decode():
+                for _ in dsp.decode(paths[0], block, rate): pass
+
+            def crossfade():
+                for _ in dsp.crossfade(split, fade, block): pass
+
+            def chain():
+                fx = dsp.Chain([dsp.Equalizer(bands, rate), dsp.Normalizer(rate=rate), dsp.Gain(-3.0)])
+                for b in dsp.crossfade((dsp.decode(p, block, rate) for p in paths), fade, block):
+                    fx.process(b)
+
+            stream_s = (3 * frames - 2 * fade) / rate
+            cases = {
+                "decode": (decode, audio_s),
+                "crossfade": (crossfade, stream_s),
+                "equalizer": effect(lambda: dsp.Equalizer(bands, rate)),
+                "normalizer": effect(lambda: dsp.Normalizer(rate=rate)),
+                "gain": effect(lambda: dsp.Gain(-3.0)),
+                "chain": (chain, stream_s),
+            }
+            row = {}
+            for name, (fn, seconds) in cases.items():
+                times = []
+                for _ in range(args.runs):
+                    t0 = time.perf_counter()
+                    fn()
+                    times.append(time.perf_counter() - t0)
+                elapsed = sorted(times)[len(times) // 2]
+                row[name] = {"rtf": elapsed / seconds, "x_realtime": seconds / elapsed,
+                             "us_per_block": elapsed * 1e6 / (seconds * rate / block)}
+            results["blocks"][block] = row
+            if row["chain"]["rtf"] > DSP_RTF_BUDGET: over.append(block)
+
+    # -40 dBFS 底噪，每 0.5 秒一个 -1 dBFS 的 5ms 正弦瞬态；归一会提升到最大增益，瞬态必须靠压低增益而不是削波
+    # 采样后的正弦没有两个相邻采样相等，输出中相邻两个采样都贴着上限 (被削平) 即为削波
+    quiet = (0.01 * rng.standard_normal((10 * rate, 2))).astype(np.float32)
+    burst = int(0.005 * rate)
+    for i in range(0, len(quiet), rate // 2):
+        quiet[i:i + burst] = 10 ** (-1 / 20) * np.sin(np.arange(burst) * 0.3)[:, None]
+    block = config.DSP_BLOCK
+    norm = dsp.Normalizer(rate=rate)
+    out = np.concatenate([norm.process(quiet[i:i + block]) for i in range(0, len(quiet), block)])
+    at_ceiling = np.abs(out) >= norm.ceiling - 1e-5
+    clipped = int(np.count_nonzero(at_ceiling[1:] & at_ceiling[:-1])) + int(np.count_nonzero(np.abs(out) > norm.ceiling + 1e-6))
+    results["clipping"] = {"ceiling": norm.ceiling, "output_peak": float(np.max(np.abs(out))),
+                           "final_gain_db": 20 * math.log10(norm.gain), "clipped_samples": clipped}
+    if clipped: over.append("clipping")
+    results["rtf_budget"] = DSP_RTF_BUDGET
+    results["over_budget"] = over
+    return results
+
+class _BaselineLyrics:
+    """改造前的歌词绘制：每帧删除全部文本对象再逐行 create_text"""
+    def __init__(self, canvas, w, h):
+        self.canvas = canvas
+        self.w, self.h = w, h
+        self.items = []
+        self.frame_times = []
+
+    def render(self, timeline, active, offset):
+        import config
+        import utils
+        t0 = time.perf_counter()
+        for item_id in self.items:
+            self.canvas.delete(item_id)
+        self.items = []
+        cx, center_y = self.w / 2, self.h * 0.63
+        visible_range = config.LYRIC_LINE_HEIGHT * 1.38
+        for rel in (-2, -1, 0, 1, 2):
+            idx = active + rel
+            if 0 <= idx < len(timeline):
+                y_pos = center_y + rel * config.LYRIC_LINE_HEIGHT + offset
+                if center_y - visible_range < y_pos < center_y + visible_range:
+                    is_active = (idx == active)
+                    self.items.append(self.canvas.create_text(
+                        cx, y_pos, text=timeline.texts[idx],
+                        font=(utils.REAL_FONT_NAME, config.LYRIC_FONT_SIZE if is_active else config.LYRIC_FONT_SIZE_SUB,
+                              "bold" if is_active else "normal"),
+                        fill="white" if is_active else "#888888", anchor="center", width=self.w - 80))
+        self.frame_times.append(time.perf_counter() - t0)
+
+def bench_lyrics(args):
+    """歌词渲染：LyricView 复用画布对象 vs 原来的逐帧删除重建，按 60fps 回放换行滚动 (需要 Tk 显示)"""
+    import tkinter as tk
+    import config
+    import lyrics
+    import lyric_view
+    from collections import deque
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {"error": str(e)}
+    w, h = config.START_WIDTH, config.START_HEIGHT
+    root.geometry(f"{w}x{h}")
+    timeline = lyrics.parse_lrc(make_lrc(200))
+    frame_dt = 1000 / 60
+    results = {}
+    for name in ("old", "new"):
+        canvas = tk.Canvas(root, width=w, height=h, bg="black", highlightthickness=0)
+        canvas.pack()
+        root.update()
+        if name == "new":
+            view = lyric_view.LyricView(canvas)
+            view.layout(w, h)
+            view.frame_times = deque() # 统计全部帧，不只最近 600 帧
+        else:
+            view = _BaselineLyrics(canvas, w, h)
+        paint = []
+        for active in range(min(len(timeline), int(args.seconds * 24))):
+            # 与 animate_lyrics 相同：换行时从一行高处平滑滚回 0
+            offset = config.LYRIC_LINE_HEIGHT
+            while True:
+                view.render(timeline, active, offset)
+                t0 = time.perf_counter()
+                root.update_idletasks() # 含画布重绘
+                paint.append(time.perf_counter() - t0)
+                diff = -offset
+                if abs(diff) <= 0.5: break
+                offset += diff * (1 - (1 - config.LYRIC_SMOOTHING) ** (frame_dt / config.LYRIC_REFRESH_RATE))
+        results[name] = lyric_view.frame_stats(view.frame_times)
+        results[name]["paint"] = lyric_view.frame_stats(paint)
+        results[name]["canvas_items"] = len(canvas.find_all())
+        canvas.destroy()
+    root.destroy()
+    results["speedup"] = results["old"]["mean_ms"] / results["new"]["mean_ms"] if results["new"]["mean_ms"] else None
+    results["over_budget"] = ["mean_ms"] if results["new"]["mean_ms"] > results["old"]["mean_ms"] else []
+    return results
+
+class _AfterLoop:
+    """after()/after_cancel() 的替身：按到期时间在本线程依次执行回调，代替 Tk 主循环"""
+    def __init__(self):
+        self.queue = []
+        self.ids = itertools.count()
+        self.cancelled = set()
+
+    def after(self, ms, fn):
+        after_id = next(self.ids)
+        heapq.heappush(self.queue, (time.monotonic() + ms / 1000, after_id, fn))
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.cancelled.add(after_id)
+
+    def run(self, seconds):
+        end = time.monotonic() + seconds
+        while True:
+            while self.queue and self.queue[0][1] in self.cancelled:
+                self.cancelled.discard(heapq.heappop(self.queue)[1])
+            due = self.queue[0][0] if self.queue else end
+            if due >= end: break
+            time.sleep(max(0.0, due - time.monotonic()))
+            fn = heapq.heappop(self.queue)[2]
+            fn()
+        time.sleep(max(0.0, end - time.monotonic()))
+
+def bench_scheduler(args):
+    """
+    调度器唤醒频率：与播放器相同的 FrameScheduler + PlaybackController 接在 after() 替身上，
+    按 播放 / 暂停 / 播放中隐藏窗口 各运行 --seconds 秒，统计每秒唤醒次数与隐藏期间的切歌
+    """
+    import audio
+    import config
+    import loader
+    import playback
+    import render_cache
+    import scheduler
+    track_s = 2.0 # 短曲目，每个阶段都会经过几次切歌
+    with tempfile.TemporaryDirectory() as tmp:
+        durations = {}
+        for i in range(64):
+            path = os.path.join(tmp, f"{i:02d}.mp3")
+            open(path, "wb").close()
+            durations[path] = track_s
+
+        loop = _AfterLoop()
+        sched = scheduler.FrameScheduler(loop, config.FRAME_INTERVAL, config.POSITION_TICK)
+        backend = audio.NullBackend(audio.VirtualClock(1.0), durations.__getitem__)
+        tracks = loader.TrackLoader(_TableLibrary(durations), render_cache.RenderCache(64 * 1024 * 1024))
+        ctl = playback.PlaybackController(backend, tracks, gapless=True)
+        ctl.on_state = sched.set_playing
+        ctl.tick_in = sched.tick_in
+        ctl.wait_loader = lambda: sched.mark_dirty("loader")
+        sched.add_animation("loader", lambda dt: ctl.poll_loader(), background=True)
+        sched.add_ticker(ctl.tick)
+        sched.sleep_hint = ctl.remaining
+
+        def phase(setup):
+            setup()
+            before = sum(sched.wakeups.values())
+            index, transitions = ctl.current_index, backend.transitions
+            t = time.monotonic()
+            loop.run(args.seconds)
+            elapsed = time.monotonic() - t
+            return {
+                "wakeups_per_sec": (sum(sched.wakeups.values()) - before) / elapsed,
+                "tracks_advanced": (ctl.current_index - index) % len(durations),
+                "gapless_transitions": backend.transitions - transitions,
+            }
+
+        results = {}
+        ctl.add(list(durations))
+        results["playing"] = phase(lambda: None)
+        results["paused"] = phase(ctl.toggle)
+        results["hidden"] = phase(lambda: (ctl.toggle(), sched.set_hidden(True)))
+        results["states"] = sched.stats()
+        tracks.shutdown()
+
+    expected = int(args.seconds / track_s)
+    results["budget_per_sec"] = SCHEDULER_WAKEUP_BUDGET
+    results["over_budget"] = [name for name, limit in SCHEDULER_WAKEUP_BUDGET.items()
+                              if results[name]["wakeups_per_sec"] > limit]
+    if expected and results["hidden"]["tracks_advanced"] < expected - 1:
+        results["over_budget"].append("hidden_stalled") # 隐藏时没有继续切歌
+    return results
+
+BENCHMARKS = {
+    "clock": bench_clock,
+    "gapless": bench_gapless,
+    "search": bench_search,
+    "session": bench_session,
+    "startup": bench_startup,
+    "hotpaths": bench_hotpaths,
+    "resize": bench_resize,
+    "covers": bench_covers,
+    "soak": bench_soak,
+    "playback": bench_playback,
+    "instance": bench_instance,
+    "control": bench_control,
+    "dsp": bench_dsp,
+    "lyrics": bench_lyrics,
+    "scheduler": bench_scheduler,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Music player benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=[1000, 10000, 100000],
+                        help="曲库规模，逗号分隔")
+    parser.add_argument("--budget", type=float, default=0.5, help="hotpaths/resize: 每个函数的计时预算 (秒)")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数，取中位数")
+    parser.add_argument("--tracks", type=int, default=2000, help="soak/playback: 合成曲目数")
+    parser.add_argument("--audio", choices=("pygame", "dsp", "null"), default="pygame",
+                        help="clock: 音频后端，null 为不需要声卡的模拟后端 (gapless 需要 pygame 或 dsp)")
+    parser.add_argument("--json", help="结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    result = BENCHMARKS[args.name](args)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    if result.get("over_budget"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
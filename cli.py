@@ -0,0 +1,168 @@
+# cli.py
+# 无界面的命令行模式，例如: python main.py scan <dir> --jobs N --json out.json
+import io
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import wait, FIRST_COMPLETED
+from PIL import Image
+import config
+import metadata
+import lyrics
+import library
+import importer
+
+CHUNK_SIZE = 32 # 每个任务解析的文件数，减少进程间通信次数
+
+def cover_info(src):
+    """只读图像头部，返回封面格式与尺寸；src 为字节或文件路径"""
+    if not src: return None
+    try:
+        with Image.open(io.BytesIO(src) if isinstance(src, bytes) else src) as img:
+            nbytes = len(src) if isinstance(src, bytes) else os.path.getsize(src)
+            return {"format": img.format, "width": img.width, "height": img.height, "bytes": nbytes}
+    except Exception:
+        return None
+
+def lyrics_info(timeline, text):
+    return {"present": bool(text) or len(timeline) > 0, "lines": len(timeline), "words": len(timeline.word_times) > 0}
+
+def describe(path, cover_dir=None):
+    """解析单个文件 (在子进程中执行)，返回 (记录, 曲库行)；cover_dir 不为空时同时写出封面供曲库缓存使用"""
+    start = time.perf_counter()
+    record = {"path": path}
+    row = None
+    try:
+        record["size"] = os.path.getsize(path)
+        if cover_dir:
+            row, info, timeline = library.extract(path, cover_dir)
+        else:
+            info = metadata.read_track(path)
+            timeline = lyrics.parse_lrc(info.lyrics_text) if info.lyrics_text else lyrics.LyricTimeline()
+        record.update(title=info.title, artist=info.artist, duration=info.duration,
+                      lyrics=lyrics_info(timeline, info.lyrics_text), cover=cover_info(info.cover_data))
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["ms"] = (time.perf_counter() - start) * 1000
+    return record, row
+
+def describe_batch(paths, cover_dir=None):
+    return [describe(p, cover_dir) for p in paths]
+
+def describe_cached(path, row, cover_dir):
+    """由曲库缓存中的记录生成输出，不再解析文件"""
+    title, artist, duration, lyrics_json, cover_ref = row
+    timeline = lyrics.LyricTimeline.from_json(json.loads(lyrics_json or "[]"))
+    return {
+        "path": path, "size": os.path.getsize(path), "title": title, "artist": artist, "duration": duration,
+        "lyrics": lyrics_info(timeline, None),
+        "cover": cover_info(os.path.join(cover_dir, cover_ref)) if cover_ref else None,
+        "cached": True, "ms": 0.0,
+    }
+
+class Scanner:
+    """按目录顺序扫描，分块交给进程池解析，结果按完成顺序以 NDJSON 逐行输出"""
+    def __init__(self, out, jobs=None, cache=None):
+        self.out = out
+        self.jobs = jobs or config.IMPORT_JOBS or os.cpu_count() or 1
+        self.cache = cache
+        self.stats = {"files": 0, "errors": 0, "cached": 0, "with_lyrics": 0, "with_cover": 0,
+                      "bytes": 0, "duration_s": 0.0, "parse_ms": 0.0}
+
+    def emit(self, record):
+        s = self.stats
+        s["files"] += 1
+        s["bytes"] += record.get("size", 0)
+        s["parse_ms"] += record.get("ms", 0.0)
+        if "error" in record:
+            s["errors"] += 1
+        else:
+            s["duration_s"] += record["duration"] or 0
+            if record.get("cached"): s["cached"] += 1
+            if record["lyrics"]["present"]: s["with_lyrics"] += 1
+            if record["cover"]: s["with_cover"] += 1
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _collect(self, futures):
+        rows = []
+        for f in futures:
+            try: results = f.result()
+            except Exception as e:
+                print(f"Scan Error: {e}", file=sys.stderr)
+                continue
+            for record, row in results:
+                self.emit(record)
+                if row: rows.append(row)
+        if rows and self.cache:
+            try: self.cache.store_rows(rows)
+            except Exception as e: print(f"Library Cache Error: {e}", file=sys.stderr)
+        self.out.flush()
+
+    def run(self, roots):
+        start = time.perf_counter()
+        cover_dir = self.cache.cover_dir if self.cache else None
+        pending = set()
+        chunk = []
+        with importer.process_pool(self.jobs) as pool:
+            for root in roots:
+                paths = importer.scan_audio(root) if os.path.isdir(root) else [root]
+                for path in paths:
+                    if self.cache:
+                        row = self.cache.lookup(path)
+                        if row is not None:
+                            self.emit(describe_cached(path, row, cover_dir))
+                            continue
+                    chunk.append(path)
+                    if len(chunk) >= CHUNK_SIZE:
+                        pending.add(pool.submit(describe_batch, chunk, cover_dir))
+                        chunk = []
+                    # 限制在途任务数，边扫描边输出
+                    if len(pending) >= self.jobs * 4:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self._collect(finished)
+            if chunk:
+                pending.add(pool.submit(describe_batch, chunk, cover_dir))
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._collect(finished)
+
+        elapsed = time.perf_counter() - start
+        s = dict(self.stats, jobs=self.jobs, elapsed_s=elapsed)
+        s["files_per_sec"] = s["files"] / elapsed if elapsed > 0 else 0.0
+        s["mb_per_sec"] = s["bytes"] / 1e6 / elapsed if elapsed > 0 else 0.0
+        return s
+
+def cmd_scan(args):
+    out = open(args.json, "w", encoding="utf-8") if args.json else sys.stdout
+    cache = library.LibraryCache() if args.cache else None
+    try:
+        summary = Scanner(out, args.jobs, cache).run(args.paths)
+    except BrokenPipeError:
+        # 输出被提前关闭 (如管道给 head)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if out is not sys.stdout: out.close()
+        if cache: cache.close()
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    return 1 if summary["errors"] and args.strict else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py", description="Music player command line")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", help="解析目录中的音频文件，逐行输出 NDJSON")
+    scan.add_argument("paths", nargs="+", help="目录或文件")
+    scan.add_argument("--jobs", type=int, default=None, help="解析进程数，默认使用全部核心")
+    scan.add_argument("--json", help="NDJSON 输出文件，默认写到标准输出")
+    scan.add_argument("--cache", action="store_true", help="写入曲库缓存 (预热界面使用的缓存)，已缓存的文件不再解析")
+    scan.add_argument("--strict", action="store_true", help="有文件解析失败时以非零状态退出")
+    scan.set_defaults(fn=cmd_scan)
+
+    args = parser.parse_args(argv)
+    return args.fn(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
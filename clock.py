@@ -0,0 +1,84 @@
+# clock.py
+import time
+
+class PlaybackClock:
+    """
+    高精度播放时钟：以后端报告的位置为锚点，用单调时钟在采样之间插值
+    source() 返回自最近一次 play() 以来的秒数（如 get_pos()/1000），无效时返回 None
+    now_fn 为插值所用的时间源，须与后端同一时钟 (模拟后端使用虚拟时钟)
+    """
+    SNAP_THRESHOLD = 0.75 # 误差超过此值视为跳变，需连续确认后直接对齐
+    SLEW_GAIN = 0.25      # 小误差按比例缓慢修正，避免进度抖动
+    REWIND_TOLERANCE = 0.05 # 后端位置回退超过此值视为切到了下一首
+
+    def __init__(self, source, now_fn=time.monotonic):
+        self.source = source
+        self.now_fn = now_fn
+        self.base = 0.0          # 最近一次 play(start=...) 的起点
+        self.anchor_pos = 0.0
+        self.anchor_time = now_fn()
+        self.running = False
+        self.suspect = 0
+        self.last_raw = None     # 最近一次有效的后端采样
+
+    def _anchor(self, pos):
+        self.anchor_pos = pos
+        self.anchor_time = self.now_fn()
+
+    def start(self, pos=0.0, elapsed=0.0):
+        """play() / play(start=pos) 之后调用；elapsed 为后端已播放的秒数"""
+        self.base = pos
+        self.suspect = 0
+        self.last_raw = elapsed
+        self._anchor(pos + elapsed)
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        self.base = 0.0
+        self._anchor(0.0)
+
+    def pause(self):
+        if self.running:
+            self._anchor(self.now())
+            self.running = False
+
+    def resume(self):
+        if not self.running:
+            self._anchor(self.anchor_pos)
+            self.running = True
+
+    def now(self):
+        """当前插值位置 (秒)，不访问后端"""
+        if self.running:
+            return self.anchor_pos + (self.now_fn() - self.anchor_time)
+        return self.anchor_pos
+
+    def rewound(self, prev_raw):
+        """
+        与上一次采样相比后端位置回退，说明队列中的下一首已经接上
+        get_pos 从 play() 起单调递增，任何回退都只能来自切歌；窗口隐藏时相邻两次采样可能相隔整首 (短曲目)，
+        新曲目的位置未必接近 0，所以不要求回退的幅度
+        """
+        return prev_raw is not None and self.last_raw is not None and self.last_raw < prev_raw - self.REWIND_TOLERANCE
+
+    def sync(self):
+        """采样后端位置并修正漂移，返回修正后的位置"""
+        if not self.running:
+            return self.anchor_pos
+        raw = self.source()
+        predicted = self.now()
+        if raw is None or raw < 0:
+            return predicted
+        self.last_raw = raw
+        err = (self.base + raw) - predicted
+        if abs(err) > self.SNAP_THRESHOLD:
+            # 部分格式的 get_pos 会偶发跳变，连续两次才认定
+            self.suspect += 1
+            if self.suspect >= 2:
+                self.suspect = 0
+                self._anchor(self.base + raw)
+            return self.now()
+        self.suspect = 0
+        self._anchor(predicted + err * self.SLEW_GAIN)
+        return self.anchor_pos
@@ -1,4 +1,5 @@
 # config.py
+import os
 
 # 窗口初始尺寸
 START_WIDTH = 400
@@ -9,12 +10,48 @@ WIDTH_RATIO = 7/9        # 专辑图宽度占窗口宽度的比例
 ALBUM_HEIGHT_RATIO = 0.45 # 专辑图最大高度占窗口高度的比例
 MARGIN_RATIO = 1/7       # 边距比例
 
+# 背景模糊
+BLUR_RADIUS = 80
+BLUR_WORK_SCALE = 8      # 在缩小 8 倍的分辨率上模糊后放大
+BLUR_PREVIEW_SCALE = 16  # 拖动调整窗口时的预览使用更低的分辨率
+RESIZE_SETTLE_MS = 150   # 停止调整窗口多久后渲染最终画面
+
+# 字体
+FONT_NAME = "Microsoft YaHei UI"
+
 # 歌词设置
 LYRIC_LINE_HEIGHT = 32
 LYRIC_FONT_SIZE = 16
 LYRIC_FONT_SIZE_SUB = 13
 LYRIC_SMOOTHING = 0.05  # 滚动平滑度 (0.1-0.2 之间最丝滑)
-LYRIC_REFRESH_RATE = 4 # 刷新率 (约 60 FPS)
+LYRIC_REFRESH_RATE = 4 # 平滑度对应的参考帧间隔 (ms)
+
+# 调度设置
+FRAME_INTERVAL = 16   # 动画进行时的帧间隔 (约 60 FPS)
+POSITION_TICK = 500   # 稳定播放时的进度刷新间隔 (ms)
+
+# 播放设置
+GAPLESS = True        # 无缝播放：提前把下一首排入混音器队列
+AUDIO_BACKEND = "pygame"  # "pygame"、"dsp" (经过下面的 DSP 效果链，需要 NumPy) 或 "null" (不出声的模拟后端)，也可用环境变量 MUSIC_PLAYER_AUDIO 指定
+AUDIO_SAMPLE_RATE = 44100
+AUDIO_BUFFER = 2048       # 混音器缓冲 (采样帧)，约 46ms
+AUDIO_LOW_LATENCY = False # 低延迟模式：使用更小的缓冲，操作响应更快，但较慢的机器上可能爆音
+AUDIO_LOW_LATENCY_BUFFER = 512 # 约 12ms
+NULL_AUDIO_SPEED = 1.0    # 模拟后端的时钟倍速
+# 流式音频处理 (dsp.py)
+DSP_BLOCK = 1024          # 每块采样帧数
+DSP_CROSSFADE = 4.0       # 相邻曲目交叉淡入淡出的秒数，0 为直接拼接
+DSP_EQ_BANDS = ((60, 0.0), (230, 0.0), (910, 0.0), (3600, 0.0), (14000, 0.0)) # (中心频率 Hz, 增益 dB)
+DSP_EQ_TAPS = 1025        # 均衡 FIR 长度 (奇数)，越长低频越精确，延迟为一半
+DSP_TARGET_DBFS = -16.0   # 响度归一的目标 RMS 电平
+DSP_MAX_GAIN_DB = 12.0    # 响度归一的最大提升
+DSP_GAIN_DB = 0.0         # 末级音量
+DSP_FFMPEG = "ffmpeg"     # 流式解码非 WAV 文件的程序 (PATH 中查找)，为空或找不到时由 pygame 整首解码
+DSP_MAX_DECODE_MB = 32    # 没有 ffmpeg 时允许整首解码的最大文件 (MB)
+
+# 导入设置
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.m4a')
+IMPORT_JOBS = None    # 元数据解析进程数，None 表示使用全部核心
 
 
 # 颜色设置 (补全了缺失的变量)
@@ -22,3 +59,18 @@ COLOR_BG_DEFAULT = "#1a1a1a"
 COLOR_TEXT_WHITE = "#FFFFFF"
 COLOR_TEXT_GRAY = "#DDDDDD"
 COLOR_BTN_HOVER = "#444444"
+
+# 缓存设置
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".music_player")
+SINGLE_INSTANCE = True # 已有播放器运行时，打开的文件交给它播放而不是再启动一个
+CONTROL_API = False    # 本机控制接口 (HTTP + SSE)，也可用 --control 开启
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = 8765
+CONTROL_TOKEN_NAME = "control.token" # 每次启动生成的访问口令 (端口 口令)，仅本用户可读
+LIBRARY_DB_NAME = "library.db"
+SEARCH_INDEX_NAME = "search.idx"
+SESSION_NAME = "session.bin"
+SESSION_SAVE_INTERVAL = 30 # 播放时定期保存会话快照的间隔 (秒)
+RENDER_CACHE_BYTES = 96 * 1024 * 1024 # 背景/封面渲染缓存的内存预算
+IMAGE_MEMORY_BUDGET = 128 * 1024 * 1024 # 长时间运行时保留的图像总内存 (渲染缓存 + 已加载曲目的封面)
+COVER_MAX_SIZE = 500 # 缩略图的最大边长 (约为 1080p 全屏时的封面显示框)，导入时按此尺寸缩小解码原图
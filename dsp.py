@@ -0,0 +1,270 @@
+# dsp.py
+# 流式音频处理：解码为 PCM 块 (float32, 形状 [帧数, 声道数])，再做交叉淡入淡出、多段均衡与增益/响度归一
+# 所有效果按块向量化计算 (NumPy)，并保存跨块的状态，可逐块处理任意长的音频
+import os
+import math
+import wave
+import shutil
+import subprocess
+import numpy as np
+import config
+
+CHANNELS = 2
+
+class DecodeError(Exception):
+    """文件无法解码，或没有 ffmpeg 时文件过大"""
+
+def decode(path, block=None, rate=None, start=0.0):
+    """
+    从 start 秒起逐块解码为 float32 PCM
+    16 位且采样率一致的 WAV 直接流式读取；其他格式通过 ffmpeg 管道流式解码 (按 rate 重采样)；
+    找不到 ffmpeg 时由 pygame 整首解码 (需要已初始化混音器，按混音器采样率输出)，只接受不超过 DSP_MAX_DECODE_MB 的文件
+    """
+    block = block or config.DSP_BLOCK
+    rate = rate or config.AUDIO_SAMPLE_RATE
+    try:
+        f = wave.open(path, "rb")
+    except (wave.Error, EOFError):
+        f = None # 不是 WAV
+    if f is not None:
+        with f:
+            if f.getsampwidth() == 2 and f.getframerate() == rate:
+                channels = f.getnchannels()
+                f.setpos(min(int(start * rate), f.getnframes()))
+                while True:
+                    data = f.readframes(block)
+                    if not data: return
+                    pcm = np.frombuffer(data, dtype="<i2").reshape(-1, channels)
+                    yield _to_float(pcm)
+                return
+    exe = shutil.which(config.DSP_FFMPEG) if config.DSP_FFMPEG else None
+    if exe:
+        yield from _decode_ffmpeg(exe, path, block, rate, start)
+    else:
+        yield from _decode_pygame(path, block, start)
+
+def _decode_ffmpeg(exe, path, block, rate, start):
+    """ffmpeg 输出交错的 16 位立体声，按块读取管道，内存与曲目长度无关"""
+    cmd = [exe, "-v", "error", "-nostdin", "-ss", f"{start:.3f}", "-i", path,
+           "-f", "s16le", "-ac", str(CHANNELS), "-ar", str(rate), "-"]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        raise DecodeError(e)
+    frame = 2 * CHANNELS
+    produced = False
+    try:
+        while True:
+            data = proc.stdout.read(block * frame)
+            if not data: break
+            data = data[:len(data) - len(data) % frame]
+            if not data: break
+            produced = True
+            yield _to_float(np.frombuffer(data, dtype="<i2").reshape(-1, CHANNELS))
+    finally:
+        # 提前结束 (切歌、seek) 时终止解码进程
+        proc.stdout.close()
+        if proc.poll() is None: proc.kill()
+        code = proc.wait()
+    if not produced and code != 0:
+        raise DecodeError(f"ffmpeg failed ({code}): {path}")
+
+def _decode_pygame(path, block, start):
+    """pygame 没有逐块解码的接口，只能整首解码后切块；解码结果约为压缩文件的十倍，过大的文件直接拒绝"""
+    import pygame
+    if os.path.getsize(path) > config.DSP_MAX_DECODE_MB * 1024 * 1024:
+        raise DecodeError(f"file too large to decode without ffmpeg: {path}")
+    try:
+        sound = pygame.mixer.Sound(path)
+    except pygame.error as e:
+        raise DecodeError(e)
+    pcm = pygame.sndarray.array(sound)
+    del sound
+    if pcm.ndim == 1: pcm = pcm[:, None]
+    rate = pygame.mixer.get_init()[0]
+    for i in range(min(int(start * rate), len(pcm)), len(pcm), block):
+        yield _to_float(pcm[i:i + block])
+
+def _to_float(pcm):
+    """整数 PCM -> [-1, 1) 的 float32，单声道复制为立体声"""
+    out = pcm.astype(np.float32) * (1 / 32768)
+    if out.shape[1] == 1: out = np.repeat(out, CHANNELS, axis=1)
+    elif out.shape[1] > CHANNELS: out = out[:, :CHANNELS]
+    return out
+
+def to_int16(block):
+    """float32 -> 交错的 16 位 PCM 字节，可直接交给混音器"""
+    return (np.clip(block, -1.0, 32767 / 32768) * 32768).astype("<i2").tobytes()
+
+class Fifo:
+    """按帧存取的缓冲，块大小不一致时拼接/切分"""
+    def __init__(self):
+        self.chunks = []
+        self.frames = 0
+
+    def __len__(self):
+        return self.frames
+
+    def push(self, block):
+        if len(block):
+            self.chunks.append(block)
+            self.frames += len(block)
+
+    def pop(self, n):
+        """取出前 n 帧 (不足时取出全部)"""
+        n = min(n, self.frames)
+        out, got = [], 0
+        while got < n:
+            head = self.chunks[0]
+            take = min(len(head), n - got)
+            out.append(head[:take])
+            if take == len(head): self.chunks.pop(0)
+            else: self.chunks[0] = head[take:]
+            got += take
+        self.frames -= n
+        if len(out) == 1: return out[0]
+        return np.concatenate(out) if out else np.zeros((0, CHANNELS), np.float32)
+
+_fade_curves = {}
+
+def _fade(n):
+    """等功率淡入/淡出曲线 (cos/sin)，按长度缓存"""
+    curves = _fade_curves.get(n)
+    if curves is None:
+        t = np.linspace(0.0, math.pi / 2, n, dtype=np.float32)[:, None]
+        curves = _fade_curves[n] = (np.cos(t), np.sin(t))
+    return curves
+
+def crossfade(tracks, fade_frames, block=None):
+    """
+    把连续的曲目 (各为 PCM 块的可迭代对象) 拼成一条流，相邻曲目重叠 fade_frames 帧
+    每首只暂存末尾的 fade_frames 帧，下一首开头到达一块就按等功率曲线混合一块，内存与曲目长度无关，
+    解码也只比输出超前 fade_frames 帧 (实时播放时不会一次解码整段淡入)
+    """
+    block = block or config.DSP_BLOCK
+    out = Fifo()
+    held = None # 上一首末尾，等待与下一首开头混合
+    for blocks in tracks:
+        fifo = Fifo()
+        done = 0 # held 中已混合的帧数
+        if held is not None: fade_out, fade_in = _fade(len(held))
+        for b in blocks:
+            fifo.push(b)
+            if held is not None:
+                n = len(fifo)
+                if done + n > len(held): n = len(held) - done
+                out.push(held[done:done + n] * fade_out[done:done + n] + fifo.pop(n) * fade_in[done:done + n])
+                done += n
+                if done == len(held): held = None
+            if held is None and len(fifo) > fade_frames:
+                out.push(fifo.pop(len(fifo) - fade_frames))
+            while len(out) >= block:
+                yield out.pop(block)
+        if held is not None:
+            # 曲目比淡入淡出还短：剩余部分淡出
+            out.push(held[done:] * fade_out[done:])
+        held = fifo.pop(len(fifo)) if len(fifo) else None
+    if held is not None: out.push(held)
+    while len(out):
+        yield out.pop(block)
+
+class Gain:
+    """固定增益 (dB)"""
+    def __init__(self, db=0.0):
+        self.factor = np.float32(10 ** (db / 20))
+
+    def process(self, block):
+        if self.factor == 1: return block
+        return block * self.factor
+
+class Equalizer:
+    """
+    多段均衡：由各频段增益 (dB，频率之间按对数频率插值) 设计线性相位 FIR，
+    逐块用 FFT 卷积 (重叠相加)，带来 taps // 2 帧的固定延迟
+    """
+    def __init__(self, bands=None, rate=None, taps=None):
+        self.bands = bands if bands is not None else config.DSP_EQ_BANDS
+        self.rate = rate or config.AUDIO_SAMPLE_RATE
+        self.taps = taps or config.DSP_EQ_TAPS
+        self.flat = all(g == 0 for _, g in self.bands)
+        self.kernel = None if self.flat else self._design()
+        self.spectra = {} # FFT 长度 -> 频响
+        self.tail = np.zeros((self.taps - 1, CHANNELS), np.float32)
+
+    def _design(self):
+        n = 1 << (self.taps - 1).bit_length() + 2 # 频率采样的网格比滤波器长，插值更平滑
+        freqs = np.fft.rfftfreq(n, 1 / self.rate)
+        centers = np.log10([f for f, _ in self.bands])
+        gains = [g for _, g in self.bands]
+        db = np.interp(np.log10(np.maximum(freqs, 1.0)), centers, gains)
+        impulse = np.fft.irfft(10 ** (db / 20), n)
+        # 零相位冲激响应移到中心，截断并加窗
+        impulse = np.roll(impulse, self.taps // 2)[:self.taps] * np.hanning(self.taps)
+        return impulse.astype(np.float32)
+
+    def process(self, block):
+        if self.flat: return block
+        n = len(block)
+        size = 1 << (n + self.taps - 2).bit_length()
+        spectrum = self.spectra.get(size)
+        if spectrum is None:
+            spectrum = self.spectra[size] = np.fft.rfft(self.kernel, size)[:, None]
+        y = np.fft.irfft(np.fft.rfft(block, size, axis=0) * spectrum, size, axis=0)[:n + self.taps - 1]
+        y = y.astype(np.float32)
+        y[:self.taps - 1] += self.tail
+        self.tail = y[n:]
+        return y[:n]
+
+class Normalizer:
+    """
+    响度归一：跟踪块 RMS，把增益平滑地调向目标电平 (块内线性过渡，避免拉链噪声)，静音段不更新增益
+    块内增益的起止两端都不超过 ceiling / 块峰值，线性过渡中的每个采样都不会超过 ceiling：
+    遇到瞬态时增益在块开头立即压下 (起音)，之后按时间常数慢慢恢复 (释放)，不做逐采样削波
+    """
+    SILENCE = 10 ** (-60 / 20)
+
+    def __init__(self, target_dbfs=None, max_gain_db=None, window=3.0, rate=None, ceiling=0.99):
+        self.target = 10 ** ((target_dbfs if target_dbfs is not None else config.DSP_TARGET_DBFS) / 20)
+        self.max_gain = 10 ** ((max_gain_db if max_gain_db is not None else config.DSP_MAX_GAIN_DB) / 20)
+        self.window = window * (rate or config.AUDIO_SAMPLE_RATE) # 平滑时间常数 (帧)
+        self.ceiling = ceiling
+        self.gain = 1.0
+
+    def process(self, block):
+        n = len(block)
+        if not n: return block
+        rms = float(np.sqrt(np.mean(np.square(block))))
+        peak = float(np.max(np.abs(block)))
+        gain = self.gain
+        if rms > self.SILENCE:
+            desired = min(self.target / rms, self.max_gain)
+            gain += (desired - gain) * (1 - math.exp(-n / self.window))
+        start = self.gain
+        if peak * max(start, gain) > self.ceiling:
+            limit = self.ceiling / peak
+            start, gain = min(start, limit), min(gain, limit)
+        ramp = np.linspace(start, gain, n, dtype=np.float32)[:, None]
+        self.gain = gain
+        return block * ramp
+
+class Chain:
+    """按顺序套用效果"""
+    def __init__(self, effects):
+        self.effects = list(effects)
+
+    def process(self, block):
+        for effect in self.effects:
+            block = effect.process(block)
+        return block
+
+def default_chain(rate=None):
+    return Chain([Equalizer(rate=rate), Normalizer(rate=rate), Gain(config.DSP_GAIN_DB)])
+
+def render(paths, chain=None, rate=None, block=None):
+    """播放列表 -> 处理后的 PCM 块：逐首解码、交叉淡入淡出，再经过效果链"""
+    rate = rate or config.AUDIO_SAMPLE_RATE
+    block = block or config.DSP_BLOCK
+    chain = chain or default_chain(rate)
+    fade = int(config.DSP_CROSSFADE * rate)
+    for b in crossfade((decode(p, block, rate) for p in paths), fade, block):
+        yield chain.process(b)
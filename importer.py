@@ -0,0 +1,138 @@
+# importer.py
+import os
+import sys
+import time
+import queue
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import config
+import library
+
+def is_audio(path):
+    return path.lower().endswith(config.AUDIO_EXTENSIONS)
+
+def scan_audio(root):
+    """用 os.scandir 遍历目录树，按名称顺序逐个产出音频文件"""
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name.lower())
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file() and is_audio(entry.name):
+                    yield entry.path
+            except OSError:
+                pass
+        # 逆序入栈，保证按名称深度优先
+        stack.extend(reversed(subdirs))
+
+def pool_context():
+    """POSIX 上用 fork (子进程不重新导入任何模块)；macOS 上 fork 与 Tk 不兼容，与 Windows 一样用 spawn"""
+    if sys.platform != "darwin" and "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+@contextlib.contextmanager
+def process_pool(jobs):
+    """
+    元数据解析进程池，界面导入与命令行扫描共用
+    spawn 的子进程会重新导入 __main__ (即 main.py 及 customtkinter 等界面依赖)，
+    进程池使用期间把 __main__ 临时指向本模块，子进程只需导入解析所需的模块
+    任务函数必须定义在不依赖界面的模块中 (library / cli)
+    """
+    ctx = pool_context()
+    main = sys.modules["__main__"]
+    spawn = ctx.get_start_method() != "fork"
+    if spawn: sys.modules["__main__"] = sys.modules[__name__]
+    pool = ProcessPoolExecutor(max_workers=jobs, mp_context=ctx)
+    try:
+        yield pool
+    finally:
+        # 取消时丢弃尚未开始的任务，不必等它们跑完
+        pool.shutdown(cancel_futures=True)
+        if spawn: sys.modules["__main__"] = main
+
+class LibraryImporter:
+    """
+    后台导入文件夹：扫描线程分批推送发现的文件，
+    同时用进程池解析元数据并写入曲库缓存
+    """
+    BATCH_SIZE = 256
+    FLUSH_INTERVAL = 0.1
+
+    def __init__(self, library_cache, jobs=None):
+        self.library = library_cache
+        self.jobs = jobs or config.IMPORT_JOBS or os.cpu_count() or 1
+        self.batches = queue.Queue()
+        self.found = 0
+        self.indexed = 0
+        self.done = False
+        self.cancelled = False
+
+    def start(self, roots):
+        threading.Thread(target=self._run, args=(list(roots),), daemon=True, name="importer").start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _run(self, roots):
+        batch = []
+        last_flush = time.monotonic()
+        pending = set()
+        try:
+            with process_pool(self.jobs) as pool:
+                for root in roots:
+                    if self.cancelled: break
+                    for path in scan_audio(root):
+                        if self.cancelled: break
+                        batch.append(path)
+                        self.found += 1
+                        now = time.monotonic()
+                        # 第一首立即推送，之后按批次推送
+                        if self.found == 1 or len(batch) >= self.BATCH_SIZE or now - last_flush >= self.FLUSH_INTERVAL:
+                            self.batches.put(batch)
+                            batch = []
+                            last_flush = now
+
+                        if self.library.lookup(path) is not None:
+                            self.indexed += 1
+                            continue
+                        pending.add(pool.submit(library.extract_row, path, self.library.cover_dir))
+                        if len(pending) >= self.jobs * 32:
+                            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            self._store(finished)
+                if batch and not self.cancelled:
+                    self.batches.put(batch)
+                while pending and not self.cancelled:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._store(finished)
+        except Exception as e:
+            print(f"Import Error: {e}")
+        finally:
+            self.done = True
+
+    def _store(self, futures):
+        rows = []
+        for f in futures:
+            try: rows.append(f.result())
+            except Exception: pass
+            self.indexed += 1
+        if rows:
+            try: self.library.store_rows(rows)
+            except Exception as e: print(f"Library Cache Error: {e}")
+
+    def drain(self):
+        """取出已发现但尚未加入播放列表的文件 (主线程调用)"""
+        paths = []
+        while True:
+            try: paths.extend(self.batches.get_nowait())
+            except queue.Empty: return paths
@@ -0,0 +1,128 @@
+# instance.py
+# 单实例：已有播放器在运行时，新启动的进程只把文件路径交给它，然后立即退出
+import os
+import json
+import queue
+import socket
+import secrets
+import threading
+import config
+
+SOCKET_NAME = "instance.sock" # AF_UNIX 套接字文件
+PORT_NAME = "instance.port"   # 没有 AF_UNIX 时：本机 TCP 端口与口令
+CONNECT_TIMEOUT = 0.5
+
+def _use_unix():
+    path = os.path.join(config.CACHE_DIR, SOCKET_NAME)
+    # sun_path 长度有限 (Linux 108 字节)，过长时改用 TCP
+    return hasattr(socket, "AF_UNIX") and len(os.fsencode(path)) < 100
+
+def forward(paths):
+    """
+    尝试把路径交给正在运行的实例，成功返回 True
+    没有实例在监听时很快失败 (连接被拒绝或文件不存在)
+    """
+    return _send({"paths": [os.path.abspath(p) for p in paths]})
+
+def ping():
+    """是否有实例在监听；对方只回应，不导入也不把窗口带到前台"""
+    return _send({"ping": True})
+
+def _send(message):
+    try:
+        if _use_unix():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = os.path.join(config.CACHE_DIR, SOCKET_NAME)
+        else:
+            with open(os.path.join(config.CACHE_DIR, PORT_NAME), encoding="utf-8") as f:
+                port, message["token"] = f.read().split()
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = ("127.0.0.1", int(port))
+        with sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(address)
+            sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+            return sock.makefile("rb").readline().strip() == b"ok"
+    except (OSError, ValueError):
+        return False
+
+class InstanceServer:
+    """
+    在后台线程接收其他进程转发的路径，放入队列后调用 wake() 通知界面线程
+    wake 在接收线程中调用，只能做线程安全的操作 (如 event_generate)，由界面线程取队列
+    """
+    def __init__(self, wake=None):
+        self.wake = wake
+        self.queue = queue.Queue()
+        self.sock = None
+        self.address = None
+        self.token = None
+        self.closed = False
+
+    def start(self):
+        """开始监听，失败 (如另一个实例刚刚启动) 时返回 False"""
+        try:
+            os.makedirs(config.CACHE_DIR, exist_ok=True)
+            if _use_unix():
+                self.address = os.path.join(config.CACHE_DIR, SOCKET_NAME)
+                self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    self.sock.bind(self.address)
+                except OSError:
+                    # 上次异常退出留下的套接字文件：无人监听时删除后重试
+                    if ping(): raise
+                    os.remove(self.address)
+                    self.sock.bind(self.address)
+                os.chmod(self.address, 0o600)
+            else:
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.sock.bind(("127.0.0.1", 0))
+                self.token = secrets.token_hex(16)
+                self.address = os.path.join(config.CACHE_DIR, PORT_NAME)
+                with open(self.address, "w", encoding="utf-8") as f:
+                    f.write(f"{self.sock.getsockname()[1]} {self.token}")
+            self.sock.listen(8)
+        except OSError as e:
+            print(f"Instance Error: {e}")
+            if self.sock: self.sock.close()
+            self.sock = None
+            return False
+        threading.Thread(target=self._serve, name="instance", daemon=True).start()
+        return True
+
+    def _serve(self):
+        while not self.closed:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return # close() 关闭了监听套接字
+            with conn:
+                try:
+                    conn.settimeout(CONNECT_TIMEOUT)
+                    message = json.loads(conn.makefile("rb").readline())
+                    if self.token and message.get("token") != self.token: continue
+                    paths = [p for p in message.get("paths", []) if isinstance(p, str)]
+                    conn.sendall(b"ok\n")
+                except (OSError, ValueError, AttributeError, TypeError):
+                    continue
+            if message.get("ping") or not paths: continue
+            self.queue.put(paths)
+            if self.wake:
+                try: self.wake()
+                except Exception: pass # 界面尚未进入主循环时由其启动后主动取队列
+
+    def drain(self):
+        """取出已收到的全部请求 (界面线程调用)，返回路径列表的列表"""
+        items = []
+        while True:
+            try: items.append(self.queue.get_nowait())
+            except queue.Empty: return items
+
+    def close(self):
+        self.closed = True
+        if self.sock is None: return
+        try: self.sock.shutdown(socket.SHUT_RDWR) # 唤醒阻塞在 accept 的线程
+        except OSError: pass
+        self.sock.close()
+        try: os.remove(self.address)
+        except OSError: pass
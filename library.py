@@ -0,0 +1,213 @@
+# library.py
+import os
+import json
+import sqlite3
+import threading
+from PIL import Image, ImageOps
+import config
+import metadata
+import lyrics
+
+SCHEMA_VERSION = 4
+
+def extract(path, cover_dir):
+    """解析文件并写出封面缩略图，返回 (数据库行, TrackInfo, 歌词时间轴)"""
+    st = os.stat(path)
+    lrc = metadata.sidecar_key(path) # 歌词可能来自同名 .lrc，也要参与缓存键
+    info = metadata.read_track(path)
+    timeline = lyrics.parse_lrc(info.lyrics_text) if info.lyrics_text else lyrics.LyricTimeline()
+
+    cover_ref = None
+    if info.cover_data:
+        # 缩略图按封面内容寻址：已存在时 (如同一专辑的其他曲目) 无需再解码原图
+        cover_ref = metadata.cover_key(info.cover_data) + ".jpg"
+        thumb_path = os.path.join(cover_dir, cover_ref)
+        if not os.path.exists(thumb_path):
+            if info.cover.info.get("cover_key") == "default":
+                cover_ref = None # 无法解码
+            else:
+                thumb = info.cover
+                if max(thumb.size) > config.COVER_MAX_SIZE:
+                    thumb = ImageOps.contain(thumb, (config.COVER_MAX_SIZE, config.COVER_MAX_SIZE), Image.Resampling.LANCZOS)
+                tmp = f"{thumb_path}.{os.getpid()}.tmp" # 多个进程可能同时写同一张封面
+                thumb.save(tmp, "JPEG", quality=90)
+                os.replace(tmp, thumb_path)
+
+    lyrics_json = json.dumps(timeline.to_json(), ensure_ascii=False, separators=(",", ":"))
+    row = (path, st.st_size, st.st_mtime_ns, info.title, info.artist, info.duration, lyrics_json, cover_ref, lrc)
+    return row, info, timeline
+
+def extract_row(path, cover_dir):
+    """只返回数据库行，供进程池批量导入使用"""
+    return extract(path, cover_dir)[0]
+
+class LibraryCache:
+    """
+    持久化的曲库缓存 (SQLite)
+    以 路径 + 文件大小 + 修改时间 (+ 同名 .lrc 的大小与修改时间) 为键，文件变化后自动失效
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or config.CACHE_DIR
+        self.cover_dir = os.path.join(self.cache_dir, "covers")
+        os.makedirs(self.cover_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.listeners = [] # 写入新记录后回调 fn(rows)，如搜索索引
+
+        db_path = os.path.join(self.cache_dir, config.LIBRARY_DB_NAME)
+        try:
+            self._open_db(db_path)
+        except sqlite3.DatabaseError as e:
+            # 数据库损坏时删掉重建，缓存可以随时从文件恢复
+            print(f"Library Cache Error: {e}")
+            try: self.db.close()
+            except Exception: pass
+            for suffix in ("", "-wal", "-shm"):
+                try: os.remove(db_path + suffix)
+                except OSError: pass
+            self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # 结构变化时直接重建，缓存可以随时从文件恢复
+            self.db.execute("DROP TABLE IF EXISTS tracks")
+            self.db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            for name in os.listdir(self.cover_dir):
+                try: os.remove(os.path.join(self.cover_dir, name))
+                except OSError: pass
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS tracks (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                title TEXT,
+                artist TEXT,
+                duration REAL,
+                lyrics TEXT,
+                cover TEXT,
+                lrc TEXT NOT NULL DEFAULT ''
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS tracks_cover ON tracks(cover)")
+        self.db.commit()
+
+    def _stat(self, path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns, metadata.sidecar_key(path)
+
+    def lookup(self, path):
+        """只查缓存，不解析文件；未命中或已失效时返回 None"""
+        try:
+            key = self._stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT size, mtime, lrc, title, artist, duration, lyrics, cover FROM tracks WHERE path=?",
+                (path,)
+            ).fetchone()
+        if row is None or row[:3] != key:
+            return None
+        return row[3:]
+
+    def peek(self, path):
+        """只取 (title, artist)，供播放列表等轻量显示使用；未缓存时返回 None"""
+        try:
+            key = self._stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT size, mtime, lrc, title, artist FROM tracks WHERE path=?", (path,)
+            ).fetchone()
+        if row is None or row[:3] != key:
+            return None
+        return row[3], row[4]
+
+    def get(self, path, size=None):
+        """
+        返回 (title, artist, duration, cover, timeline)
+        命中时只需一次查询；未命中时解析文件并写入缓存
+        size 为封面的显示边长，缩略图按此尺寸缩小解码
+        """
+        row = self.lookup(path)
+        if row is not None:
+            self.hits += 1
+            title, artist, duration, lyrics_json, cover_ref = row
+            timeline = lyrics.LyricTimeline.from_json(json.loads(lyrics_json or "[]"))
+            return title, artist, duration, self.load_cover(cover_ref, size), timeline
+
+        self.misses += 1
+        # 单次解析即可得到全部字段
+        row, info, timeline = extract(path, self.cover_dir)
+        # 有缩略图时直接读取，不解码原图
+        cover = self.load_cover(row[7], size) if row[7] else info.cover
+        try:
+            self.store_rows([row])
+        except sqlite3.Error as e:
+            print(f"Library Cache Error: {e}")
+        return info.title, info.artist, info.duration, cover, timeline
+
+    def store_rows(self, rows):
+        """批量写入 extract_row 得到的记录"""
+        stale = []
+        with self.lock:
+            for row in rows:
+                old = self.db.execute("SELECT cover FROM tracks WHERE path=?", (row[0],)).fetchone()
+                # 文件变化后旧封面作废
+                if old and old[0] and old[0] != row[7]:
+                    stale.append(old[0])
+            self.db.executemany("INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            # 封面按内容共享，只删除已没有曲目引用的文件
+            stale = [ref for ref in set(stale)
+                     if self.db.execute("SELECT 1 FROM tracks WHERE cover=? LIMIT 1", (ref,)).fetchone() is None]
+            self.db.commit()
+        for cover_ref in stale:
+            try: os.remove(os.path.join(self.cover_dir, cover_ref))
+            except OSError: pass
+        for fn in self.listeners:
+            fn(rows)
+
+    def iter_rows(self, batch=1000):
+        """分批遍历全部记录"""
+        last = ""
+        while True:
+            with self.lock:
+                rows = self.db.execute(
+                    "SELECT * FROM tracks WHERE path > ? ORDER BY path LIMIT ?", (last, batch)
+                ).fetchall()
+            if not rows: return
+            yield from rows
+            last = rows[-1][0]
+
+    def load_cover(self, cover_ref, size=None):
+        """读取缩略图；给出显示边长时用 draft 缩小解码，并记在 info["decoded_for"] 中"""
+        if cover_ref:
+            try:
+                with Image.open(os.path.join(self.cover_dir, cover_ref)) as img:
+                    if size: img.draft("RGB", (size, size))
+                    cover = img.convert("RGB")
+                cover.info["cover_key"] = cover_ref
+                cover.info["decoded_for"] = size
+                return cover
+            except OSError:
+                pass
+        return metadata.get_default_cover()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,116 @@
+# loader.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import config
+import memory
+import metadata
+import utils
+
+class LoadedTrack:
+    """后台准备好的曲目：元数据 + 已渲染的背景与封面"""
+    __slots__ = ("path", "title", "artist", "duration", "timeline",
+                 "cover", "visuals", "size")
+
+    def __init__(self, path, title, artist, duration, timeline,
+                 cover, visuals, size):
+        self.path = path
+        self.title = title
+        self.artist = artist
+        self.duration = duration
+        self.timeline = timeline
+        self.cover = cover
+        self.visuals = visuals
+        self.size = size
+
+class TrackLoader:
+    """
+    在线程池中解析标签、解码封面并渲染模糊背景，避免阻塞 Tk 主线程
+    结果以 Future 返回，由 UI 通过 after() 轮询取回
+    已完成的任务保留封面 (计入 MemoryBudget，背景与封面渲染结果由渲染缓存计)
+    """
+    def __init__(self, library, render_cache, workers=2):
+        self.library = library
+        self.render_cache = render_cache
+        self.budget = None # memory.MemoryBudget
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loader")
+        self.jobs = {}
+        self.finished = OrderedDict() # 已完成任务的键 -> 封面，按完成顺序
+        self.cover_refs = {}          # id(封面) -> [引用数, 字节数]，同一对象只计一次
+        self.cover_bytes = 0
+        self.lock = threading.Lock()
+
+    def request(self, path, win_w, win_h):
+        """获取（或复用已在进行的）加载任务"""
+        key = (path, win_w, win_h)
+        added = False
+        with self.lock:
+            future = self.jobs.get(key)
+            if future is None:
+                future = self.pool.submit(self._load, path, win_w, win_h)
+                self.jobs[key] = future
+                added = True
+        if added: future.add_done_callback(lambda f: self._on_done(key, f)) # 已完成时会立即回调，不能持锁
+        return future
+
+    def _on_done(self, key, future):
+        # 取消的任务在 prefetch 持锁时回调，且不占内存
+        if future.cancelled() or future.exception() is not None: return
+        with self.lock:
+            if self.jobs.get(key) is not future: return # 完成前已被丢弃
+            cover = future.result().cover
+            self.finished[key] = cover
+            ref = self.cover_refs.setdefault(id(cover), [0, memory.image_bytes(cover)])
+            ref[0] += 1
+            if ref[0] == 1: self.cover_bytes += ref[1]
+        if self.budget: self.budget.enforce()
+
+    def _forget(self, key):
+        """任务被丢弃时减去其封面的计数 (持锁调用)"""
+        cover = self.finished.pop(key, None)
+        if cover is None: return
+        ref = self.cover_refs[id(cover)]
+        ref[0] -= 1
+        if ref[0] == 0:
+            del self.cover_refs[id(cover)]
+            self.cover_bytes -= ref[1]
+
+    @property
+    def bytes_used(self):
+        """已完成任务持有的封面字节数 (同一对象只计一次)"""
+        return self.cover_bytes
+
+    def trim(self, target):
+        """按完成顺序丢弃最早完成的结果，直到不超过 target 字节 (供 MemoryBudget 调用)"""
+        with self.lock:
+            while self.cover_bytes > target and self.finished:
+                key = next(iter(self.finished))
+                self._forget(key)
+                del self.jobs[key]
+
+    def peek(self, path):
+        """在线程池中读取 (title, artist)，供播放列表显示；未缓存时结果为 None"""
+        return self.pool.submit(self.library.peek, path)
+
+    def prefetch(self, paths, win_w, win_h):
+        """预取指定曲目，并丢弃不再需要的旧任务"""
+        keep = {(p, win_w, win_h) for p in paths}
+        with self.lock:
+            for key in list(self.jobs):
+                if key not in keep:
+                    self.jobs.pop(key).cancel()
+                    self._forget(key)
+        for p in paths:
+            self.request(p, win_w, win_h)
+
+    def _load(self, path, win_w, win_h):
+        # 封面按显示框的尺寸解码，只保留显示需要的像素
+        title, artist, duration, cover, timeline = self.library.get(path, utils.cover_size(win_w, win_h))
+        if cover is not metadata.get_default_cover(): # 共享的默认封面已是缩略图尺寸
+            cover = memory.downsample(cover, config.COVER_MAX_SIZE)
+        visuals = self.render_cache.render(cover, win_w, win_h)
+        return LoadedTrack(path, title, artist, duration, timeline,
+                           cover, visuals, (win_w, win_h))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,118 @@
+# lyric_view.py
+import time
+from collections import deque
+from tkinter import font as tkfont
+import config
+import utils
+
+class LyricView:
+    """
+    保留模式的歌词视图：固定 5 个 Canvas 文本对象与字体对象反复复用
+    滚动时只移动坐标，活动行变化时才重新设置样式
+    """
+    OFFSETS = (-2, -1, 0, 1, 2) # 上上行、上一行、当前行、下一行、下下行
+    TAG = "lyric"
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.font_active = tkfont.Font(root=canvas, family=utils.REAL_FONT_NAME, size=config.LYRIC_FONT_SIZE, weight="bold")
+        self.font_sub = tkfont.Font(root=canvas, family=utils.REAL_FONT_NAME, size=config.LYRIC_FONT_SIZE_SUB)
+        self.font_note = tkfont.Font(root=canvas, family=utils.REAL_FONT_NAME, size=20)
+
+        self.items = [
+            canvas.create_text(0, 0, text="", font=self.font_sub, fill="#888888",
+                               anchor="center", state="hidden", tags=(self.TAG,))
+            for _ in self.OFFSETS
+        ]
+        self.item_states = ["hidden"] * len(self.items)
+        self.has_text = [False] * len(self.items)
+        # 无歌词时显示音符
+        self.id_note = canvas.create_text(0, 0, text="♪", font=self.font_note, fill="#888888", anchor="center")
+
+        self.timeline = None
+        self.active = None
+        self.offset = 0.0
+        self.cx = 0
+        self.center_y = 0
+        self.text_width = 0
+
+        # 每帧耗时 (秒)，用于观察渲染开销
+        self.frame_times = deque(maxlen=600)
+
+    def layout(self, w, h):
+        """窗口尺寸变化时重新定位"""
+        self.cx = w / 2
+        self.center_y = h * 0.63 # 歌词区域的中心Y坐标
+        self.canvas.coords(self.id_note, self.cx, h * 0.60)
+        if self.text_width != w - 80:
+            self.text_width = w - 80
+            for item_id in self.items:
+                self.canvas.itemconfig(item_id, width=self.text_width)
+        self._place()
+
+    def render(self, timeline, active, offset):
+        """按需更新：换行时重设样式，滚动时只移动"""
+        t0 = time.perf_counter()
+        if timeline is not self.timeline or active != self.active:
+            self.timeline = timeline
+            self.active = active
+            self.offset = offset
+            self._restyle()
+            self._place()
+        elif offset != self.offset:
+            self.canvas.move(self.TAG, 0, offset - self.offset)
+            self.offset = offset
+            self._update_visibility()
+        self.frame_times.append(time.perf_counter() - t0)
+
+    def _restyle(self):
+        lines = len(self.timeline) if self.timeline is not None else 0
+        self.canvas.itemconfig(self.id_note, state="hidden" if lines else "normal")
+        for slot, item_id in enumerate(self.items):
+            idx = self.active + self.OFFSETS[slot]
+            if lines and 0 <= idx < lines:
+                is_active = (idx == self.active)
+                self.canvas.itemconfig(
+                    item_id, text=self.timeline.texts[idx],
+                    font=self.font_active if is_active else self.font_sub,
+                    fill="white" if is_active else "#888888"
+                )
+                self.has_text[slot] = True
+            else:
+                self.has_text[slot] = False
+
+    def _place(self):
+        for slot, item_id in enumerate(self.items):
+            self.canvas.coords(item_id, self.cx, self._slot_y(slot))
+        self._update_visibility()
+
+    def _slot_y(self, slot):
+        # Y坐标 = 中心 + 相对偏移 + 滚动动画偏移
+        return self.center_y + (self.OFFSETS[slot] * config.LYRIC_LINE_HEIGHT) + self.offset
+
+    def _update_visibility(self):
+        # 只显示中间可见的区域
+        visible_range = config.LYRIC_LINE_HEIGHT * 1.38
+        for slot, item_id in enumerate(self.items):
+            y_pos = self._slot_y(slot)
+            visible = self.has_text[slot] and self.center_y - visible_range < y_pos < self.center_y + visible_range
+            state = "normal" if visible else "hidden"
+            if state != self.item_states[slot]:
+                self.item_states[slot] = state
+                self.canvas.itemconfig(item_id, state=state)
+
+    def frame_stats(self):
+        """最近帧的渲染耗时统计 (毫秒)，bench.py lyrics 用它与原绘制方式对比"""
+        return frame_stats(self.frame_times)
+
+def frame_stats(frame_times):
+    """一组每帧耗时 (秒) 的统计 (毫秒)"""
+    if not frame_times:
+        return {"frames": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    samples = sorted(frame_times)
+    return {
+        "frames": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p95_ms": samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
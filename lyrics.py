@@ -0,0 +1,145 @@
+# lyrics.py
+import re
+from array import array
+from bisect import bisect_right
+
+# 预编译的 LRC 标签
+RE_TIME_TAG = re.compile(r'\[(\d+):(\d+(?:\.\d+)?)\]')
+RE_WORD_TAG = re.compile(r'<(\d+):(\d+(?:\.\d+)?)>')
+RE_OFFSET_TAG = re.compile(r'\[offset:\s*([+-]?\d+)\s*\]', re.IGNORECASE)
+RE_ANY_TAG = re.compile(r'\[[^\]]*\]')
+
+class LyricTimeline:
+    """
+    按时间排序的歌词时间轴（数组存储，bisect 查找）
+    支持增强 LRC 的逐字时间戳 <mm:ss.xx>，用于卡拉 OK 式高亮
+    """
+    __slots__ = ("times", "texts", "word_index", "word_times", "word_chars")
+
+    def __init__(self, lines=()):
+        # lines: [(time, text, [(word_time, char_offset), ...]), ...]，需已排序
+        self.times = array('d')
+        self.texts = []
+        self.word_index = array('l', [0]) # 第 i 行的逐字数据位于 [word_index[i], word_index[i+1])
+        self.word_times = array('d')
+        self.word_chars = array('l')
+        for t, text, words in lines:
+            self.times.append(t)
+            self.texts.append(text)
+            for wt, off in words:
+                self.word_times.append(wt)
+                self.word_chars.append(off)
+            self.word_index.append(len(self.word_times))
+
+    def __len__(self):
+        return len(self.times)
+
+    def index_at(self, t):
+        """t 时刻对应的行号，尚未开始时返回 -1"""
+        return bisect_right(self.times, t) - 1
+
+    def has_words(self, i):
+        return self.word_index[i + 1] > self.word_index[i]
+
+    def words(self, i):
+        """第 i 行的逐字信息 [(开始时间, 起始字符, 结束字符), ...]"""
+        start, end = self.word_index[i], self.word_index[i + 1]
+        text_len = len(self.texts[i])
+        result = []
+        for k in range(start, end):
+            char_end = self.word_chars[k + 1] if k + 1 < end else text_len
+            result.append((self.word_times[k], self.word_chars[k], char_end))
+        return result
+
+    def word_at(self, i, t):
+        """第 i 行在 t 时刻正在唱的字序号（行内），没有逐字信息时返回 -1"""
+        start, end = self.word_index[i], self.word_index[i + 1]
+        if start == end: return -1
+        return max(bisect_right(self.word_times, t, start, end) - 1 - start, -1)
+
+    def cursor(self):
+        return TimelineCursor(self)
+
+    def to_json(self):
+        """紧凑的可序列化形式，供曲库缓存保存"""
+        lines = []
+        for i in range(len(self.times)):
+            start, end = self.word_index[i], self.word_index[i + 1]
+            words = [[self.word_times[k], self.word_chars[k]] for k in range(start, end)]
+            lines.append([self.times[i], self.texts[i], words] if words else [self.times[i], self.texts[i]])
+        return lines
+
+    @classmethod
+    def from_json(cls, lines):
+        return cls((line[0], line[1], line[2] if len(line) > 2 else ()) for line in lines)
+
+class TimelineCursor:
+    """
+    正向播放时增量前进的游标，每次 tick 摊还 O(1)
+    回退或大跨度跳转时退回到 bisect
+    """
+    __slots__ = ("timeline", "index")
+
+    MAX_STEPS = 4
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.index = -1
+
+    def seek(self, t):
+        times = self.timeline.times
+        i = self.index
+        if i >= 0 and times[i] > t:
+            # 向后跳转
+            self.index = bisect_right(times, t) - 1
+            return self.index
+        n = len(times)
+        for _ in range(self.MAX_STEPS):
+            if i + 1 < n and times[i + 1] <= t: i += 1
+            else:
+                self.index = i
+                return i
+        self.index = bisect_right(times, t) - 1
+        return self.index
+
+def _to_seconds(m, s):
+    return int(m) * 60 + float(s)
+
+def parse_lrc(lrc_text):
+    """解析 LRC 文本，支持 [offset:] 与增强 LRC 逐字时间戳"""
+    offset = 0.0
+    m = RE_OFFSET_TAG.search(lrc_text)
+    if m:
+        # 正值表示歌词提前显示
+        offset = int(m.group(1)) / 1000
+
+    lines = []
+    for line in lrc_text.splitlines():
+        stamps = RE_TIME_TAG.findall(line)
+        if not stamps: continue
+        body = RE_ANY_TAG.sub('', line)
+
+        # 逐字时间戳：记录每个词在去标签文本中的起始位置
+        words = []
+        parts = RE_WORD_TAG.split(body)
+        text = parts[0]
+        for k in range(1, len(parts), 3):
+            words.append((_to_seconds(parts[k], parts[k + 1]), len(text)))
+            text += parts[k + 2]
+        lead = len(text) - len(text.lstrip())
+        text = text.strip()
+        if not text: continue
+        if lead:
+            words = [(wt, max(off - lead, 0)) for wt, off in words]
+        # 末尾的时间戳只标记结束，没有对应的字
+        words = [(wt, off) for wt, off in words if off < len(text)]
+
+        first = _to_seconds(*stamps[0])
+        for st in stamps:
+            t = _to_seconds(*st)
+            # 同一行出现多个时间标签时，逐字时间随行时间平移
+            shift = t - first - offset
+            lines.append((max(t - offset, 0.0), text, [(max(wt + shift, 0.0), off) for wt, off in words]))
+
+    lines.sort(key=lambda x: x[0])
+    return LyricTimeline(lines)
@@ -2,16 +2,49 @@
 import sys
 import os
 import re
+import time
+import threading
+import multiprocessing
 import tkinter as tk
 from tkinter import messagebox, filedialog
-import customtkinter as ctk 
-import pygame
-from PIL import Image, ImageTk
-import math
 import splash
+import startup
+import tracing
+import instance
 import config
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support() # 打包后进程池需要
+    if len(sys.argv) > 1 and sys.argv[1] == "scan":
+        # 命令行模式，不创建任何窗口
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
+    # 从文件管理器打开的文件/文件夹
+    launch_paths = [a for a in sys.argv[1:] if not a.startswith("-") and os.path.exists(a)]
+    # 单实例：打开文件时若已有播放器在运行，把路径交给它后立即退出，不显示开屏也不初始化混音器
+    if config.SINGLE_INSTANCE and launch_paths and not os.environ.get(startup.PROBE_ENV) and instance.forward(launch_paths):
+        sys.exit(0)
+    if "--trace" in sys.argv:
+        i = sys.argv.index("--trace")
+        tracing.enable(sys.argv[i + 1] if i + 1 < len(sys.argv) and not sys.argv[i + 1].startswith("-") else None)
+    # 先显示开屏页面，重量级模块与首帧所需数据在后台线程准备好后再继续
+    splash_screen = splash.SplashScreen()
+    warm = startup.Preload(splash_screen.dpi())
+    splash_screen.run(warm)
+
+# 以下模块通常已由预加载导入，这里直接取自 sys.modules
+import customtkinter as ctk 
+from PIL import ImageTk
 import utils
 import metadata
+import lyrics
+import lyric_view
+import playlist_view
+import loader
+import scheduler
+import playback
+import importer
+import session
 import assets 
 
 try:
@@ -29,8 +62,10 @@ BASE_SIZE_BTN_SMALL = 30
 BASE_SIZE_IMPORT = 12
 
 class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
-    def __init__(self):
+    def __init__(self, warm=None):
         super().__init__()
+        # 开屏页面要到首帧后才关闭，未指定 master 的对象 (customtkinter 字体、文件对话框等) 也归属主窗口
+        tk._default_root = self
         self.TkdndVersion = TkinterDnD._require(self)
 
         self.title("Music")
@@ -42,34 +77,84 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         self.drop_target_register(DND_FILES)
         self.dnd_bind('<<Drop>>', self.on_drop)
 
-        try: pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2048)
-        except: pass
+        # 启动时的重活通常已在开屏期间完成；直接创建窗口时在此同步执行
+        if warm is None:
+            warm = startup.Preload()
+            warm.run()
+        if warm.error: raise warm.error
 
         icon_path = self.resource_path("app_icon.ico")
         if os.path.exists(icon_path):
             self.iconbitmap(icon_path)
 
+        # 曲库缓存
+        self.library = warm.library
+
+        # 搜索索引：保存在磁盘上，曲库写入新记录时增量更新
+        self.search_path = os.path.join(config.CACHE_DIR, config.SEARCH_INDEX_NAME)
+        self.search_index = warm.search_index
+        self.library.listeners.append(self.search_index.add_rows)
+        if not len(self.search_index):
+            threading.Thread(target=lambda: self.search_index.add_rows(self.library.iter_rows()), daemon=True).start()
+        self.render_cache = warm.render_cache
+        self.loader = loader.TrackLoader(self.library, self.render_cache)
+        # 图像内存预算：渲染缓存与预取的曲目共用，超出时先淘汰渲染缓存
+        self.memory = warm.memory
+        self.memory.register("loader", self.loader)
+        self.importers = []
+        self.instance_server = None # 接收其他进程转发的文件
+        self.control = None         # 本机控制接口 (remote.ControlServer)
+        self.published_second = None # 上次推送的播放位置 (整秒)
+
+        # 会话快照：退出时与播放中定期保存，启动时直接恢复
+        self.session_path = os.path.join(config.CACHE_DIR, config.SESSION_NAME)
+        self.last_session_save = time.monotonic()
+        self.validation = None # 后台文件校验任务
+
+        # 统一调度：动画按帧率运行，播放时低频刷新进度，其余时间休眠
+        self.scheduler = scheduler.FrameScheduler(self, config.FRAME_INTERVAL, config.POSITION_TICK)
+        self.scheduler.sleep_hint = self.remaining_time
+
+        # 可选的性能追踪，须在回调绑定之前包装；未启用时以下调用不做任何事
+        tracing.watch_scheduler(self.scheduler)
+        tracing.instrument(self, ("update_visuals", "draw_lyrics_on_canvas", "animate_lyrics", "monitor",
+                                  "play_index", "start_track", "poll_loader"))
+        tracing.instrument(self.loader, ("_load",), "loader")
+        tracing.instrument(self.library, ("get",), "loader")
+        tracing.instrument(metadata, ("read_track",), "loader")
+
+        # 播放状态机不依赖界面，通过回调更新窗口 (warm.audio 为 pygame 或模拟后端)
+        self.playback = playback.PlaybackController(warm.audio, self.loader)
+        self.playback.on_track = lambda track, gapless: self.start_track(track, gapless)
+        self.playback.on_state = self.on_play_state
+        self.playback.on_seek = lambda position: self.publish_position(position, force=True)
+        self.playback.tick_in = lambda seconds: self.scheduler.tick_in(seconds)
+        self.playback.wait_loader = lambda: self.scheduler.mark_dirty("loader")
+        self.playback.view_size = self.view_size
+        tracing.watch_track_switch(self.playback)
+
         # State
-        self.playlist = []
-        self.current_index = -1  # -1 表示没有当前播放的歌曲
-        self.is_playing = False
         self.is_dragging = False
-        self.total_duration = 1 
-        self.seek_offset = 0
         self.original_cover = metadata.get_default_cover()
+        self.current_cover_ref = None
         self.tiny_cover = self.original_cover.resize((50, 50)) 
-        self.lyrics_map = {}
-        self.time_points = []
+        self.timeline = lyrics.LyricTimeline()
+        self.lyric_cursor = self.timeline.cursor()
         self.active_lyric_index = -1
         self.resize_timer = None
+        self.preview_size = None # 拖动调整窗口时最近一次预览的尺寸
+        self.preview_src = None  # (封面, 缩略图)，预览从缩略图渲染
         self.tk_bg_ref = None
         self.tk_cover_ref = None
 
         self.refs = {
             "bg": None, "cover": None, 
             "btn_play": None, "btn_pause": None,
-            "btn_prev": None, "btn_next": None, "btn_import": None
+            "btn_prev": None, "btn_next": None, "btn_import": None,
+            "btn_list": None
         }
+        self.icon_atlas = warm.icon_atlas
+        self.icon_scale = None
 
         # Canvas
         self.canvas = tk.Canvas(self, bg="#000000", highlightthickness=0)
@@ -90,7 +175,7 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         self.id_artist = self.canvas.create_text(0, 0, text="Drag & Drop music", font=f_sub, fill="#DDDDDD", anchor="center")
         
         # 歌词Canvas - 用于滚动歌词显示
-        self.lyric_items = []
+        self.lyric_view = lyric_view.LyricView(self.canvas)
         self.lyric_scroll_offset = 0      # 当前滚动位置 (像素)
         self.target_scroll_offset = 0     # 目标滚动位置 (像素)
         
@@ -99,18 +184,28 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         f_time = (utils.REAL_FONT_NAME, 11)
         self.id_time_curr = self.canvas.create_text(0, 0, text="0:00", font=f_time, fill="#DDDDDD", anchor="w")
         self.id_time_total = self.canvas.create_text(0, 0, text="-0:00", font=f_time, fill="#DDDDDD", anchor="e")
+        self.id_import_status = self.canvas.create_text(0, 0, text="", font=f_time, fill="#DDDDDD", anchor="center", state="hidden")
         
         # 进度条
         self.id_prog_bg = self.canvas.create_line(0, 0, 0, 0, fill="#555555", width=4, capstyle="round")
         self.id_prog_fg = self.canvas.create_line(0, 0, 0, 0, fill="white", width=4, capstyle="round")
         self.id_prog_hitbox = self.canvas.create_line(0, 0, 0, 0, fill="", width=20) 
 
-        self.load_icon_assets()
+        self.load_icon_assets(warm.icons, warm.scale)
+
+        self.create_img_btn("prev", "btn_prev", self.prev_song)
+        self.create_img_btn("play", "btn_play", self.toggle_play) 
+        self.create_img_btn("next", "btn_next", self.next_song)
+        self.create_img_btn("import", "btn_import", self.load_files)
+        # 右键导入按钮：选择文件夹
+        self.canvas.tag_bind(self.btn_objects["import"]["id"], "<Button-3>", lambda e: self.load_folder())
+        self.create_img_btn("list", "btn_list", self.toggle_playlist)
 
-        self.create_img_btn("prev", self.refs["btn_prev"], self.prev_song)
-        self.create_img_btn("play", self.refs["btn_play"], self.toggle_play) 
-        self.create_img_btn("next", self.refs["btn_next"], self.next_song)
-        self.create_img_btn("import", self.refs["btn_import"], self.load_files)
+        # 播放列表面板 (最后创建，位于最上层)
+        self.playlist_view = playlist_view.PlaylistView(self.canvas, self)
+        for key in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            self.bind(key, self.playlist_view.on_key)
+        self.bind("<Escape>", lambda e: self.playlist_view.visible and self.toggle_playlist())
 
         self.canvas.tag_bind(self.id_prog_hitbox, "<Button-1>", self.on_prog_click)
         self.canvas.tag_bind(self.id_prog_hitbox, "<B1-Motion>", self.on_prog_drag)
@@ -119,35 +214,98 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         self.canvas.tag_bind(self.id_prog_hitbox, "<Leave>", lambda e: self.canvas.config(cursor=""))
 
         self.bind("<Configure>", self.on_resize)
-
-        # 启动动画循环
-        self.animate_lyrics() 
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.bind("<Map>", lambda e: e.widget == self and self.scheduler.set_hidden(False))
+        self.bind("<Unmap>", lambda e: e.widget == self and self.scheduler.set_hidden(True))
+
+        self.scheduler.add_animation("lyrics", self.animate_lyrics)
+        self.scheduler.add_animation("loader", self.poll_loader, background=True)
+        self.scheduler.add_animation("import", self.poll_import, background=True)
+        self.scheduler.add_animation("validate", self.poll_validation, background=True)
+        self.scheduler.add_animation("resize", self.animate_resize)
+        self.scheduler.add_animation("playlist", self.playlist_view.poll_titles)
+        self.scheduler.add_animation("search", self.playlist_view.poll_search)
+        self.scheduler.add_ticker(self.monitor)
         
-        self.update_visuals(self.original_cover)
-        self.monitor()
-
-    def load_icon_assets(self):
-        self.refs["btn_play"] = assets.get_icon_tk("play", 55)
-        self.refs["btn_pause"] = assets.get_icon_tk("pause", 55)
-        self.refs["btn_prev"] = assets.get_icon_tk("prev", 35)
-        self.refs["btn_next"] = assets.get_icon_tk("next", 35)
-        self.refs["btn_import"] = assets.get_icon_tk("import", 30)
-
-    def create_img_btn(self, name, tk_img, cmd):
-        item_id = self.canvas.create_image(0, 0, image=tk_img, anchor="center")
-        self.btn_objects[name] = {"id": item_id, "cmd": cmd}
+        if not self.restore_session(warm.session, warm.cover):
+            self.update_visuals(self.original_cover)
+
+    # 播放状态由 self.playback 维护，这里只读
+    @property
+    def playlist(self):
+        return self.playback.playlist
+
+    @property
+    def current_index(self):
+        return self.playback.current_index
+
+    @property
+    def total_duration(self):
+        return self.playback.total_duration
+
+    @property
+    def is_playing(self):
+        return self.playback.playing
+
+    def on_play_state(self, playing):
+        self.set_btn_image("play", "btn_pause" if playing else "btn_play")
+        if self.playback.resume_at is not None: return # 恢复的曲目仍在加载，只是预设了加载后的状态
+        if self.control: self.control.publish("state", {"playing": playing})
+        self.scheduler.set_playing(playing)
+
+    def view_size(self):
+        w = self.winfo_width(); h = self.winfo_height()
+        if w < 100: w = config.START_WIDTH; h = config.START_HEIGHT
+        return w, h
+
+    def load_icon_assets(self, icons=None, scale=None):
+        """
+        图标 (含悬停/按下状态) 取自磁盘缓存的图集，一般已在预加载时读好，这里只创建 PhotoImage
+        当前缩放比例与预加载时不同则向图集补齐缺少的尺寸
+        """
+        actual = assets.quantize_scale(self.winfo_fpixels("1i"))
+        if icons is None or scale != actual:
+            icons = self.icon_atlas.ensure(startup.ICONS, actual)
+        self.icon_scale = actual
+        for ref, variants in icons.items():
+            for variant, img in variants.items():
+                key = ref if variant == "normal" else f"{ref}:{variant}"
+                self.refs[key] = ImageTk.PhotoImage(img, master=self)
+
+    def check_icon_scale(self):
+        """窗口移到 DPI 不同的显示器后更换图标"""
+        if assets.quantize_scale(self.winfo_fpixels("1i")) == self.icon_scale: return
+        self.load_icon_assets()
+        for name, btn in self.btn_objects.items():
+            self.set_btn_image(name, btn["ref"])
+
+    def create_img_btn(self, name, ref, cmd):
+        item_id = self.canvas.create_image(0, 0, anchor="center")
+        self.btn_objects[name] = {"id": item_id, "cmd": cmd, "ref": ref}
+        self.set_btn_image(name, ref)
         self.canvas.tag_bind(item_id, "<Enter>", lambda e: self.canvas.config(cursor="hand2"))
         self.canvas.tag_bind(item_id, "<Leave>", lambda e: self.canvas.config(cursor=""))
         self.canvas.tag_bind(item_id, "<Button-1>", lambda e, n=name: self.on_btn_press(n))
         self.canvas.tag_bind(item_id, "<ButtonRelease-1>", lambda e, n=name: self.on_btn_release(n))
 
+    def set_btn_image(self, name, ref):
+        """切换按钮图标，悬停状态由画布的 activeimage 处理"""
+        btn = self.btn_objects[name]
+        btn["ref"] = ref
+        self.canvas.itemconfig(btn["id"], image=self.refs[ref], activeimage=self.refs[ref + ":hover"])
+
     def on_btn_press(self, name):
-        self.canvas.move(self.btn_objects[name]["id"], 0, 1)
+        btn = self.btn_objects[name]
+        pressed = self.refs[btn["ref"] + ":pressed"]
+        self.canvas.itemconfig(btn["id"], image=pressed, activeimage=pressed)
+        self.canvas.move(btn["id"], 0, 1)
 
     def on_btn_release(self, name):
-        self.canvas.move(self.btn_objects[name]["id"], 0, -1)
-        if self.btn_objects[name]["cmd"]:
-            self.btn_objects[name]["cmd"]()
+        btn = self.btn_objects[name]
+        self.canvas.move(btn["id"], 0, -1)
+        self.set_btn_image(name, btn["ref"])
+        if btn["cmd"]:
+            btn["cmd"]()
 
 
     def resource_path(self, relative_path):
@@ -170,6 +328,7 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         self.canvas.coords(self.id_artist, cx, info_start_y + 35)  # 增加标题与艺术家间距
 
         # 3. 歌词区域（直接在主Canvas上，调用绘制）
+        self.lyric_view.layout(w, h)
         self.draw_lyrics_on_canvas()
         
         # 4. 进度条
@@ -187,6 +346,8 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         time_y = prog_y + 20
         self.canvas.coords(self.id_time_curr, self.prog_x_start, time_y)
         self.canvas.coords(self.id_time_total, self.prog_x_end, time_y)
+        if self.current_index >= 0:
+            self.draw_progress(self.current_position())
         
         # 6. 按钮
         btn_y = h * 0.82  # 向上移动控制按钮区域
@@ -197,6 +358,11 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
 
         import_y = h - 50  # 上移导入按钮增加与底部间距
         self.canvas.coords(self.btn_objects["import"]["id"], cx, import_y)
+        self.canvas.coords(self.id_import_status, cx, import_y - 28)
+        self.canvas.coords(self.btn_objects["list"]["id"], cx + btn_spacing, import_y)
+
+        # 7. 播放列表面板
+        self.playlist_view.layout(w, h)
 
     def update_visuals(self, new_cover):
         if new_cover is None:
@@ -207,90 +373,75 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         w = self.winfo_width(); h = self.winfo_height()
         if w < 100: w = config.START_WIDTH; h = config.START_HEIGHT
 
+        self.show_visuals(self.render_cache.render(new_cover, w, h))
+
+    def show_visuals(self, entry):
+        """显示已渲染好的背景与封面，PhotoImage 随缓存条目复用"""
+        if entry.tk_bg is None:
+            self.render_cache.attach_photos(entry, ImageTk.PhotoImage(entry.bg_img, master=self),
+                                            ImageTk.PhotoImage(entry.cover_img, master=self))
+
         # 背景
-        bg_img = utils.process_background(new_cover, w, h)
-        self.tk_bg_ref = ImageTk.PhotoImage(bg_img)
+        self.tk_bg_ref = entry.tk_bg
         self.canvas.itemconfig(self.id_bg, image=self.tk_bg_ref)
 
         # 封面
-        max_size = int(w * config.WIDTH_RATIO)
-        max_h = int(h * config.ALBUM_HEIGHT_RATIO)
-        size = min(max_size, max_h)
-        cover_resized = new_cover.resize((size, size), Image.Resampling.LANCZOS)
-        self.tk_cover_ref = ImageTk.PhotoImage(cover_resized)
+        self.tk_cover_ref = entry.tk_cover
         self.canvas.itemconfig(self.id_cover, image=self.tk_cover_ref)
 
         self.update_layout()
 
     def draw_lyrics_on_canvas(self):
-        """在主Canvas上绘制歌词（Apple Music风格）"""
-        # 清除旧的歌词对象
-        for item_id in self.lyric_items:
-            self.canvas.delete(item_id)
-        self.lyric_items = []
-
-        w = self.winfo_width(); h = self.winfo_height()
-        if w < 100: w = config.START_WIDTH; h = config.START_HEIGHT
-        cx = w / 2
+        """在主Canvas上绘制歌词（Apple Music风格），由 LyricView 复用画布对象"""
+        self.lyric_view.render(self.timeline, self.active_lyric_index, self.lyric_scroll_offset)
 
-        if not self.time_points:
-            # 无歌词时显示音符
-            lrc_y = h * 0.60
-            item_id = self.canvas.create_text(
-                cx, lrc_y, text="♪",
-                font=(utils.REAL_FONT_NAME, 20),
-                fill="#888888", anchor="center"
-            )
-            self.lyric_items.append(item_id)
-            return
-
-        # 歌词区域的中心Y坐标
-        lrc_center_y = h * 0.63
-
-        # 显示5行以实现平滑过渡：上上行、上一行、当前行、下一行、下下行
-        for offset in [-2, -1, 0, 1, 2]:
-            idx = self.active_lyric_index + offset
-            if 0 <= idx < len(self.time_points):
-                t = self.time_points[idx]
-                text = self.lyrics_map[t]
-
-                # Y坐标 = 中心 + 相对偏移 + 滚动动画偏移
-                y_pos = lrc_center_y + (offset * config.LYRIC_LINE_HEIGHT) + self.lyric_scroll_offset
-
-                # 只绘制中间可见的区域（动态调整，在滚动时扩大下方范围）
-                visible_range = config.LYRIC_LINE_HEIGHT * 1.38
-                if lrc_center_y - visible_range < y_pos < lrc_center_y + visible_range:
-                    is_active = (idx == self.active_lyric_index)
-                    color = "white" if is_active else "#888888"
-                    size = config.LYRIC_FONT_SIZE if is_active else config.LYRIC_FONT_SIZE_SUB
-                    weight = "bold" if is_active else "normal"
-
-                    item_id = self.canvas.create_text(
-                        cx, y_pos, text=text,
-                        font=(utils.REAL_FONT_NAME, size, weight),
-                        fill=color, anchor="center", width=w-80
-                    )
-                    self.lyric_items.append(item_id)
-
-
-
-    def animate_lyrics(self):
-        """每一帧平滑更新滚动位置"""
+    def animate_lyrics(self, dt):
+        """每一帧平滑更新滚动位置，返回 False 表示动画结束"""
         # 计算当前位置与目标位置的差距
         diff = self.target_scroll_offset - self.lyric_scroll_offset
 
         # 如果差距大于 0.5 像素，则继续滑动
         if abs(diff) > 0.5:
-            self.lyric_scroll_offset += diff * config.LYRIC_SMOOTHING
+            # 按实际帧间隔换算平滑系数，滚动速度与帧率无关
+            k = 1 - (1 - config.LYRIC_SMOOTHING) ** (dt / config.LYRIC_REFRESH_RATE)
+            self.lyric_scroll_offset += diff * k
             self.draw_lyrics_on_canvas()
-
-        # 保持 60FPS 循环
-        self.after(config.LYRIC_REFRESH_RATE, self.animate_lyrics)
+            return True
+        return False
 
     def on_resize(self, event):
         if event.widget == self:
             if self.resize_timer: self.after_cancel(self.resize_timer)
-            self.resize_timer = self.after(50, lambda: self.update_visuals(None))
+            self.resize_timer = self.after(config.RESIZE_SETTLE_MS, self.on_resize_settled)
+            self.scheduler.mark_dirty("resize")
+
+    def animate_resize(self, dt):
+        """拖动调整窗口时每帧最多渲染一次低分辨率背景预览，停止调整后由 on_resize_settled 渲染最终画面"""
+        if self.resize_timer is None: return False
+        w = self.winfo_width(); h = self.winfo_height()
+        if w < 100 or (w, h) == self.preview_size: return True
+        self.preview_size = (w, h)
+        bg = self.tk_bg_ref
+        if bg is not None and (bg.width(), bg.height()) == (w, h): return True # 当前背景已是该尺寸
+        if self.preview_src is None or self.preview_src[0] is not self.original_cover:
+            thumb = self.original_cover.copy()
+            thumb.thumbnail((256, 256))
+            self.preview_src = (self.original_cover, thumb)
+        self.tk_bg_ref = ImageTk.PhotoImage(utils.preview_background(self.preview_src[1], w, h), master=self)
+        self.canvas.itemconfig(self.id_bg, image=self.tk_bg_ref)
+        self.update_layout()
+        return True
+
+    def on_resize_settled(self):
+        self.resize_timer = None
+        self.preview_size = None
+        self.check_icon_scale()
+        # 封面按显示框缩小解码：窗口变大后按新尺寸重新读取缩略图，避免放大后发虚
+        decoded_for = self.original_cover.info.get("decoded_for")
+        size = utils.cover_size(self.winfo_width(), self.winfo_height())
+        if decoded_for and size > decoded_for:
+            self.original_cover = self.library.load_cover(self.original_cover.info["cover_key"], size)
+        self.update_visuals(None)
 
     def on_prog_click(self, event):
         self.update_drag_pos(event.x)
@@ -301,17 +452,14 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         
     def on_prog_release(self, event):
         if self.playlist and self.total_duration > 0:
-            try:
-                ratio = (event.x - self.prog_x_start) / self.prog_width
-                ratio = max(0, min(1, ratio))
-                target = ratio * self.total_duration
-                pygame.mixer.music.play(start=target)
-                self.seek_offset = target
-                self.is_playing = True
-                self.canvas.itemconfig(self.btn_objects["play"]["id"], image=self.refs["btn_pause"])
-            except: pass
+            ratio = (event.x - self.prog_x_start) / self.prog_width
+            self.seek(max(0, min(1, ratio)) * self.total_duration)
         self.is_dragging = False
 
+    def seek(self, target):
+        """跳到当前曲目的 target 秒并继续播放，返回是否成功"""
+        return self.playback.seek(target)
+
     def update_drag_pos(self, mouse_x):
         x = max(self.prog_x_start, min(mouse_x, self.prog_x_end))
         y = self.canvas.coords(self.id_prog_bg)[1]
@@ -325,43 +473,146 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         else:
             for p in re.findall(r'\{.*?\}|\S+', raw):
                 if os.path.exists(p.strip('{}')): valid.append(p.strip('{}'))
-        valid = [f for f in valid if f.lower().endswith(('.mp3', '.wav', '.flac', '.m4a'))]
-        if valid:
-            # 将新文件添加到播放列表末尾
-            new_count = len(valid)
-            self.playlist.extend(valid)
-            # 如果当前没有播放或播放列表只有新添加的歌曲，则播放第一首
-            if self.current_index == -1 or len(self.playlist) == new_count:
-                self.current_index = 0
-                self.play_index(0)
+        self.import_paths(valid)
+
+    def attach_instance(self, server):
+        """
+        开始接收其他进程转发的路径
+        接收线程只发出虚拟事件 (Tk 会转交给主线程)，由主线程取队列并按拖放的逻辑导入
+        """
+        server.wake = lambda: self.event_generate("<<InstanceForward>>", when="tail")
+        self.bind("<<InstanceForward>>", lambda e: self.poll_instance())
+        if server.start():
+            self.instance_server = server
+            self.after_idle(self.poll_instance) # 进入主循环之前已收到的请求
+
+    def poll_instance(self):
+        requests = self.instance_server.drain()
+        if not requests: return
+        for paths in requests:
+            self.import_paths([p for p in paths if os.path.exists(p)])
+        # 把窗口带到前台
+        self.deiconify()
+        self.lift()
+        self.focus_force()
+
+    def attach_control(self, server):
+        """
+        开启本机控制接口：命令经 TkBridge 在主线程执行
+        事件循环线程只发出虚拟事件 (Tk 会转交给主线程)，不直接调用界面
+        """
+        server.bridge.wake = lambda: self.event_generate("<<ControlCommand>>", when="tail")
+        self.bind("<<ControlCommand>>", lambda e: server.bridge.run_pending())
+        server.commands = {
+            "play": lambda p: None if self.is_playing else self.toggle_play(),
+            "pause": lambda p: self.toggle_play() if self.is_playing else None,
+            "toggle": lambda p: self.toggle_play(),
+            "next": lambda p: self.next_song(),
+            "prev": lambda p: self.prev_song(),
+            "seek": lambda p: self.seek(float(p["position"])),
+            "enqueue": lambda p: self.enqueue(p["paths"]),
+        }
+        server.status = self.control_status
+        if server.start():
+            self.control = server
+            self.after_idle(server.bridge.run_pending) # 进入主循环之前已收到的命令
+
+    def enqueue(self, paths):
+        """控制接口：路径可以是单个字符串或列表，按拖放的逻辑导入"""
+        if isinstance(paths, str): paths = [paths]
+        valid = [p for p in paths if isinstance(p, str) and os.path.exists(p)]
+        self.import_paths(valid)
+        return len(valid)
+
+    def control_status(self):
+        index = self.current_index
+        line = self.active_lyric_index
+        return {
+            "index": index,
+            "path": self.playlist[index] if 0 <= index < len(self.playlist) else None,
+            "title": self.canvas.itemcget(self.id_title, "text"),
+            "artist": self.canvas.itemcget(self.id_artist, "text"),
+            "playing": self.is_playing,
+            "position": self.current_position(),
+            "duration": self.total_duration,
+            "tracks": len(self.playlist),
+            "lyric": self.timeline.texts[line] if 0 <= line < len(self.timeline) else None,
+        }
+
+    def publish_position(self, curr, force=False):
+        """播放位置每秒最多推送一次"""
+        if not self.control: return
+        second = int(curr)
+        if force or second != self.published_second:
+            self.published_second = second
+            self.control.publish("position", {"position": curr, "duration": self.total_duration})
 
     def load_files(self):
         files = filedialog.askopenfilenames(filetypes=[("Audio", "*.mp3 *.wav *.flac *.m4a")])
         if files:
-            files_list = list(files)
-            new_count = len(files_list)
-            # 将新文件添加到播放列表末尾
-            self.playlist.extend(files_list)
-            # 如果当前没有播放或播放列表只有新添加的歌曲，则播放第一首
-            if self.current_index == -1 or len(self.playlist) == new_count:
-                self.current_index = 0
-                self.play_index(0)
+            self.add_to_playlist(list(files))
+
+    def load_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.import_paths([folder])
+
+    def import_paths(self, paths):
+        """文件直接加入播放列表，文件夹交给后台递归导入"""
+        folders = [p for p in paths if os.path.isdir(p)]
+        files = [p for p in paths if not os.path.isdir(p) and importer.is_audio(p)]
+        self.add_to_playlist(files)
+        if folders:
+            imp = importer.LibraryImporter(self.library)
+            imp.start(folders)
+            self.importers.append(imp)
+            self.scheduler.mark_dirty("import")
+
+    def add_to_playlist(self, paths):
+        # 将新文件添加到播放列表末尾，没有当前播放的歌曲时从第一首开始
+        self.playback.add(paths)
+
+    def poll_import(self, dt=0):
+        """把后台扫描到的文件分批加入播放列表并显示进度，返回 True 表示仍在导入"""
+        found = indexed = 0
+        for imp in list(self.importers):
+            finished = imp.done
+            self.add_to_playlist(imp.drain())
+            found += imp.found
+            indexed += imp.indexed
+            if finished:
+                self.importers.remove(imp)
+                self.playlist_view.invalidate()
+                self.playlist_view.research() # 导入完成后重新执行当前搜索
+                threading.Thread(target=self.save_search_index, daemon=True).start()
+                self.save_session()
+        if self.importers:
+            self.playlist_view.refresh()
+            text = f"Importing {indexed}/{found}"
+            if self.canvas.itemcget(self.id_import_status, "text") != text:
+                self.canvas.itemconfig(self.id_import_status, text=text, state="normal")
+            return True
+        self.canvas.itemconfig(self.id_import_status, state="hidden")
+        return False
 
     def play_index(self, index):
-        if not self.playlist: return
-        try: pygame.mixer.music.unload()
-        except: pass
-        self.current_index = index
-        path = self.playlist[index]
-        
-        t, a, d, c = metadata.get_track_info(path)
-        self.canvas.itemconfig(self.id_title, text=t)
-        self.canvas.itemconfig(self.id_artist, text=a)
+        self.playback.play_index(index)
+
+    def poll_loader(self, dt=0):
+        """等待后台加载完成 (由调度器通过 after 在主线程轮询)，返回 True 表示仍在等待"""
+        return self.playback.poll_loader()
+
+    def start_track(self, track, gapless=False):
+        """曲目加载完成 (playback.on_track)：更新标题、歌词与背景，音频随后由播放状态机开始"""
+        self.canvas.itemconfig(self.id_title, text=track.title)
+        self.canvas.itemconfig(self.id_artist, text=track.artist)
         
-        self.total_duration = d
-        self.seek_offset = 0
+        if self.control:
+            self.control.publish("track", {"index": self.current_index, "path": track.path, "title": track.title,
+                                           "artist": track.artist, "duration": track.duration})
         
-        self.lyrics_map, self.time_points = metadata.get_lyrics(path)
+        self.timeline = track.timeline
+        self.lyric_cursor = self.timeline.cursor()
         self.active_lyric_index = -1
 
         # 重置滚动位置
@@ -373,75 +624,168 @@ class MusicPlayer(ctk.CTk, TkinterDnD.DnDWrapper):
         self.target_scroll_offset = 0
         self.draw_lyrics_on_canvas()
 
-        self.update_visuals(c)
-
+        w, h = self.view_size()
+        self.original_cover = track.cover
+        cover_key = track.cover.info.get("cover_key")
+        self.current_cover_ref = cover_key if cover_key != "default" else None
+        if track.size == (w, h):
+            self.show_visuals(track.visuals)
+        else:
+            # 窗口尺寸在加载期间发生变化
+            self.update_visuals(track.cover)
+
+        # 恢复的会话停在上次的位置，新曲目从头开始
+        self.draw_progress(self.current_position())
+        self.playlist_view.refresh()
+
+    def toggle_playlist(self):
+        self.playlist_view.toggle()
+
+    def search_playlist(self, query):
+        """在播放列表中搜索标题/艺术家/歌词，返回匹配的索引；空查询返回 None (由播放列表的搜索线程调用)"""
+        return self.search_index.search_positions(query, self.playback.positions)
+
+    def save_search_index(self):
+        if not self.search_index.dirty: return
+        try: self.search_index.save(self.search_path)
+        except Exception as e: print(f"Search Index Error: {e}")
+
+    def restore_session(self, sess, cover=None):
+        """
+        立即显示上次的曲目、封面与进度；音频与歌词在后台加载，文件是否存在延后校验
+        返回 True 表示已显示恢复的封面
+        """
+        if sess is None or not sess.playlist: return False
+        if sess.index >= 0:
+            self.canvas.itemconfig(self.id_title, text=sess.title)
+            self.canvas.itemconfig(self.id_artist, text=sess.artist)
+            self.update_visuals(cover or self.library.load_cover(sess.cover_ref))
+        self.playback.restore(sess.playlist, sess.index, sess.position, sess.duration)
+
+        self.validation = self.loader.pool.submit(session.find_missing, list(self.playlist))
+        self.scheduler.mark_dirty("validate")
+        return sess.index >= 0
+
+    def poll_validation(self, dt=0):
+        """后台校验完成后移除已不存在的文件，返回 True 表示仍在校验"""
+        if self.validation is None: return False
+        if not self.validation.done(): return True
         try:
-            pygame.mixer.music.load(path)
-            pygame.mixer.music.play()
-            self.is_playing = True
-            self.canvas.itemconfig(self.btn_objects["play"]["id"], image=self.refs["btn_pause"])
-            self.monitor()
-        except: pass
+            missing = self.validation.result()
+        except Exception as e:
+            print(f"Session Error: {e}")
+            missing = None
+        self.validation = None
+        if missing: self.remove_missing(missing)
+        return False
+
+    def remove_missing(self, missing):
+        self.playback.remove(missing)
+        self.playlist_view.research()
+
+    def snapshot_session(self):
+        return session.Session(
+            list(self.playlist), self.current_index, self.current_position(), self.total_duration,
+            self.canvas.itemcget(self.id_title, "text"), self.canvas.itemcget(self.id_artist, "text"),
+            self.current_cover_ref
+        )
+
+    def save_session(self, sess=None):
+        self.last_session_save = time.monotonic()
+        try: session.save(self.session_path, sess or self.snapshot_session())
+        except Exception as e: print(f"Session Error: {e}")
+
+    def on_close(self):
+        for imp in self.importers: imp.cancel()
+        self.loader.shutdown()
+        self.playlist_view.shutdown()
+        if self.instance_server: self.instance_server.close()
+        if self.control: self.control.close()
+        self.save_search_index()
+        self.save_session()
+        tracing.finish()
+        self.destroy()
 
     def toggle_play(self):
-        if not self.playlist: return
-        if self.is_playing:
-            pygame.mixer.music.pause(); self.is_playing = False; self.canvas.itemconfig(self.btn_objects["play"]["id"], image=self.refs["btn_play"])
-        else:
-            pygame.mixer.music.unpause(); self.is_playing = True; self.canvas.itemconfig(self.btn_objects["play"]["id"], image=self.refs["btn_pause"])
+        self.playback.toggle()
 
     def prev_song(self):
-        if self.playlist:
-            self.play_index((self.current_index - 1) % len(self.playlist))
+        self.playback.prev()
 
     def next_song(self):
-        if self.playlist:
-            self.play_index((self.current_index + 1) % len(self.playlist))
+        self.playback.next()
+
+    def current_position(self):
+        """插值得到的当前位置，不访问混音器"""
+        return self.playback.position()
+
+    def remaining_time(self):
+        """距离当前曲目结束的秒数，窗口隐藏时调度器据此休眠"""
+        try: return self.playback.remaining()
+        except: return None
 
     def monitor(self):
         if self.is_playing and not self.is_dragging:
             try:
-                raw = pygame.mixer.music.get_pos()
-                if raw == -1: raw = 0
-                curr = (raw / 1000) + self.seek_offset
-                if curr < 0: curr = 0
-                if curr > self.total_duration: curr = self.total_duration
-                
-                if self.total_duration > 0:
-                    ratio = curr / self.total_duration
-                    curr_x = self.prog_x_start + (self.prog_width * ratio)
-                    y = self.canvas.coords(self.id_prog_bg)[1]
-                    self.canvas.coords(self.id_prog_fg, self.prog_x_start, y, curr_x, y)
-                
-                self.canvas.itemconfig(self.id_time_curr, text=utils.fmt_time(curr))
-                rem = max(0, self.total_duration - curr)
-                self.canvas.itemconfig(self.id_time_total, text=f"-{utils.fmt_time(rem)}")
+                # 校正时钟并处理无缝切歌/曲目结束，切换时本次不刷新界面
+                curr = self.playback.tick()
+                if curr is None: return
+                self.draw_progress(curr)
+                self.publish_position(curr)
                 
                 # 更新歌词
-                if self.time_points:
-                    new_idx = -1
-                    for i, t in enumerate(self.time_points):
-                        if t <= curr: new_idx = i
-                        else: break
+                if len(self.timeline):
+                    new_idx = self.lyric_cursor.seek(curr)
 
                     if new_idx != -1 and new_idx != self.active_lyric_index:
                         self.active_lyric_index = new_idx
+                        if self.control:
+                            self.control.publish("lyric", {"index": new_idx, "text": self.timeline.texts[new_idx]})
                         # 核心：更新目标滚动位置 = 当前索引 * 行高
                         self.lyric_scroll_offset = config.LYRIC_LINE_HEIGHT
                         self.target_scroll_offset = 0
-
-                if not pygame.mixer.music.get_busy() and (self.total_duration - curr) < 1:
-                    self.next_song()
+                        self.scheduler.mark_dirty("lyrics")
+
+                    # 下一行即将开始时提前唤醒，歌词切换不再受刷新间隔限制
+                    nxt = self.lyric_cursor.index + 1
+                    if nxt < len(self.timeline):
+                        self.scheduler.tick_in(self.timeline.times[nxt] - curr)
+
+                if time.monotonic() - self.last_session_save >= config.SESSION_SAVE_INTERVAL:
+                    # 快照在主线程生成，写盘放到后台
+                    sess = self.snapshot_session()
+                    self.last_session_save = time.monotonic()
+                    threading.Thread(target=self.save_session, args=(sess,), daemon=True).start()
             except: pass
-        self.after(500, self.monitor)
+
+    def draw_progress(self, curr):
+        if self.total_duration > 0:
+            ratio = curr / self.total_duration
+            curr_x = self.prog_x_start + (self.prog_width * ratio)
+            y = self.canvas.coords(self.id_prog_bg)[1]
+            self.canvas.coords(self.id_prog_fg, self.prog_x_start, y, curr_x, y)
+
+        self.canvas.itemconfig(self.id_time_curr, text=utils.fmt_time(curr))
+        rem = max(0, self.total_duration - curr)
+        self.canvas.itemconfig(self.id_time_total, text=f"-{utils.fmt_time(rem)}")
 
 if __name__ == "__main__":
-    # 显示开屏页面
-    splash_screen = splash.SplashScreen()
-    splash_screen.show()
-    
-    # 启动主应用
-    app = MusicPlayer()
+    # 启动主应用；开屏页面是独立的 Tk 解释器，保持显示到主窗口画出第一帧，中间不留空白
+    app = MusicPlayer(warm)
+    app.wait_visibility()
+    app.update_idletasks()
+    splash_screen.close()
+    if startup.report_first_frame(warm):
+        app.loader.shutdown()
+        app.destroy()
+        sys.exit(0)
+    if config.SINGLE_INSTANCE:
+        app.attach_instance(instance.InstanceServer())
+    if config.CONTROL_API or "--control" in sys.argv:
+        import remote
+        app.attach_control(remote.ControlServer(host=config.CONTROL_HOST, port=config.CONTROL_PORT,
+                                                token_path=os.path.join(config.CACHE_DIR, config.CONTROL_TOKEN_NAME)))
+    app.import_paths(launch_paths)
     app.mainloop()
 
 
@@ -0,0 +1,65 @@
+# memory.py
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+def image_bytes(img):
+    """PIL 图像占用的像素内存"""
+    return img.width * img.height * len(img.getbands())
+
+def photo_bytes(photo):
+    """PhotoImage 占用的像素内存 (Tk 按 RGBA 存储)"""
+    return photo.width() * photo.height() * 4
+
+def downsample(img, max_side):
+    """边长超过 max_side 时返回缩小的副本 (保留封面标识与解码尺寸)，否则原样返回"""
+    if max(img.size) <= max_side: return img
+    small = img.copy()
+    small.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    small.info["cover_key"] = img.info.get("cover_key")
+    small.info["decoded_for"] = img.info.get("decoded_for")
+    return small
+
+class MemoryBudget:
+    """
+    长时间运行时保留的图像总预算 (PIL 图像 + PhotoImage)
+    各缓存登记为池 (需提供 bytes_used 与 trim(目标字节数))，
+    总量超出预算时按登记顺序让池收缩，直到回到预算以内
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.pools = OrderedDict()
+        self.peak = 0  # 收缩后的最大占用
+        self.trims = 0
+        self.lock = threading.Lock()
+
+    def register(self, name, pool):
+        with self.lock:
+            self.pools[name] = pool
+        pool.budget = self
+
+    def used(self):
+        return sum(pool.bytes_used for pool in self.pools.values())
+
+    def enforce(self):
+        """池增长后调用；不要在持有池自身锁时调用"""
+        with self.lock:
+            used = self.used()
+            for pool in self.pools.values():
+                if used <= self.max_bytes: break
+                before = pool.bytes_used
+                pool.trim(max(0, before - (used - self.max_bytes)))
+                used -= before - pool.bytes_used
+                self.trims += 1
+            self.peak = max(self.peak, used)
+
+    def stats(self):
+        with self.lock:
+            pools = {name: pool.bytes_used for name, pool in self.pools.items()}
+        return {
+            "bytes": sum(pools.values()),
+            "max_bytes": self.max_bytes,
+            "peak": self.peak,
+            "trims": self.trims,
+            "pools": pools,
+        }
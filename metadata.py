@@ -1,12 +1,12 @@
 # metadata.py
 import os
 import io
-import re
+import hashlib
+import config
+import lyrics
 from PIL import Image
-from mutagen.mp3 import MP3, EasyMP3 
-from mutagen.flac import FLAC
 from mutagen.mp4 import MP4
-from mutagen.id3 import ID3, APIC
+from mutagen.id3 import ID3
 from mutagen import File as MutagenFile
 
 try:
@@ -14,129 +14,184 @@ try:
 except ImportError:
     TinyTag = None
 
+_default_cover = None
+
 def get_default_cover():
-    return Image.new('RGB', (800, 800), color='#222222')
+    """共享的默认封面，只创建一次 (只读，调用方不要修改)；纯色图直接按缩略图尺寸创建，加载时无需再缩小"""
+    global _default_cover
+    if _default_cover is None:
+        img = Image.new('RGB', (config.COVER_MAX_SIZE, config.COVER_MAX_SIZE), color='#222222')
+        img.info["cover_key"] = "default" # 封面标识：默认封面无需落盘，渲染缓存按此键复用
+        _default_cover = img
+    return _default_cover
+
+class TrackInfo:
+    """单次解析得到的曲目信息，封面按需解码"""
+    __slots__ = ("path", "title", "artist", "duration", "lyrics_text", "cover_data", "_cover")
+
+    def __init__(self, path, title, artist, duration, lyrics_text=None, cover_data=None):
+        self.path = path
+        self.title = title
+        self.artist = artist
+        self.duration = duration
+        self.lyrics_text = lyrics_text
+        self.cover_data = cover_data
+        self._cover = None
+
+    @property
+    def cover(self):
+        if self._cover is None:
+            self._cover = decode_cover(self.cover_data)
+        return self._cover
+
+def decode_cover(data, size=config.COVER_MAX_SIZE):
+    """
+    按目标尺寸缩小解码封面，结果边长在 size 与 2 * size 之间 (显示时还会再缩放)
+    size 应取实际需要的尺寸 (缩略图或封面显示框)：JPEG 的 draft 只能按 1/2、1/4、1/8 缩小，
+    目标越接近原图越难省下解码
+    """
+    if data:
+        try:
+            img = Image.open(io.BytesIO(data))
+            if img.format == "JPEG":
+                img.draft("RGB", (size, size))
+            img = img.convert("RGB")
+            factor = max(img.size) // size
+            if factor >= 2:
+                img = img.reduce(factor) # 其他格式按整数倍快速缩小
+            return img
+        except Exception: pass
+    return get_default_cover()
+
+def cover_key(data):
+    """按封面内容计算的标识，同一专辑的曲目共用一份缩略图"""
+    return hashlib.sha1(data).hexdigest()
+
+def _first(value):
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value
+
+def sidecar_key(path):
+    """同名 .lrc 的 "大小:修改时间"，不存在时为空串"""
+    try:
+        st = os.stat(os.path.splitext(path)[0] + ".lrc")
+    except OSError:
+        return ""
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+# 上一次解析结果，get_track_info 与 get_lyrics 连续调用时共用一次解析
+_last_read = (None, None)
+
+def read_track(path):
+    """
+    只打开并解析一次文件，读取时长、标签、歌词和封面原始数据
+    """
+    global _last_read
+    try:
+        st = os.stat(path)
+        stamp = (path, st.st_size, st.st_mtime_ns, sidecar_key(path))
+    except OSError:
+        st = None
+        stamp = None
+    if stamp is not None and _last_read[0] == stamp:
+        return _last_read[1]
 
-def get_track_info(path):
     # 默认值
     title = os.path.basename(path) # 默认用文件名
     if "." in title: title = title.rsplit(".", 1)[0] # 去掉后缀
-    
     artist = "Unknown Artist"
     duration = 0
-    cover = get_default_cover()
+    lyrics_text = None
+    cover_data = None
 
-    # --- 🟢 阶段 1: 读取时长 (保持之前的修复) ---
     try:
-        if path.lower().endswith('.mp3'):
-            audio = MP3(path)
-            duration = audio.info.length
-        elif path.lower().endswith('.flac'):
-            audio = FLAC(path)
-            duration = audio.info.length
-        elif path.lower().endswith('.m4a'):
-            audio = MP4(path)
-            duration = audio.info.length
-        else:
-            audio = MutagenFile(path)
-            if audio and audio.info: duration = audio.info.length
-    except: pass
+        audio = MutagenFile(path)
+    except Exception:
+        audio = None
 
-    # 异常时长修正
-    file_size = os.path.getsize(path)
-    if duration <= 0 or (duration > 600 and file_size < 10*1024*1024):
-        duration = (file_size * 8) / 128000 
+    if audio is not None:
+        try:
+            if audio.info: duration = audio.info.length
+        except Exception: pass
 
-    # --- 🟢 阶段 2: 增强版标签读取 (优先 Mutagen EasyID3) ---
-    # 这种方式对中文支持最好，且能自动处理 ID3v1/v2
-    try:
-        if path.lower().endswith('.mp3'):
-            # EasyMP3 封装了常用的标签读取
-            tags = EasyMP3(path)
-            if 'title' in tags and tags['title']: 
-                title = tags['title'][0]
-            if 'artist' in tags and tags['artist']: 
-                artist = tags['artist'][0]
-        
-        elif path.lower().endswith('.flac'):
-            audio = FLAC(path)
-            if 'title' in audio: title = audio['title'][0]
-            if 'artist' in audio: artist = audio['artist'][0]
-            
-        elif path.lower().endswith('.m4a'):
-            audio = MP4(path)
-            # m4a 的键名比较特殊
-            if '\xa9nam' in audio: title = audio['\xa9nam'][0] # title
-            if '\xa9ART' in audio: artist = audio['\xa9ART'][0] # artist
-            
-        else:
-            # 如果上面都失败，尝试 TinyTag
-            if TinyTag:
-                t = TinyTag.get(path)
-                if t.title: title = t.title
-                if t.artist: artist = t.artist
-
-    except Exception as e:
-        print(f"Tag Read Error: {e}")
-        # 如果读取出错，保持默认文件名
-
-    # --- 阶段 3: 读取封面 (保持不变) ---
-    try:
-        f = MutagenFile(path)
-        pil = None
-        if f.tags and isinstance(f.tags, ID3):
-            for k, v in f.tags.items():
-                if k.startswith("APIC"):
-                    pil = Image.open(io.BytesIO(v.data))
-                    break
-        elif hasattr(f, 'pictures') and f.pictures:
-            pil = Image.open(io.BytesIO(f.pictures[0].data))
-        elif f.tags and 'covr' in f.tags:
-            pil = Image.open(io.BytesIO(f.tags['covr'][0]))
-        
-        if pil: cover = pil.convert("RGB")
-    except: pass
-
-    return title, artist, duration, cover
+        tags = audio.tags
+        try:
+            if isinstance(tags, ID3):
+                # MP3 / WAV 等使用 ID3 帧
+                if 'TIT2' in tags and tags['TIT2'].text: title = str(tags['TIT2'].text[0])
+                if 'TPE1' in tags and tags['TPE1'].text: artist = str(tags['TPE1'].text[0])
+                for k, v in tags.items():
+                    if cover_data is None and k.startswith("APIC"):
+                        cover_data = v.data
+                    elif lyrics_text is None and k.startswith("USLT"):
+                        lyrics_text = str(v)
 
-def parse_lrc_content(lrc_text):
-    lyrics = {}
-    times = []
-    lines = lrc_text.splitlines()
-    for line in lines:
-        matches = re.findall(r'\[(\d+):(\d+\.?\d*)\]', line)
-        text = re.sub(r'\[.*?\]', '', line).strip()
-        if matches and text:
-            for m in matches:
-                min_v, sec_v = int(m[0]), float(m[1])
-                time_key = min_v * 60 + sec_v
-                lyrics[time_key] = text
-                times.append(time_key)
-    times.sort()
-    return lyrics, times
+            elif isinstance(audio, MP4):
+                # m4a 的键名比较特殊
+                if tags:
+                    if '\xa9nam' in tags: title = tags['\xa9nam'][0] # title
+                    if '\xa9ART' in tags: artist = tags['\xa9ART'][0] # artist
+                    if '\xa9lyr' in tags: lyrics_text = tags['\xa9lyr'][0]
+                    if 'covr' in tags and tags['covr']: cover_data = bytes(tags['covr'][0])
 
-def get_lyrics(audio_path):
-    lrc_text = None
-    try:
-        audio = MutagenFile(audio_path)
-        if audio.tags and isinstance(audio.tags, ID3):
-            for key in audio.tags.keys():
-                if key.startswith("USLT"):
-                    lrc_text = str(audio.tags[key])
-                    break
-        elif hasattr(audio, 'tags') and 'LYRICS' in audio.tags:
-            lrc_text = audio.tags['LYRICS'][0]
-    except: pass
-
-    if not lrc_text:
-        base = os.path.splitext(audio_path)[0]
-        lrc_path = base + ".lrc"
+            elif tags is not None:
+                # FLAC / OGG 等 Vorbis 注释
+                if 'title' in tags: title = _first(tags['title']) or title
+                if 'artist' in tags: artist = _first(tags['artist']) or artist
+                if 'lyrics' in tags: lyrics_text = _first(tags['lyrics'])
+                if getattr(audio, 'pictures', None):
+                    cover_data = audio.pictures[0].data
+        except Exception as e:
+            print(f"Tag Read Error: {e}")
+            # 如果读取出错，保持默认文件名
+
+    elif TinyTag:
+        # Mutagen 无法识别时尝试 TinyTag
+        try:
+            t = TinyTag.get(path)
+            if t.title: title = t.title
+            if t.artist: artist = t.artist
+            if t.duration: duration = t.duration
+        except Exception: pass
+
+    # 异常时长修正
+    file_size = st.st_size if st else 0
+    if duration <= 0 or (duration > 600 and file_size < 10*1024*1024):
+        duration = (file_size * 8) / 128000
+
+    # 内嵌歌词缺失时读取同名 .lrc
+    if not lyrics_text:
+        lrc_path = os.path.splitext(path)[0] + ".lrc"
         if os.path.exists(lrc_path):
             try:
                 with open(lrc_path, 'r', encoding='utf-8') as f:
-                    lrc_text = f.read()
-            except: pass
+                    lyrics_text = f.read()
+            except Exception: pass
 
+    info = TrackInfo(path, title, artist, duration, lyrics_text, cover_data)
+    if stamp is not None:
+        _last_read = (stamp, info)
+    return info
+
+def get_track_info(path):
+    info = read_track(path)
+    return info.title, info.artist, info.duration, info.cover
+
+def parse_lrc_content(lrc_text):
+    """兼容旧接口：返回 (时间->歌词 字典, 排序后的时间列表)"""
+    timeline = lyrics.parse_lrc(lrc_text)
+    times = list(timeline.times)
+    return dict(zip(times, timeline.texts)), times
+
+def get_timeline(audio_path):
+    lrc_text = read_track(audio_path).lyrics_text
+    if lrc_text:
+        return lyrics.parse_lrc(lrc_text)
+    return lyrics.LyricTimeline()
+
+def get_lyrics(audio_path):
+    lrc_text = read_track(audio_path).lyrics_text
     if lrc_text:
         return parse_lrc_content(lrc_text)
     return {}, []
@@ -0,0 +1,262 @@
+# playback.py
+# 播放状态机：播放列表、后台加载、无缝切歌、暂停/跳转与进度同步，不依赖界面
+# MusicPlayer 通过回调更新界面；基准测试用模拟后端驱动同一份代码
+import audio
+import clock
+import config
+
+class PlaybackController:
+    """
+    回调 (在调用方线程执行，默认什么都不做)：
+      on_track(track, gapless)  曲目加载完成、开始播放之前，用于更新标题/封面/歌词
+      on_state(playing)         播放/暂停状态变化 (包括恢复的曲目加载期间预设的状态)
+      on_seek(position)         跳转完成
+      tick_in(seconds)          请求在指定秒数后再调用一次 tick()
+      wait_loader()             加载尚未完成，调用方之后须轮询 poll_loader()
+      view_size()               返回 (宽, 高)，决定加载时渲染的背景与封面尺寸
+    """
+    def __init__(self, backend, loader, gapless=None):
+        self.audio = backend
+        self.loader = loader
+        self.gapless = config.GAPLESS if gapless is None else gapless
+        self.clock = clock.PlaybackClock(backend.get_pos, backend.clock)
+
+        self.playlist = []
+        self.positions = {}      # path -> 播放列表索引，用于把搜索结果映射回列表
+        self.current_index = -1  # -1 表示没有当前播放的歌曲
+        self.queued_index = None # 无缝播放时已排入混音器队列的下一首
+        self.pending_load = None # (索引, Future, 是否无缝)
+        self.resume_at = None    # (位置, 是否自动播放)，恢复的曲目加载完成后使用
+        self.total_duration = 1
+        self.playing = False
+        self.track = None        # 当前的 loader.LoadedTrack
+        self.audio_error = None  # 后端在后台线程报告的错误，由 tick() 在调用方线程处理
+        self.failures = 0        # 连续播放失败的曲目数，整个列表都失败时停止
+        backend.on_error = self._on_audio_error
+
+        self.on_track = lambda track, gapless: None
+        self.on_state = lambda playing: None
+        self.on_seek = lambda position: None
+        self.tick_in = lambda seconds: None
+        self.wait_loader = lambda: None
+        self.view_size = lambda: (config.START_WIDTH, config.START_HEIGHT)
+
+    def _on_audio_error(self, error):
+        # 在后端线程调用，只记录
+        self.audio_error = error
+
+    def set_playing(self, value):
+        if value != self.playing:
+            self.playing = value
+            self.on_state(value)
+
+    # ---- 播放列表 ----
+
+    def _index_positions(self):
+        self.positions = {}
+        for i, p in enumerate(self.playlist):
+            self.positions.setdefault(p, i)
+
+    def add(self, paths):
+        """追加到播放列表末尾；没有当前曲目 (或列表原本为空) 时从第一首开始播放"""
+        if not paths: return
+        start = len(self.playlist)
+        self.playlist.extend(paths)
+        for i, p in enumerate(paths, start):
+            self.positions.setdefault(p, i)
+        if self.current_index == -1 or len(self.playlist) == len(paths):
+            self.current_index = 0
+            self.play_index(0)
+        elif self.playing:
+            # 下一首可能已变化，重新排队
+            self.queue_next()
+
+    def restore(self, playlist, index, position, duration):
+        """恢复会话：停在上次的位置，曲目加载完成后等待用户继续播放"""
+        self.playlist = playlist
+        self._index_positions()
+        if index >= 0:
+            self.current_index = index
+            self.total_duration = duration or 1
+            self.clock.start(position)
+            self.clock.pause()
+            self.resume_at = (position, False)
+            self.request_track(index)
+
+    def remove(self, missing):
+        """移除已不存在的文件，当前曲目保持不变 (自身被移除时清空)"""
+        current = self.current_index
+        if current >= 0:
+            if self.playlist[current] in missing:
+                current = -1
+                self.resume_at = None
+            else:
+                current = sum(1 for p in self.playlist[:current] if p not in missing)
+        self.playlist = [p for p in self.playlist if p not in missing]
+        self._index_positions()
+        self.current_index = current
+        self.queued_index = None
+        if current >= 0: self.queue_next()
+
+    # ---- 曲目切换 ----
+
+    def play_index(self, index):
+        if not self.playlist: return
+        try: self.audio.unload()
+        except audio.AudioError: pass
+        self.set_playing(False)
+        self.clock.stop()
+        self.queued_index = None
+        self.resume_at = None
+        self.request_track(index)
+
+    def request_track(self, index, gapless=False):
+        """元数据与图像在后台线程准备，完成后再切换；gapless 表示音频已由混音器队列接续"""
+        self.current_index = index
+        w, h = self.view_size()
+        future = self.loader.request(self.playlist[index], w, h)
+        self.pending_load = (index, future, gapless)
+        if future.done():
+            self.poll_loader()
+        else:
+            self.wait_loader()
+
+    def poll_loader(self):
+        """取回后台加载的结果，返回 True 表示仍在等待"""
+        if self.pending_load is None: return False
+        index, future, gapless = self.pending_load
+        if not future.done(): return True
+        self.pending_load = None
+        if index != self.current_index: return False
+        try:
+            track = future.result()
+        except Exception as e:
+            print(f"Load Error: {e}")
+            return False
+        self.start_track(track, gapless)
+        return False
+
+    def start_track(self, track, gapless=False):
+        self.track = track
+        self.total_duration = track.duration
+        self.on_track(track, gapless)
+
+        if not gapless:
+            try:
+                self.audio.load(track.path)
+                start, autoplay = self.resume_at or (0, True)
+                self.resume_at = None
+                try: self.audio.play(start=start)
+                except audio.AudioError: self.audio.play(); start = 0
+                self.clock.start(start)
+                if autoplay:
+                    self.set_playing(True)
+                else:
+                    # 恢复的会话停在上次的位置
+                    self.audio.pause()
+                    self.clock.pause()
+            except audio.AudioError as e:
+                print(f"Audio Error: {e}")
+        self.queue_next()
+
+        # 预取前后两首
+        n = len(self.playlist)
+        w, h = self.view_size()
+        neighbours = [self.playlist[(self.current_index + 1) % n], self.playlist[(self.current_index - 1) % n]]
+        self.loader.prefetch([track.path] + neighbours, w, h)
+
+    def queue_next(self):
+        """无缝模式：提前把下一首交给混音器队列，解码器在当前曲目结束前就已打开"""
+        if not self.gapless or len(self.playlist) < 2 or self.current_index < 0: return
+        nxt = (self.current_index + 1) % len(self.playlist)
+        try:
+            self.audio.queue(self.playlist[nxt])
+            self.queued_index = nxt
+        except audio.AudioError:
+            self.queued_index = None
+
+    def on_gapless_transition(self, elapsed):
+        """混音器已切到队列中的下一首，只需加载元数据与图像"""
+        index = self.queued_index
+        self.queued_index = None
+        self.clock.start(0, elapsed)
+        self.request_track(index, gapless=True)
+
+    # ---- 播放控制 ----
+
+    def toggle(self):
+        if not self.playlist: return
+        if self.resume_at is not None:
+            # 恢复的曲目仍在加载，加载完成后按此状态开始
+            self.resume_at = (self.resume_at[0], not self.resume_at[1])
+            self.on_state(self.resume_at[1])
+            return
+        if self.playing:
+            self.audio.pause(); self.clock.pause(); self.set_playing(False)
+        else:
+            self.audio.unpause(); self.clock.resume(); self.set_playing(True)
+
+    def prev(self):
+        if self.playlist:
+            self.play_index((self.current_index - 1) % len(self.playlist))
+
+    def next(self):
+        if self.playlist:
+            self.play_index((self.current_index + 1) % len(self.playlist))
+
+    def seek(self, target):
+        """跳到当前曲目的 target 秒并继续播放，返回是否成功"""
+        if not self.playlist or self.total_duration <= 0: return False
+        target = max(0.0, min(target, self.total_duration))
+        try:
+            self.audio.play(start=target)
+        except audio.AudioError:
+            return False
+        self.clock.start(target)
+        self.set_playing(True)
+        self.queue_next()
+        self.on_seek(target)
+        return True
+
+    # ---- 进度 ----
+
+    def position(self):
+        """插值得到的当前位置，不访问混音器"""
+        return max(0.0, min(self.clock.now(), self.total_duration))
+
+    def remaining(self):
+        """距离当前曲目结束的秒数"""
+        return max(0, self.total_duration - self.position())
+
+    def tick(self):
+        """
+        低频同步 (调度器调用)：校正播放时钟，检测无缝切歌与曲目结束
+        返回当前位置；未在播放或刚切换曲目时返回 None
+        """
+        if not self.playing: return None
+        error, self.audio_error = self.audio_error, None
+        if error is not None:
+            # 当前曲目无法播放：跳到下一首，整个列表都失败时停下
+            print(f"Audio Error: {error}")
+            self.failures += 1
+            if self.failures >= len(self.playlist):
+                self.failures = 0
+                self.audio.stop(); self.clock.pause(); self.set_playing(False)
+            else:
+                self.next()
+            return None
+        prev_raw = self.clock.last_raw
+        self.clock.sync()
+        if self.queued_index is not None and self.clock.rewound(prev_raw):
+            self.on_gapless_transition(self.clock.last_raw)
+            return None
+        curr = self.position()
+        if not self.audio.get_busy() and self.total_duration - curr < 1:
+            # 已播完：没有排队的下一首，或排队的曲目没能接上
+            self.next()
+            return None
+        if curr >= 1: self.failures = 0
+        if self.queued_index is not None:
+            # 在预计的切换点附近唤醒，及时更新界面
+            self.tick_in(self.total_duration - curr + 0.05)
+        return curr
@@ -0,0 +1,249 @@
+# playlist_view.py
+import os
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import font as tkfont
+import utils
+
+class PlaylistView:
+    """
+    虚拟化的播放列表面板：只创建可见行数的 Canvas 文本对象并循环复用
+    行标题在加载线程中从曲库缓存读取，取回后再重绘，内存与播放列表长度无关
+    搜索在单独的线程执行，同时只有一个查询，输入比搜索快时只搜索最新的内容
+    """
+    ROW_HEIGHT = 28
+    SEARCH_HEIGHT = 30
+    TAG = "playlist"
+    TITLE_CACHE_SIZE = 512
+    PADDING = 6
+
+    def __init__(self, canvas, player):
+        self.canvas = canvas
+        self.player = player
+        self.visible = False
+        self.top = 0         # 第一行对应的位置 (过滤时为结果序号)
+        self.filter = None   # 搜索结果对应的播放列表索引，None 表示不过滤
+        self.query = ""
+        self.search_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self.search_job = None # (查询, Future)
+
+        self.font = tkfont.Font(root=canvas, family=utils.REAL_FONT_NAME, size=12)
+        self.font_current = tkfont.Font(root=canvas, family=utils.REAL_FONT_NAME, size=12, weight="bold")
+
+        self.id_panel = canvas.create_rectangle(0, 0, 0, 0, fill="#111111", outline="", state="hidden", tags=(self.TAG,))
+        self.id_thumb = canvas.create_rectangle(0, 0, 0, 0, fill="#555555", outline="", state="hidden", tags=(self.TAG,))
+
+        # 搜索框
+        self.search_var = tk.StringVar(master=canvas)
+        self.entry = tk.Entry(canvas, textvariable=self.search_var, font=self.font, bg="#222222", fg="white",
+                              insertbackground="white", relief="flat", highlightthickness=0)
+        self.entry.bind("<KeyRelease>", self.on_search)
+        self.id_entry = canvas.create_window(0, 0, window=self.entry, anchor="nw", state="hidden", tags=(self.TAG,))
+
+        self.rows = []       # 复用的文本对象
+        self.row_state = []  # 每行当前显示的 (索引, 是否当前曲目, 文本)
+        self.titles = OrderedDict() # path -> 显示文本 (LRU)，None 表示曲库中没有，显示文件名
+        self.lookups = {}           # path -> 查询中的 Future
+
+        self.x0 = self.y0 = self.x1 = self.y1 = 0
+        self.rows_y = 0
+
+        canvas.tag_bind(self.TAG, "<Button-1>", self.on_click)
+        canvas.bind("<MouseWheel>", self.on_wheel, add="+")
+        canvas.bind("<Button-4>", self.on_wheel, add="+")
+        canvas.bind("<Button-5>", self.on_wheel, add="+")
+
+    @property
+    def page_size(self):
+        return len(self.rows)
+
+    @property
+    def count(self):
+        return len(self.filter) if self.filter is not None else len(self.player.playlist)
+
+    def index_at(self, pos):
+        return self.filter[pos] if self.filter is not None else pos
+
+    def layout(self, w, h):
+        self.x0, self.y0 = 20, 20
+        self.x1, self.y1 = w - 20, h * 0.70
+        self.canvas.coords(self.id_panel, self.x0, self.y0, self.x1, self.y1)
+        self.canvas.coords(self.id_entry, self.x0 + self.PADDING, self.y0 + self.PADDING)
+        self.canvas.itemconfig(self.id_entry, width=self.x1 - self.x0 - 2 * self.PADDING, height=self.SEARCH_HEIGHT - 6)
+        self.rows_y = self.y0 + self.PADDING + self.SEARCH_HEIGHT
+
+        # 行对象数量只取决于面板高度
+        count = max(int((self.y1 - self.rows_y - self.PADDING) // self.ROW_HEIGHT), 1)
+        while len(self.rows) < count:
+            item_id = self.canvas.create_text(0, 0, text="", font=self.font, fill="#888888",
+                                              anchor="w", state="hidden", tags=(self.TAG,))
+            self.rows.append(item_id)
+            self.row_state.append(None)
+        while len(self.rows) > count:
+            self.canvas.delete(self.rows.pop())
+            self.row_state.pop()
+        for i, item_id in enumerate(self.rows):
+            y = self.rows_y + (i + 0.5) * self.ROW_HEIGHT
+            self.canvas.coords(item_id, self.x0 + 14, y)
+            self.canvas.itemconfig(item_id, width=self.x1 - self.x0 - 36)
+        self.scroll_to(self.top, force=True)
+
+    def toggle(self):
+        self.visible = not self.visible
+        if self.visible:
+            self.canvas.itemconfig(self.id_panel, state="normal")
+            self.canvas.itemconfig(self.id_entry, state="normal")
+            self.canvas.tag_raise(self.TAG)
+            self.entry.focus_set()
+            # 打开时定位到当前曲目
+            self.scroll_to(self.player.current_index - self.page_size // 2, force=True)
+        else:
+            self.canvas.itemconfig(self.TAG, state="hidden")
+            self.row_state = [None] * len(self.rows)
+            self.canvas.focus_set()
+
+    def scroll_to(self, first, force=False):
+        first = max(0, min(first, self.count - self.page_size))
+        if first != self.top or force:
+            self.top = first
+            self.refresh()
+
+    def refresh(self):
+        """只更新内容发生变化的行"""
+        if not self.visible: return
+        playlist = self.player.playlist
+        current = self.player.current_index
+        count = self.count
+        for i, item_id in enumerate(self.rows):
+            pos = self.top + i
+            if pos < count:
+                idx = self.index_at(pos)
+                text = self.row_text(idx, playlist[idx])
+                state = (idx, idx == current, text)
+                if self.row_state[i] != state:
+                    self.row_state[i] = state
+                    is_current = idx == current
+                    self.canvas.itemconfig(
+                        item_id, text=text, state="normal",
+                        font=self.font_current if is_current else self.font,
+                        fill="white" if is_current else "#AAAAAA"
+                    )
+            elif self.row_state[i] is not None:
+                self.row_state[i] = None
+                self.canvas.itemconfig(item_id, state="hidden")
+        self._update_thumb()
+
+    def _update_thumb(self):
+        total = self.count
+        if total <= self.page_size:
+            self.canvas.itemconfig(self.id_thumb, state="hidden")
+            return
+        track_h = self.y1 - self.rows_y - self.PADDING
+        thumb_h = max(track_h * self.page_size / total, 12)
+        y = self.rows_y + (track_h - thumb_h) * self.top / (total - self.page_size)
+        self.canvas.coords(self.id_thumb, self.x1 - 8, y, self.x1 - 4, y + thumb_h)
+        self.canvas.itemconfig(self.id_thumb, state="normal")
+
+    def row_text(self, idx, path):
+        if path in self.titles:
+            self.titles.move_to_end(path)
+            text = self.titles[path]
+        else:
+            # 界面线程不做 stat 与 SQLite 查询：交给加载线程，取回后由 poll_titles 重绘
+            text = None
+            if path not in self.lookups:
+                self.lookups[path] = self.player.loader.peek(path)
+                self.player.scheduler.mark_dirty("playlist")
+        if text is None:
+            return f"{idx + 1}.  {os.path.splitext(os.path.basename(path))[0]}"
+        return f"{idx + 1}.  {text}"
+
+    def poll_titles(self, dt=0):
+        """取回已完成的标题查询 (由调度器在主线程轮询)，返回 True 表示仍有查询未完成"""
+        done = [p for p, f in self.lookups.items() if f.done()]
+        for path in done:
+            future = self.lookups.pop(path)
+            info = None if future.cancelled() or future.exception() else future.result()
+            # 未命中也缓存，未解析的文件不会每帧重复查询；导入完成后 invalidate() 再查
+            self.titles[path] = f"{info[0]}  ·  {info[1]}" if info else None
+            if len(self.titles) > self.TITLE_CACHE_SIZE:
+                self.titles.popitem(last=False)
+        if done: self.refresh()
+        return bool(self.lookups)
+
+    def invalidate(self, path=None):
+        """曲库更新后丢弃缓存的标题 (包括未命中的记录)"""
+        if path is None: self.titles.clear()
+        else: self.titles.pop(path, None)
+
+    def contains(self, x, y):
+        return self.visible and self.x0 <= x <= self.x1 and self.y0 <= y <= self.y1
+
+    def on_search(self, event=None):
+        """边输入边搜索：清空时立即恢复完整列表，否则交给搜索线程"""
+        query = self.search_var.get()
+        if query == self.query: return
+        self.query = query
+        if not query.strip():
+            self.filter = None
+            self.scroll_to(0, force=True)
+        elif self.search_job is None:
+            self._start_search()
+
+    def research(self):
+        """曲库或播放列表变化后重新执行当前搜索；旧结果的索引可能已失效，先显示完整列表"""
+        self.query = None
+        self.filter = None
+        self.search_job = None # 进行中的查询基于旧的列表，结果丢弃
+        self.on_search()
+        if self.filter is None and self.visible: self.scroll_to(self.top, force=True)
+
+    def _start_search(self):
+        self.search_job = (self.query, self.search_pool.submit(self.player.search_playlist, self.query))
+        self.player.scheduler.mark_dirty("search")
+
+    def poll_search(self, dt=0):
+        """取回搜索结果 (由调度器在主线程轮询)，返回 True 表示仍在搜索"""
+        if self.search_job is None: return False
+        query, future = self.search_job
+        if not future.done(): return True
+        self.search_job = None
+        if query != self.query:
+            # 搜索期间输入已变化：结果作废，搜索最新的内容
+            if not self.query.strip(): return False
+            self._start_search()
+            return True
+        try:
+            self.filter = future.result()
+        except Exception as e:
+            print(f"Search Error: {e}")
+            self.filter = None
+        self.scroll_to(0, force=True)
+        return False
+
+    def shutdown(self):
+        self.search_pool.shutdown(wait=False, cancel_futures=True)
+
+    def on_wheel(self, event):
+        if not self.contains(event.x, event.y): return
+        step = -3 if (getattr(event, "delta", 0) > 0 or event.num == 4) else 3
+        self.scroll_to(self.top + step)
+
+    def on_click(self, event):
+        row = int((event.y - self.rows_y) // self.ROW_HEIGHT)
+        pos = self.top + row
+        if event.y >= self.rows_y and row < self.page_size and pos < self.count:
+            self.player.play_index(self.index_at(pos))
+
+    def on_key(self, event):
+        """方向键 / 翻页 / Home / End 跳转"""
+        if not self.visible: return
+        moves = {
+            "Up": self.top - 1, "Down": self.top + 1,
+            "Prior": self.top - self.page_size, "Next": self.top + self.page_size,
+            "Home": 0, "End": self.count,
+        }
+        if event.keysym in moves:
+            self.scroll_to(moves[event.keysym])
+            return "break"
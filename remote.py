@@ -0,0 +1,267 @@
+# remote.py
+# 可选的本机控制接口：HTTP 命令 + SSE (text/event-stream) 事件推送
+# asyncio 在后台线程运行，命令经 TkBridge 交给 Tk 主线程执行
+import os
+import hmac
+import json
+import queue
+import asyncio
+import secrets
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlsplit, parse_qs
+
+SUBSCRIBER_BACKLOG = 256 # 每个订阅者最多积压的事件数，慢订阅者丢弃最旧的事件
+COMMAND_TIMEOUT = 5.0    # 等待 Tk 主线程执行命令的秒数
+KEEPALIVE = 15.0         # 无事件时发送注释行，防止空闲连接被中间设备断开
+MAX_BODY = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+           415: "Unsupported Media Type", 500: "Internal Server Error", 503: "Service Unavailable"}
+LOOPBACK = {"127.0.0.1", "localhost", "::1"}
+
+class TkBridge:
+    """
+    把函数交给 Tk 主线程执行：入队后调用 wake() 唤醒主线程，
+    主线程在 run_pending 中依次执行并设置 Future 的结果
+    """
+    def __init__(self, wake=None):
+        self.wake = wake
+        self.queue = queue.Queue()
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.queue.put((future, fn, args))
+        return future
+
+    def run_pending(self):
+        """主线程调用"""
+        while True:
+            try: future, fn, args = self.queue.get_nowait()
+            except queue.Empty: return
+            if not future.set_running_or_notify_cancel(): continue
+            try: future.set_result(fn(*args))
+            except Exception as e: future.set_exception(e)
+
+class ControlServer:
+    """
+    GET  /status          当前状态 (JSON)
+    GET  /events          SSE 推送: track / state / position / lyric
+    POST /<命令>           参数取自查询串或 JSON 请求体，如 /seek?position=30、/enqueue {"paths": [...]}
+    commands: {名称: fn(params)}，status: fn()，均在 Tk 主线程执行
+
+    每次启动生成口令并写入 token_path (仅本用户可读)，请求须带 Authorization: Bearer <口令>
+    (EventSource 无法设置请求头，可用 ?token=)；另外拒绝 Host / Origin 不是本机的请求 (防 DNS 重绑定与网页跨域调用)，
+    请求体必须是 application/json
+    """
+    def __init__(self, commands=None, status=None, bridge=None, host="127.0.0.1", port=0, token_path=None):
+        self.commands = commands or {}
+        self.status = status
+        self.bridge = bridge or TkBridge()
+        self.host = host
+        self.port = port
+        self.token = secrets.token_urlsafe(24)
+        self.token_path = token_path
+        self.loop = None
+        self.server = None
+        self.error = None
+        self.subscribers = set()
+        self.published = 0
+        self.dropped = 0
+
+    def start(self):
+        """在后台线程启动事件循环，监听失败时返回 False"""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                self.server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                self.error = e
+                ready.set()
+                return
+            self.port = self.server.sockets[0].getsockname()[1]
+            if self.token_path:
+                try:
+                    self._write_token()
+                except OSError as e:
+                    self.error = e
+                    self.server.close()
+                    ready.set()
+                    return
+            self.loop = loop
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="control", daemon=True).start()
+        ready.wait()
+        if self.error: print(f"Control API Error: {self.error}")
+        return self.error is None
+
+    def _write_token(self):
+        """端口与口令写入只有本用户可读的文件，供本机客户端读取"""
+        os.makedirs(os.path.dirname(self.token_path), exist_ok=True)
+        tmp = self.token_path + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(f"{self.port} {self.token}")
+        os.replace(tmp, self.token_path)
+
+    def close(self):
+        if self.loop is None: return
+        loop, self.loop = self.loop, None
+        if self.token_path:
+            try: os.remove(self.token_path)
+            except OSError: pass
+        asyncio.run_coroutine_threadsafe(self._shutdown(), loop)
+
+    async def _shutdown(self):
+        self.server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks: task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        asyncio.get_running_loop().stop()
+
+    # ---- 事件推送 (任意线程调用) ----
+
+    def publish(self, event, data):
+        """序列化一次，所有订阅者共享同一份字节；没有订阅者时几乎没有开销"""
+        if not self.subscribers or self.loop is None: return
+        payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+        try: self.loop.call_soon_threadsafe(self._broadcast, payload)
+        except RuntimeError: pass # 事件循环已关闭
+
+    def _broadcast(self, payload):
+        self.published += 1
+        for q in self.subscribers:
+            self._broadcast_to(q, payload)
+
+    def _broadcast_to(self, q, payload):
+        if q.full():
+            q.get_nowait()
+            self.dropped += 1
+        q.put_nowait(payload)
+
+    # ---- HTTP ----
+
+    async def _call(self, fn, *args):
+        future = self.bridge.submit(fn, *args)
+        # wake 可能阻塞到主线程处理完 (Tk 跨线程调用)，放到线程池里执行
+        await asyncio.get_running_loop().run_in_executor(None, self._wake)
+        return await asyncio.wait_for(asyncio.wrap_future(future), COMMAND_TIMEOUT)
+
+    def _wake(self):
+        try: self.bridge.wake()
+        except Exception: pass # 主线程还未进入主循环，命令留在队列中
+
+    def _check(self, method, headers, query):
+        """校验来源与口令，返回拒绝时的 (状态码, 原因)，通过时返回 None"""
+        allowed = LOOPBACK | {self.host}
+        try:
+            host = urlsplit("//" + headers.get("host", "")).hostname
+        except ValueError:
+            host = None
+        if host not in allowed:
+            return 403, "host not allowed"
+        origin = headers.get("origin")
+        if origin is not None and urlsplit(origin).hostname not in allowed:
+            return 403, "origin not allowed"
+        auth = headers.get("authorization", "")
+        token = auth[7:] if auth.lower().startswith("bearer ") else query.get("token", [""])[-1]
+        if not hmac.compare_digest(token.encode(), self.token.encode()):
+            return 401, "missing or invalid token"
+        if method == "POST" and int(headers.get("content-length") or 0) > 0:
+            if headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+                return 415, "body must be application/json"
+        return None
+
+    async def _handle(self, reader, writer):
+        try:
+            line = await reader.readline()
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""): break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY: raise ValueError("body too large")
+            body = await reader.readexactly(length) if length else b""
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+
+        url = urlsplit(target)
+        name = url.path.strip("/")
+        query = parse_qs(url.query)
+        denied = self._check(method, headers, query)
+        if denied:
+            await self._respond(writer, denied[0], {"error": denied[1]})
+            return
+        try:
+            if method == "GET" and name == "events":
+                await self._stream(reader, writer)
+                return
+            if method == "GET" and name == "status":
+                code, result = 200, await self._call(self.status)
+            elif method == "POST" and name in self.commands:
+                params = {k: v[-1] for k, v in query.items() if k != "token"}
+                if body: params.update(json.loads(body))
+                code, result = 200, {"ok": True, "result": await self._call(self.commands[name], params)}
+            else:
+                code, result = 404, {"error": "not found"}
+        except (KeyError, ValueError, TypeError) as e:
+            code, result = 400, {"error": f"{type(e).__name__}: {e}"}
+        except asyncio.TimeoutError:
+            code, result = 503, {"error": "player busy"}
+        except ConnectionError:
+            return
+        except Exception as e:
+            code, result = 500, {"error": f"{type(e).__name__}: {e}"}
+        await self._respond(writer, code, result)
+
+    async def _respond(self, writer, code, result):
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {code} {REASONS[code]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _stream(self, reader, writer):
+        q = asyncio.Queue(SUBSCRIBER_BACKLOG)
+        closed = None
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\n\r\n")
+        try:
+            # 先发一次完整状态，之后只推送变化
+            status = await self._call(self.status)
+            writer.write(f"event: status\ndata: {json.dumps(status, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.subscribers.add(q)
+            # 客户端断开时读端收到 EOF，放入 None 结束推送，不必等到下一次写入失败
+            closed = asyncio.ensure_future(reader.read())
+            closed.add_done_callback(lambda _: self._broadcast_to(q, None))
+            while True:
+                try:
+                    payload = await asyncio.wait_for(q.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    payload = b": keepalive\n\n"
+                # 积压的事件合并成一次写入
+                chunks = [payload]
+                while not q.empty(): chunks.append(q.get_nowait())
+                if None in chunks: break
+                writer.write(b"".join(chunks))
+                await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.subscribers.discard(q)
+            if closed: closed.cancel()
+            writer.close()
+
+    def stats(self):
+        return {"subscribers": len(self.subscribers), "published": self.published, "dropped": self.dropped}
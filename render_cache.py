@@ -0,0 +1,102 @@
+# render_cache.py
+import threading
+from collections import OrderedDict
+import utils
+import memory
+
+class RenderEntry:
+    """
+    一组渲染结果：PIL 背景 / 封面，以及按需创建的 PhotoImage
+    创建 PhotoImage 后像素已复制进 Tk，PIL 副本随即释放
+    """
+    __slots__ = ("bg_img", "cover_img", "tk_bg", "tk_cover", "nbytes")
+
+    def __init__(self, bg_img, cover_img):
+        self.bg_img = bg_img
+        self.cover_img = cover_img
+        self.tk_bg = None
+        self.tk_cover = None
+        self.nbytes = memory.image_bytes(bg_img) + memory.image_bytes(cover_img)
+
+class RenderCache:
+    """
+    渲染结果的 LRU 缓存，以 (封面标识, 窗口宽, 窗口高) 为键
+    超出字节预算 (或登记的 MemoryBudget 要求收缩) 时淘汰最久未使用的条目
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.budget = None # memory.MemoryBudget，登记后由其统一限额
+        self.entries = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes_used -= old.nbytes
+            self.entries[key] = entry
+            self.bytes_used += entry.nbytes
+            self._evict(self.max_bytes)
+        if self.budget: self.budget.enforce()
+        return entry
+
+    def render(self, cover, win_w, win_h):
+        """取缓存结果，未命中时渲染并写入 (纯 PIL，可在后台线程执行)"""
+        cover_key = cover.info.get("cover_key")
+        key = (cover_key, win_w, win_h)
+        if cover_key is not None:
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+        entry = RenderEntry(*utils.render_visuals(cover, win_w, win_h))
+        if cover_key is not None:
+            self.put(key, entry)
+        return entry
+
+    def attach_photos(self, entry, tk_bg, tk_cover):
+        """记录主线程创建的 PhotoImage，并释放已不再需要的 PIL 副本"""
+        with self.lock:
+            entry.tk_bg = tk_bg
+            entry.tk_cover = tk_cover
+            entry.bg_img = entry.cover_img = None
+            nbytes = memory.photo_bytes(tk_bg) + memory.photo_bytes(tk_cover)
+            if any(e is entry for e in self.entries.values()):
+                self.bytes_used += nbytes - entry.nbytes
+                self._evict(self.max_bytes)
+            entry.nbytes = nbytes
+        if self.budget: self.budget.enforce()
+
+    def trim(self, target):
+        """收缩到 target 字节以内 (供 MemoryBudget 调用)"""
+        with self.lock:
+            self._evict(target)
+
+    def _evict(self, limit):
+        # 至少保留最新的一条，避免超大窗口时缓存失效
+        while self.bytes_used > limit and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.bytes_used -= entry.nbytes
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
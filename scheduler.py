@@ -0,0 +1,155 @@
+# scheduler.py
+import time
+
+STATE_ANIMATING = "animating" # 有动画在进行，按显示刷新率唤醒
+STATE_PLAYING = "playing"     # 稳定播放，只做低频进度更新
+STATE_HIDDEN = "hidden"       # 窗口隐藏，只在曲目结束时唤醒
+STATE_IDLE = "idle"           # 暂停/无播放列表，完全休眠
+STATES = (STATE_ANIMATING, STATE_PLAYING, STATE_HIDDEN, STATE_IDLE)
+
+class FrameScheduler:
+    """
+    统一的 after() 调度器，替代多个常驻循环
+    只在有组件被标记为 dirty 时按帧率运行，其余时间降频或休眠
+    """
+    def __init__(self, widget, frame_ms, tick_ms):
+        self.widget = widget
+        self.frame_ms = frame_ms
+        self.tick_ms = tick_ms
+
+        self.animations = {}  # name -> fn(dt_ms)，返回 True 表示动画仍在进行
+        self.background = set() # 窗口隐藏时仍需运行的轮询 (加载、导入等)，按 tick 间隔执行
+        self.tickers = []     # 播放时低频调用的回调
+        self.dirty = set()
+        self.playing = False
+        self.hidden = False
+        self.sleep_hint = None # 隐藏时返回距离下次必须唤醒的秒数
+
+        self.after_id = None
+        self.due = 0.0
+        self.last_frame = None
+        self.last_tick = 0.0
+        self.early_tick = None # 由 tick_in 请求的提前唤醒时间
+
+        # 各状态下的唤醒次数与停留时间
+        self.wakeups = dict.fromkeys(STATES, 0)
+        self.state_time = dict.fromkeys(STATES, 0.0)
+        self.state = STATE_IDLE
+        self.state_since = time.monotonic()
+
+    def add_animation(self, name, fn, background=False):
+        self.animations[name] = fn
+        if background: self.background.add(name)
+
+    def add_ticker(self, fn):
+        self.tickers.append(fn)
+
+    def mark_dirty(self, name):
+        self.dirty.add(name)
+        self._reschedule()
+
+    def tick_in(self, seconds):
+        """请求在指定秒数后提前执行一次 ticker"""
+        if seconds * 1000 >= self.tick_ms: return
+        due = time.monotonic() + max(seconds, 0)
+        if self.early_tick is None or due < self.early_tick:
+            self.early_tick = due
+            self._reschedule()
+
+    def set_playing(self, playing):
+        if playing != self.playing:
+            self.playing = playing
+            if playing: self.last_tick = 0.0 # 恢复播放后立即刷新一次
+            self._reschedule()
+
+    def set_hidden(self, hidden):
+        if hidden != self.hidden:
+            self.hidden = hidden
+            self._reschedule()
+
+    def _pending_background(self):
+        return not self.dirty.isdisjoint(self.background)
+
+    def _current_state(self):
+        if self.hidden:
+            return STATE_HIDDEN if self.playing or self._pending_background() else STATE_IDLE
+        if self.dirty: return STATE_ANIMATING
+        if self.playing: return STATE_PLAYING
+        return STATE_IDLE
+
+    def _enter(self, state):
+        now = time.monotonic()
+        self.state_time[self.state] += now - self.state_since
+        self.state = state
+        self.state_since = now
+
+    def _delay_ms(self):
+        if self.state == STATE_ANIMATING:
+            return self.frame_ms
+        if self.state == STATE_PLAYING:
+            now = time.monotonic()
+            delay = self.tick_ms - (now - self.last_tick) * 1000
+            if self.early_tick is not None:
+                delay = min(delay, (self.early_tick - now) * 1000)
+            return max(0, int(delay))
+        if self.state == STATE_HIDDEN:
+            if self._pending_background(): return self.tick_ms
+            hint = self.sleep_hint() if self.sleep_hint else None
+            if hint is None: return None
+            return max(self.tick_ms, int(hint * 1000))
+        return None
+
+    def _reschedule(self):
+        self._enter(self._current_state())
+        delay = self._delay_ms()
+        if delay is None:
+            self._cancel()
+            return
+        due = time.monotonic() + delay / 1000
+        if self.after_id is not None:
+            if self.due <= due + 0.001: return # 已有更早的唤醒
+            self._cancel()
+        self.due = due
+        self.after_id = self.widget.after(delay, self._run)
+
+    def _cancel(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+
+    def _run(self):
+        self.after_id = None
+        now = time.monotonic()
+        self.wakeups[self.state] += 1
+
+        if self.dirty and (not self.hidden or self._pending_background()):
+            dt = (now - self.last_frame) * 1000 if self.last_frame else self.frame_ms
+            self.last_frame = now
+            for name in list(self.dirty):
+                if self.hidden and name not in self.background: continue # 界面动画等窗口重新显示
+                if not self.animations[name](dt):
+                    self.dirty.discard(name)
+        if not self.dirty:
+            self.last_frame = None
+
+        early = self.early_tick is not None and now >= self.early_tick - 0.001
+        if self.playing and (self.hidden or early or (now - self.last_tick) * 1000 >= self.tick_ms - 1):
+            self.last_tick = now
+            self.early_tick = None
+            for fn in self.tickers:
+                fn()
+
+        self._reschedule()
+
+    def stats(self):
+        """各状态下的每秒唤醒次数"""
+        self._enter(self.state)
+        result = {}
+        for s in STATES:
+            secs = self.state_time[s]
+            result[s] = {
+                "wakeups": self.wakeups[s],
+                "seconds": secs,
+                "per_sec": self.wakeups[s] / secs if secs > 0 else 0.0,
+            }
+        return result
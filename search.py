@@ -0,0 +1,206 @@
+# search.py
+import os
+import re
+import json
+import zlib
+import pickle
+import threading
+from array import array
+from bisect import bisect_left
+
+INDEX_VERSION = 2
+
+# 拉丁词按整词索引，中日韩文字按二元组索引
+RE_TOKEN = re.compile(r"[0-9a-z]+|[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]+")
+RE_LATIN = re.compile(r"[0-9a-z]+")
+
+def normalize(text):
+    return (text or "").casefold()
+
+def grams(text):
+    """标题/艺术家的一元 + 二元组，用于子串查找"""
+    result = set(text)
+    result.update(text[i:i + 2] for i in range(len(text) - 1))
+    result.discard(" ")
+    return result
+
+def tokens(text):
+    """歌词分词：拉丁词整词，中日韩连续文字拆成二元组"""
+    result = set()
+    for m in RE_TOKEN.finditer(normalize(text)):
+        tok = m.group()
+        if RE_LATIN.fullmatch(tok) or len(tok) == 1:
+            result.add(tok)
+        else:
+            result.update(tok[i:i + 2] for i in range(len(tok) - 1))
+    return result
+
+def _contains(postings, doc_id):
+    i = bisect_left(postings, doc_id)
+    return i < len(postings) and postings[i] == doc_id
+
+def _remove(postings, doc_id):
+    i = bisect_left(postings, doc_id)
+    if i < len(postings) and postings[i] == doc_id: del postings[i]
+
+def _intersect(lists):
+    """按最短的倒排表逐个二分检查 (惰性产出，取够结果即可停止)，倒排表均按文档号递增"""
+    if not lists: return
+    lists = sorted(lists, key=len)
+    first, rest = lists[0], lists[1:]
+    for d in first:
+        if all(_contains(p, d) for p in rest):
+            yield d
+
+class SearchIndex:
+    """
+    进程内的增量搜索索引：标题/艺术家支持子串匹配，歌词支持分词匹配
+    内容未变的重复添加直接忽略；内容变化时先从倒排表中删除旧文档，再追加新文档
+    """
+    def __init__(self):
+        self.paths = []          # 文档号 -> 路径
+        self.texts = []          # 文档号 -> 规范化后的 "标题\n艺术家"
+        self.lyric_sums = array('I') # 文档号 -> 歌词的 CRC32，判断重复添加的内容是否变化
+        self.alive = bytearray()
+        self.ids = {}            # 路径 -> 最新文档号
+        self.grams = {}          # 标题/艺术家 n-gram -> array 文档号
+        self.words = {}          # 歌词词元 -> array 文档号
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, path, title, artist, lyrics_text=""):
+        text = normalize(f"{title}\n{artist}")
+        lyric_sum = zlib.crc32((lyrics_text or "").encode("utf-8"))
+        with self.lock:
+            old = self.ids.get(path)
+            if old is not None:
+                if self.texts[old] == text and self.lyric_sums[old] == lyric_sum: return
+                self._drop(old)
+            doc_id = len(self.paths)
+            self.paths.append(path)
+            self.texts.append(text)
+            self.lyric_sums.append(lyric_sum)
+            self.alive.append(1)
+            self.ids[path] = doc_id
+            for g in grams(text):
+                self.grams.setdefault(g, array('I')).append(doc_id)
+            for tok in tokens(lyrics_text):
+                self.words.setdefault(tok, array('I')).append(doc_id)
+            self.dirty = True
+
+    def _drop(self, doc_id):
+        """从倒排表中删除文档 (持锁调用)，文档号保留为空位"""
+        for g in grams(self.texts[doc_id]):
+            postings = self.grams.get(g)
+            if postings is not None: _remove(postings, doc_id)
+        if self.lyric_sums[doc_id] != zlib.crc32(b""):
+            # 歌词词元没有按文档保存，只在内容变化 (很少发生) 时遍历词表
+            for postings in self.words.values():
+                _remove(postings, doc_id)
+        self.alive[doc_id] = 0
+        self.texts[doc_id] = ""
+
+    def add_rows(self, rows):
+        """接收曲库缓存的记录 (path, size, mtime, title, artist, duration, lyrics_json, cover, lrc)"""
+        for row in rows:
+            lines = json.loads(row[6] or "[]")
+            self.add(row[0], row[3], row[4], "\n".join(line[1] for line in lines))
+
+    def search(self, query, limit=200, within=None):
+        """
+        返回匹配的路径列表：标题/艺术家命中在前，歌词命中在后
+        within 为路径集合 (如当前播放列表) 时只返回其中的路径，limit 在过滤之后计数，None 表示不限
+        """
+        q = normalize(query).strip()
+        if not q: return []
+        with self.lock:
+            results = []
+            seen = set()
+
+            # 1. 标题/艺术家子串
+            parts = [p for p in q.split() if p]
+            lists = []
+            for part in parts:
+                gs = [part] if len(part) == 1 else [part[i:i + 2] for i in range(len(part) - 1)]
+                for g in gs:
+                    postings = self.grams.get(g)
+                    if postings is None:
+                        lists = None
+                        break
+                    lists.append(postings)
+                if lists is None: break
+            if lists:
+                for d in _intersect(lists):
+                    if self.alive[d] and all(part in self.texts[d] for part in parts):
+                        seen.add(d)
+                        if within is not None and self.paths[d] not in within: continue
+                        results.append(self.paths[d])
+                        if limit is not None and len(results) >= limit: return results
+
+            # 2. 歌词
+            toks = tokens(q)
+            lists = [self.words.get(t) for t in toks]
+            if toks and all(p is not None for p in lists):
+                for d in _intersect(lists):
+                    if self.alive[d] and d not in seen:
+                        if within is not None and self.paths[d] not in within: continue
+                        results.append(self.paths[d])
+                        if limit is not None and len(results) >= limit: break
+            return results
+
+    def search_positions(self, query, positions):
+        """
+        播放列表内搜索 (positions 为 path -> 播放列表索引)，返回全部匹配的索引；空查询返回 None
+        在索引内按列表过滤，曲库中的其他匹配不会挤掉列表里的结果；大曲库下需要上百毫秒，不要在界面线程调用
+        """
+        if not query.strip(): return None
+        return [positions[p] for p in self.search(query, limit=None, within=positions)]
+
+    def save(self, path):
+        with self.lock:
+            data = {
+                "version": INDEX_VERSION,
+                "paths": self.paths, "texts": self.texts, "alive": bytes(self.alive),
+                "lyric_sums": self.lyric_sums,
+                "grams": self.grams, "words": self.words,
+            }
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """
+        读取保存的索引，文件不存在、版本不符或已损坏时返回空索引 (调用方随后从曲库重建)
+        索引只是缓存，任何读取错误都不应影响启动
+        """
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            print(f"Search Index Error: {e}")
+            return cls()
+        try:
+            if data.get("version") != INDEX_VERSION:
+                return cls()
+            index = cls()
+            index.paths = data["paths"]
+            index.texts = data["texts"]
+            index.lyric_sums = data["lyric_sums"]
+            index.alive = bytearray(data["alive"])
+            index.grams = data["grams"]
+            index.words = data["words"]
+            if not len(index.paths) == len(index.texts) == len(index.lyric_sums) == len(index.alive):
+                raise ValueError("inconsistent index")
+            index.ids = {p: i for i, p in enumerate(index.paths) if index.alive[i]}
+            return index
+        except Exception as e:
+            print(f"Search Index Error: {e}")
+            return cls()
@@ -0,0 +1,79 @@
+# session.py
+import os
+import struct
+import tempfile
+
+# 文件头: 魔数, 版本, 当前索引, 曲目数, 播放位置, 当前曲目时长
+HEADER = struct.Struct("<4sHiIdd")
+MAGIC = b"MPSS"
+SESSION_VERSION = 1
+LENGTH = struct.Struct("<I")
+
+class Session:
+    """
+    上次退出时的播放状态：播放列表 + 当前曲目的显示信息
+    显示信息随快照保存，启动时无需重新读取标签即可显示
+    """
+    __slots__ = ("playlist", "index", "position", "duration", "title", "artist", "cover_ref")
+
+    def __init__(self, playlist=None, index=-1, position=0.0, duration=0.0,
+                 title="", artist="", cover_ref=None):
+        self.playlist = playlist or []
+        self.index = index
+        self.position = position
+        self.duration = duration
+        self.title = title
+        self.artist = artist
+        self.cover_ref = cover_ref
+
+def _pack_str(text):
+    data = (text or "").encode("utf-8", "surrogatepass")
+    return LENGTH.pack(len(data)) + data
+
+def save(path, sess):
+    """写出紧凑的二进制快照；路径以 \\0 分隔存为一整块，读取时一次解码即可"""
+    paths = "\0".join(sess.playlist)
+    parts = [
+        HEADER.pack(MAGIC, SESSION_VERSION, sess.index, len(sess.playlist), sess.position, sess.duration),
+        _pack_str(sess.title), _pack_str(sess.artist), _pack_str(sess.cover_ref), _pack_str(paths),
+    ]
+    # 每次保存用独立的临时文件，后台线程与退出时的保存可能同时进行
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+def load(path):
+    """读取快照，文件不存在、损坏或版本不符时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        magic, version, index, count, position, duration = HEADER.unpack_from(data)
+        if magic != MAGIC or version != SESSION_VERSION: return None
+        offset = HEADER.size
+        fields = []
+        for _ in range(4):
+            (n,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            if offset + n > len(data): return None
+            fields.append(data[offset:offset + n].decode("utf-8", "surrogatepass"))
+            offset += n
+    except (struct.error, UnicodeDecodeError):
+        return None
+    title, artist, cover_ref, paths = fields
+    playlist = paths.split("\0") if paths else []
+    if len(playlist) != count: return None
+    if not -1 <= index < count: index = -1
+    return Session(playlist, index, position, duration, title, artist, cover_ref or None)
+
+def find_missing(paths):
+    """后台校验：返回已不存在的文件"""
+    return {p for p in paths if not os.path.isfile(p)}
@@ -1,6 +1,6 @@
 # splash.py
 import tkinter as tk
-import utils
+import config
 
 class SplashScreen:
     def __init__(self):
@@ -24,8 +24,7 @@ class SplashScreen:
         # 绘制内容
         self.draw_content()
         
-        # 1.5秒后关闭
-        self.root.after(1500, self.close)
+        self.warm = None
         
     def draw_content(self):
         w, h = 600, 350
@@ -37,13 +36,29 @@ class SplashScreen:
         self.canvas.create_text(
             cx, cy, 
             text="♪Music", 
-            font=(utils.REAL_FONT_NAME, 49, "bold"), 
+            font=(config.FONT_NAME, 49, "bold"), 
             fill="black"
         )
         
         
+    def dpi(self):
+        return self.root.winfo_fpixels("1i")
+
     def close(self):
         self.root.destroy()
         
     def show(self):
         self.root.mainloop()
+
+    def run(self, warm):
+        """显示开屏页面直到后台预加载完成；页面保持显示，主窗口画出第一帧后再 close()"""
+        self.warm = warm
+        warm.start()
+        self.root.after(15, self._poll)
+        self.show()
+
+    def _poll(self):
+        if self.warm.done.is_set():
+            self.root.quit()
+        else:
+            self.root.after(15, self._poll)
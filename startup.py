@@ -0,0 +1,91 @@
+# startup.py
+import os
+import sys
+import json
+import time
+import importlib
+import threading
+import config
+
+T0 = time.perf_counter()
+
+# 设置后主窗口画出第一帧即输出各阶段耗时并退出，供 bench.py startup 使用
+PROBE_ENV = "MUSIC_PLAYER_STARTUP_PROBE"
+
+# 开屏期间在后台导入的重量级模块
+HEAVY_MODULES = ("PIL.Image", "PIL.ImageTk", "pygame", "mutagen", "customtkinter", "tkinterdnd2")
+
+# 按钮图标：refs 键 -> (图标名, 尺寸)
+ICONS = {
+    "btn_play": ("play", 55), "btn_pause": ("pause", 55),
+    "btn_prev": ("prev", 35), "btn_next": ("next", 35),
+    "btn_import": ("import", 30), "btn_list": ("list", 30),
+}
+
+class Preload:
+    """
+    启动时的重活：导入重量级模块、打开音频后端、打开曲库与搜索索引、读取会话、
+    绘制图标并渲染首帧背景。开屏页面显示时在后台线程执行，主窗口创建后直接复用结果
+    """
+    def __init__(self, dpi=96.0):
+        self.dpi = dpi     # 由开屏窗口得到的屏幕 DPI
+        self.audio = None  # audio.AudioBackend
+        self.scale = 1.0   # 图标缩放比例
+        self.library = None
+        self.search_index = None
+        self.render_cache = None
+        self.memory = None # 图像内存预算
+        self.session = None
+        self.cover = None  # 首帧显示的封面：上次会话的封面或默认封面
+        self.icon_atlas = None
+        self.icons = {}
+        self.timings = {}  # 各阶段耗时 (ms)
+        self.error = None
+        self.done = threading.Event()
+
+    def _step(self, name, fn):
+        t = time.perf_counter()
+        result = fn()
+        self.timings[name] = (time.perf_counter() - t) * 1000
+        return result
+
+    def run(self):
+        try:
+            for name in HEAVY_MODULES:
+                try: self._step("import " + name, lambda: importlib.import_module(name))
+                except ImportError: pass # 缺失的依赖留给主模块导入时报错
+            import assets, audio, library, memory, metadata, render_cache, search, session
+            self.audio = self._step("audio", audio.create_backend)
+            self.library = self._step("library", library.LibraryCache)
+            self.search_index = self._step("search_index", lambda: search.SearchIndex.load(
+                os.path.join(config.CACHE_DIR, config.SEARCH_INDEX_NAME)))
+            self.session = self._step("session", lambda: session.load(
+                os.path.join(config.CACHE_DIR, config.SESSION_NAME)))
+
+            self.scale = assets.quantize_scale(self.dpi)
+            self.icon_atlas = assets.IconAtlas(config.CACHE_DIR)
+            self.icons = self._step("icons", lambda: self.icon_atlas.ensure(ICONS, self.scale))
+
+            if self.session and self.session.index >= 0:
+                self.cover = self.library.load_cover(self.session.cover_ref)
+            else:
+                self.cover = metadata.get_default_cover()
+            self.render_cache = render_cache.RenderCache(config.RENDER_CACHE_BYTES)
+            self.memory = memory.MemoryBudget(config.IMAGE_MEMORY_BUDGET)
+            self.memory.register("render", self.render_cache)
+            self._step("first_visuals", lambda: self.render_cache.render(self.cover, config.START_WIDTH, config.START_HEIGHT))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def start(self):
+        threading.Thread(target=self.run, name="preload", daemon=True).start()
+
+def report_first_frame(warm):
+    """启动探针：输出一行 JSON 后返回 True，调用方随即退出"""
+    if not os.environ.get(PROBE_ENV): return False
+    result = {"first_frame_ms": (time.perf_counter() - T0) * 1000, "preload": warm.timings}
+    sys.stdout.write(json.dumps(result) + "\n")
+    sys.stdout.flush()
+    return True
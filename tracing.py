@@ -0,0 +1,163 @@
+# tracing.py
+# 可选的性能追踪：记录回调耗时 (span)、after() 调度延迟、帧耗时与切歌延迟直方图，导出 Chrome trace JSON
+# 通过环境变量 MUSIC_PLAYER_TRACE=<输出路径> 或命令行 --trace [路径] 启用；未启用时不包装任何函数
+import os
+import json
+import time
+import threading
+from collections import deque
+
+ENV = "MUSIC_PLAYER_TRACE"
+DEFAULT_PATH = "music-trace.json"
+MAX_EVENTS = 500000
+
+# 直方图分桶上界 (ms)
+BUCKETS = (1, 2, 4, 8, 16, 33, 50, 100, 250, 500, 1000, 2500)
+
+tracer = None # 未启用时为 None
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.samples = deque(maxlen=10000) # 只保留最近的样本用于计算分位数
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms):
+        i = 0
+        while i < len(BUCKETS) and ms > BUCKETS[i]: i += 1
+        self.counts[i] += 1
+        self.samples.append(ms)
+        self.total += ms
+        if ms > self.max: self.max = ms
+
+    def summary(self):
+        n = sum(self.counts)
+        s = sorted(self.samples)
+        pick = lambda q: s[min(int(len(s) * q), len(s) - 1)] if s else 0.0
+        labels = [f"<={b}ms" for b in BUCKETS] + [f">{BUCKETS[-1]}ms"]
+        return {
+            "count": n,
+            "mean_ms": self.total / n if n else 0.0,
+            "p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": self.max,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+class Tracer:
+    def __init__(self, path):
+        self.path = path
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.hists = {}
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.t0 = time.perf_counter()
+        self.pid = os.getpid()
+
+    def _us(self, t):
+        return (t - self.t0) * 1e6
+
+    def span(self, name, start, end, cat="app"):
+        tid = threading.get_ident()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        self.events.append({"name": name, "cat": cat, "ph": "X", "pid": self.pid, "tid": tid,
+                            "ts": self._us(start), "dur": (end - start) * 1e6})
+
+    def counter(self, name, value):
+        self.events.append({"name": name, "ph": "C", "pid": self.pid, "ts": self._us(time.perf_counter()),
+                            "args": {name: value}})
+
+    def observe(self, name, ms):
+        with self.lock:
+            hist = self.hists.get(name)
+            if hist is None: hist = self.hists[name] = Histogram()
+            hist.observe(ms)
+
+    def summary(self):
+        with self.lock:
+            return {name: h.summary() for name, h in self.hists.items()}
+
+    def export(self, path=None):
+        meta = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self.threads.items()]
+        data = {"traceEvents": meta + list(self.events), "displayTimeUnit": "ms",
+                "otherData": {"histograms": self.summary()}}
+        with open(path or self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path or self.path
+
+def enable(path=None):
+    global tracer
+    if tracer is None: tracer = Tracer(path or DEFAULT_PATH)
+    return tracer
+
+def wrap(fn, name, cat="app"):
+    """返回记录 span 的包装函数；未启用时原样返回"""
+    if tracer is None: return fn
+    def traced(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            tracer.span(name, start, time.perf_counter(), cat)
+    traced.__wrapped__ = fn
+    return traced
+
+def instrument(obj, names, cat="app"):
+    """用包装函数替换对象 (实例或模块) 上的同名属性，需在回调被绑定之前调用"""
+    if tracer is None: return
+    prefix = getattr(obj, "__name__", type(obj).__name__)
+    for name in names:
+        setattr(obj, name, wrap(getattr(obj, name), f"{prefix}.{name}", cat))
+
+def watch_scheduler(sched):
+    """记录 after() 的实际唤醒时间与预定时间之差，以及每次唤醒的处理耗时"""
+    if tracer is None: return
+    run = sched._run
+    def traced_run():
+        start = time.perf_counter()
+        lag = (time.monotonic() - sched.due) * 1000
+        state = sched.state
+        try:
+            run()
+        finally:
+            end = time.perf_counter()
+            tracer.span(f"frame ({state})", start, end, "scheduler")
+            tracer.observe("after_lag_ms", max(lag, 0.0))
+            tracer.counter("after_lag_ms", max(lag, 0.0))
+            if state == "animating":
+                tracer.observe("frame_ms", (end - start) * 1000)
+    sched._run = traced_run
+
+def watch_track_switch(player):
+    """从 play_index 到 start_track 完成的切歌延迟"""
+    if tracer is None: return
+    play_index, start_track = player.play_index, player.start_track
+    pending = {}
+    def traced_play_index(index):
+        pending["t"] = time.perf_counter()
+        return play_index(index)
+    def traced_start_track(track, gapless=False):
+        try:
+            return start_track(track, gapless)
+        finally:
+            t = pending.pop("t", None)
+            if t is not None:
+                end = time.perf_counter()
+                tracer.span("track switch", t, end, "switch")
+                tracer.observe("track_switch_ms", (end - t) * 1000)
+    player.play_index = traced_play_index
+    player.start_track = traced_start_track
+
+def finish():
+    """导出追踪文件并打印直方图摘要"""
+    if tracer is None: return None
+    path = tracer.export()
+    for name, s in tracer.summary().items():
+        print(f"[trace] {name}: n={s['count']} p50={s['p50_ms']:.1f}ms p95={s['p95_ms']:.1f}ms max={s['max_ms']:.1f}ms")
+    print(f"[trace] written to {path}")
+    return path
+
+if os.environ.get(ENV):
+    enable(os.environ[ENV] if os.environ[ENV] != "1" else None)
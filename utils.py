@@ -3,17 +3,42 @@ import ctypes
 import tkinter as tk
 from tkinter import font
 from PIL import Image, ImageFilter, ImageEnhance
+import config
 
 def load_font_and_get_name():
-    return "Microsoft YaHei UI"
+    return config.FONT_NAME
 
 REAL_FONT_NAME = load_font_and_get_name()
 
 def fmt_time(sec):
     return f"{int(sec//60)}:{int(sec%60):02}"
 
-def process_background(pil_img, win_w, win_h):
-    """生成全屏模糊背景图"""
+def _crop_box(img_w, img_h, win_w, win_h):
+    """按窗口比例居中裁剪的源图区域 (等同于先等比放大铺满窗口再裁剪)"""
+    img_ratio = img_w / img_h
+    win_ratio = win_w / win_h
+    if img_ratio > win_ratio:
+        crop_w = img_h * win_ratio
+        return ((img_w - crop_w) / 2, 0, (img_w + crop_w) / 2, img_h)
+    crop_h = img_w / win_ratio
+    return (0, (img_h - crop_h) / 2, img_w, (img_h + crop_h) / 2)
+
+def _blur_small(pil_img, win_w, win_h, work_scale):
+    """在缩小 work_scale 倍的工作分辨率上裁剪、模糊并调暗"""
+    work = (max(1, round(win_w / work_scale)), max(1, round(win_h / work_scale)))
+    box = _crop_box(pil_img.width, pil_img.height, win_w, win_h)
+    small = pil_img.resize(work, Image.Resampling.BICUBIC, box=box, reducing_gap=3.0)
+    small = small.filter(ImageFilter.GaussianBlur(radius=config.BLUR_RADIUS / work_scale))
+    return ImageEnhance.Brightness(small).enhance(0.4)
+
+def process_background(pil_img, win_w, win_h, work_scale=config.BLUR_WORK_SCALE):
+    """
+    生成全屏模糊背景图
+    半径 80 的模糊只剩低频，在低分辨率上模糊后放大与全分辨率结果视觉上一致；work_scale=1 为原始的全分辨率算法
+    """
+    if work_scale > 1:
+        return _blur_small(pil_img, win_w, win_h, work_scale).resize((win_w, win_h), Image.Resampling.BICUBIC)
+
     img_ratio = pil_img.width / pil_img.height
     win_ratio = win_w / win_h
     
@@ -33,9 +58,27 @@ def process_background(pil_img, win_w, win_h):
     
     bg_cropped = bg_resized.crop((left, top, right, bottom))
     
-    bg_blur = bg_cropped.filter(ImageFilter.GaussianBlur(radius=80))
+    bg_blur = bg_cropped.filter(ImageFilter.GaussianBlur(radius=config.BLUR_RADIUS))
     
     enhancer = ImageEnhance.Brightness(bg_blur)
     bg_final = enhancer.enhance(0.4)
     
     return bg_final
+
+def preview_background(pil_img, win_w, win_h):
+    """拖动调整窗口时的快速预览：更低的工作分辨率 + 双线性放大"""
+    small = _blur_small(pil_img, win_w, win_h, config.BLUR_PREVIEW_SCALE)
+    return small.resize((win_w, win_h), Image.Resampling.BILINEAR)
+
+def cover_size(win_w, win_h):
+    """封面显示边长"""
+    max_size = int(win_w * config.WIDTH_RATIO)
+    max_h = int(win_h * config.ALBUM_HEIGHT_RATIO)
+    return min(max_size, max_h)
+
+def render_visuals(pil_img, win_w, win_h):
+    """生成背景图与缩放后的封面 (纯 PIL，可在后台线程执行)"""
+    bg_img = process_background(pil_img, win_w, win_h)
+    size = cover_size(win_w, win_h)
+    cover_img = pil_img.resize((size, size), Image.Resampling.LANCZOS)
+    return bg_img, cover_img